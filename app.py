@@ -1,26 +1,44 @@
+import hashlib
 import json
 import os
+import re
 import sys
-import random
+import tempfile
+import time
 from datetime import datetime
-from typing import List, Dict, Tuple, Optional
+from typing import TYPE_CHECKING, List, Dict, Tuple, Optional
 import argparse # Added for command-line arguments
 
-import requests
 import numpy as np
 from PIL import Image, ImageDraw, ImageFont
-from moviepy.video.io.VideoFileClip import VideoFileClip
-from moviepy.video.VideoClip import ImageClip
-from moviepy.video.compositing.CompositeVideoClip import CompositeVideoClip
-from moviepy.editor import VideoFileClip, ImageClip, CompositeVideoClip, vfx
+
+if TYPE_CHECKING:
+    from moviepy.editor import VideoFileClip, VideoClip, ImageClip, CompositeVideoClip
+
+from background_cache import PREPARE_VERSION, list_source_backgrounds, prepare_all_backgrounds, resolve_background
+from chunked_encode import chunk_dir, concat_chunks, gop_args, plan_chunks, remove_chunks
+from destination_encodes import DESTINATIONS, check_destinations, destination_path, encode_destinations
+from encoder_profiles import DEFAULT_PROFILE, choose_profile
+from ffmpeg_utils import FrameReader, cover_crop_scale, cover_filter, run_ffmpeg
+from font_registry import get_font, load_font
+from frame_compositor import OverlayCompositor, blend_premultiplied, blend_rgba, premultiply
+from glyph_atlas import atlas_for
+from gradients import horizontal_gradient
+import layout_templates
+import logo_cache
+import render_cache
+import text_layout
+from raw_frames import RawFrames, is_raw
+from render_metrics import StageTimer, format_record, maybe_stage, timings_path_for
+from render_pipeline import FramePipeline, RawVideoEncoder, format_report as format_pipeline_report
 
 # Get the directory of the current script (app.py)
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 
 URL = "https://karndiy.pythonanywhere.com/goldjsonv2"
 
-# Default background selection logic (can be overridden by args)
-BG_PATH_DEFAULT = os.path.join(SCRIPT_DIR, "assets", f"bg_{random.randint(0, 9):02d}.mp4")
+# Fixed background for every render (benchmarks set this); None = select_background().
+BG_PATH_DEFAULT: Optional[str] = None
 OUT_VIDEO_PATH_DEFAULT = os.path.join(SCRIPT_DIR, "out", "output.mp4")
 OUT_IMAGE_PATH_DEFAULT = os.path.join(SCRIPT_DIR, "out", "output_panel.jpg")
 
@@ -31,13 +49,35 @@ FPS = 15
 
 # --- Customizable elements mapping (add more as assets are available) ---
 BACKGROUND_THEMES = {
-    "random": None, # Will use default random logic
+    "random": None, # Seeded per-update pick, see select_background()
     "elegant": os.path.join(SCRIPT_DIR, "assets", "bg_elegant.mp4"), # Example specific file
     "modern": os.path.join(SCRIPT_DIR, "assets", "bg_modern.mp4"),   # Example specific file
     # Add more themes and their corresponding file paths here
 }
 
+def select_background(entry: Dict[str, str], seed: str = "") -> str:
+    """Stable pick from assets/bg_NN.mp4, seeded by the update (asdate + nqy) or `seed`.
+
+    Replaces the old import-time random choice: reruns of the same update get
+    the same background, different updates still rotate through the set.
+    """
+    candidates = [p for p in list_source_backgrounds() if re.fullmatch(r"bg_\d+\.mp4", os.path.basename(p))]
+    if not candidates:
+        return os.path.join(SCRIPT_DIR, "assets", "bg_00.mp4")
+    seed = seed or f"{entry.get('asdate', '')}|{entry.get('nqy', '')}"
+    digest = hashlib.sha1(seed.encode("utf-8")).digest()
+    return candidates[int.from_bytes(digest[:4], "big") % len(candidates)]
+
+
+def _moviepy():
+    """Import moviepy on first use so image-only renders never load it."""
+    import moviepy.editor as mpy
+    return mpy
+
+
 def fetch_entries(url: str) -> List[Dict[str, str]]:
+    import requests
+
     resp = requests.get(url, timeout=15)
     resp.raise_for_status()
     data = resp.json()
@@ -48,92 +88,23 @@ def fetch_entries(url: str) -> List[Dict[str, str]]:
 
 def try_load_font(candidates: List[Tuple[str, int]]):
     """Try load fonts from a list of (path_or_name, size) and fall back to default."""
-    for name, size in candidates:
-        try:
-            # If name is a filename path it will load; on Windows common fonts are available.
-            return ImageFont.truetype(name, size=size)
-        except Exception:
-            continue
-    # Fallback
-    return ImageFont.load_default()
-
-
-def contains_thai(text: str) -> bool:
-    """Return True if any character is in the Thai Unicode block."""
-    for ch in text:
-        cp = ord(ch)
-        if 0x0E00 <= cp <= 0x0E7F:
-            return True
-    return False
+    # Resolution and loaded fonts are cached process-wide by font_registry.
+    return load_font(candidates)
 
 
 def wrap_text(draw: ImageDraw.ImageDraw, text: str, font: ImageFont.FreeTypeFont, max_width: int) -> str:
-    """Wrap text to fit max_width.
-
-    - For languages with spaces, wrap by words.
-    - For Thai (no spaces commonly), fall back to character-based wrapping.
-    """
-    lines: List[str] = []
-    for paragraph in text.split("\n"):
-        if not paragraph:
-            lines.append("")
-            continue
-
-        if contains_thai(paragraph) or " " not in paragraph:
-            # Character-based greedy wrap (handles Thai and long unspaced strings)
-            current = ""
-            for ch in paragraph:
-                trial = current + ch
-                if draw.textlength(trial, font=font) <= max_width or not current:
-                    current = trial
-                else:
-                    lines.append(current)
-                    current = ch
-            if current:
-                lines.append(current)
-        else:
-            # Word-based wrap
-            words = paragraph.split(" ")
-            current = words[0]
-            for w in words[1:]:
-                trial = current + " " + w
-                if draw.textlength(trial, font=font) <= max_width:
-                    current = trial
-                else:
-                    lines.append(current)
-                    current = w
-            lines.append(current)
-    return "\n".join(lines)
+    """Wrap text to fit max_width (see text_layout.wrap_text; `draw` is unused)."""
+    return text_layout.wrap_text(text, font, max_width)
 
 
-def make_text_clip(text: str, width: int, max_height: int,
-                   font_color: Tuple[int, int, int] = (255, 255, 255),
-                   bg_color: Tuple[int, int, int, int] = (0, 0, 0, 160),
-                   pad: int = 24,
-                   align: str = "ls") -> ImageClip:
+def render_text_image(text: str, width: int, max_height: int,
+                      font_color: Tuple[int, int, int] = (255, 255, 255),
+                      bg_color: Tuple[int, int, int, int] = (0, 0, 0, 160),
+                      pad: int = 24,
+                      align: str = "ls") -> Image.Image:
     # Load fonts (prefer Thai-capable fonts)
-    title_font = try_load_font([
-        os.path.join(SCRIPT_DIR, "fonts", "THSarabunNew.ttf"), # Assuming a fonts folder
-        ("C:/Windows/Fonts/THSarabunNew.ttf", 72),
-        ("C:/Windows/Fonts/LeelawUI.ttf", 64),
-        ("C:/Windows/Fonts/Tahoma.ttf", 60),
-        ("THSarabunNew.ttf", 72),
-        ("LeelawUI.ttf", 64),
-        ("Tahoma.ttf", 60),
-        ("Arial Unicode.ttf", 60),
-        ("arialuni.ttf", 60),
-    ])
-    body_font = try_load_font([
-        os.path.join(SCRIPT_DIR, "fonts", "THSarabunNew.ttf"),
-        ("C:/Windows/Fonts/THSarabunNew.ttf", 56),
-        ("C:/Windows/Fonts/LeelawUI.ttf", 50),
-        ("C:/Windows/Fonts/Tahoma.ttf", 48),
-        ("THSarabunNew.ttf", 56),
-        ("LeelawUI.ttf", 50),
-        ("Tahoma.ttf", 48),
-        ("Arial Unicode.ttf", 48),
-        ("arialuni.ttf", 48),
-    ])
+    title_font = get_font("text_title")
+    body_font = get_font("text_body")
 
     # Prepare drawing surface for measuring
     dummy_img = Image.new("RGBA", (width, max_height), (0, 0, 0, 0))
@@ -152,13 +123,13 @@ def make_text_clip(text: str, width: int, max_height: int,
     body_wrapped = wrap_text(draw, body, body_font, content_width) if body else ""
 
     # Measure sizes
-    title_bbox = draw.multiline_textbbox((0, 0), title_wrapped, font=title_font, spacing=6)
+    title_bbox = text_layout.multiline_bbox(title_wrapped, title_font, spacing=6)
     title_w = title_bbox[2] - title_bbox[0]
     title_h = title_bbox[3] - title_bbox[1]
 
     body_h = 0
     if body_wrapped:
-        body_bbox = draw.multiline_textbbox((0, 0), body_wrapped, font=body_font, spacing=6)
+        body_bbox = text_layout.multiline_bbox(body_wrapped, body_font, spacing=6)
         body_h = body_bbox[3] - body_bbox[1]
 
     box_w = min(width, max(title_w, content_width) + 2 * pad)
@@ -179,9 +150,19 @@ def make_text_clip(text: str, width: int, max_height: int,
     if body_wrapped:
         d.multiline_text((pad, cursor_y), body_wrapped, font=body_font, fill=font_color, spacing=6, align="left")
 
+    return img
+
+
+def make_text_clip(text: str, width: int, max_height: int,
+                   font_color: Tuple[int, int, int] = (255, 255, 255),
+                   bg_color: Tuple[int, int, int, int] = (0, 0, 0, 160),
+                   pad: int = 24,
+                   align: str = "ls") -> "ImageClip":
+    img = render_text_image(text, width, max_height, font_color=font_color,
+                            bg_color=bg_color, pad=pad, align=align)
     # Convert to ImageClip
     np_img = np.array(img)
-    clip = ImageClip(np_img)
+    clip = _moviepy().ImageClip(np_img)
     return clip
 
 
@@ -250,483 +231,795 @@ def arrow_and_color(delta: Optional[float]) -> Tuple[str, Tuple[int, int, int]]:
 
 
 def draw_gradient(size: Tuple[int, int], color1: Tuple[int, int, int], color2: Tuple[int, int, int]) -> Image.Image:
-    w, h = size
-    grad = Image.new("RGB", (w, h), color1)
-    # horizontal gradient
-    for x in range(w):
-        t = x / max(1, w - 1)
-        r = int(color1[0] * (1 - t) + color2[0] * t)
-        g = int(color1[1] * (1 - t) + color2[1] * t)
-        b = int(color1[2] * (1 - t) + color2[2] * t)
-        ImageDraw.Draw(grad).line([(x, 0), (x, h)], fill=(r, g, b))
-    return grad
-
-
-def _text_center_y(draw: ImageDraw.ImageDraw, box: Tuple[int, int, int, int], text: str, font: ImageFont.FreeTypeFont) -> Tuple[int, int]:
-    x1, y1, x2, y2 = box
-    bbox = draw.textbbox((0, 0), text, font=font)
-    th = bbox[3] - bbox[1]
-    return x1, int(y1 + (y2 - y1 - th) / 2)
-
-
-def _text_right(draw: ImageDraw.ImageDraw, box: Tuple[int, int, int, int], text: str, font: ImageFont.FreeTypeFont, margin: int = 24) -> Tuple[int, int]:
-    x1, y1, x2, y2 = box
-    tw = draw.textlength(text, font=font)
-    bbox = draw.textbbox((0, 0), text, font=font)
-    th = bbox[3] - bbox[1]
-    return x2 - margin - int(tw), int(y1 + (y2 - y1 - th) / 2)
-
-
-def _measure_chip_width(draw: ImageDraw.ImageDraw, text_left: str, text_right: str,
-                        font_left: ImageFont.FreeTypeFont, font_right: ImageFont.FreeTypeFont,
-                        pad_x: int = 18, pad_y: int = 10) -> Tuple[int, int]:
-    tlw = draw.textlength(text_left, font=font_left)
-    trw = draw.textlength(text_right, font=font_right)
-    h = max(
-        draw.textbbox((0, 0), text_left, font=font_left)[3] - draw.textbbox((0, 0), text_left, font=font_left)[1],
-        draw.textbbox((0, 0), text_right, font=font_right)[3] - draw.textbbox((0, 0), text_right, font=font_right)[1],
-    ) + pad_y * 2
-    w = int(tlw + trw + pad_x * 3)
-    return w, h
-
-
-def _draw_chip(base: Image.Image, xy: Tuple[int, int], text_left: str, text_right: str,
-               font_left: ImageFont.FreeTypeFont, font_right: ImageFont.FreeTypeFont,
-               bg: Tuple[int, int, int], fg_left=(255, 255, 255), fg_right=(255, 255, 255)) -> int:
-    draw = ImageDraw.Draw(base)
-    pad_y = 10
-    pad_x = 18
-    tlw = draw.textlength(text_left, font=font_left)
-    trw = draw.textlength(text_right, font=font_right)
-    h = max(
-        draw.textbbox((0, 0), text_left, font=font_left)[3] - draw.textbbox((0, 0), text_left, font=font_left)[1],
-        draw.textbbox((0, 0), text_right, font=font_right)[3] - draw.textbbox((0, 0), text_right, font=font_right)[1],
-    ) + pad_y * 2
-    w = int(tlw + trw + pad_x * 3)
-    x, y = xy
-    try:
-        ImageDraw.Draw(base).rounded_rectangle([x, y, x + w, y + h], radius=h // 2, fill=bg)
-    except Exception:
-        ImageDraw.Draw(base).rectangle([x, y, x + w, y + h], fill=bg)
-    # write texts
-    ty = y + pad_y
-    draw.text((x + pad_x, ty), text_left, font=font_left, fill=fg_left)
-    draw.text((x + pad_x + tlw + pad_x // 2, ty), text_right, font=font_right, fill=fg_right)
-    return w
-
-
-def _draw_triangle(draw: ImageDraw.ImageDraw, center: Tuple[int, int], size: int, color: Tuple[int, int, int], up: bool = True):
-    cx, cy = center
-    if up:
-        pts = [(cx, cy - size // 2), (cx - size // 2, cy + size // 2), (cx + size // 2, cy + size // 2)]
-    else:
-        pts = [(cx, cy + size // 2), (cx - size // 2, cy - size // 2), (cx + size // 2, cy - size // 2)]
-    draw.polygon(pts, fill=color)
-
-
-def make_panel_clip(entry: Dict[str, str], prev_entry: Optional[Dict[str, str]]) -> ImageClip:
-    # Card size relative to screen
-    card_w = int(W * 0.94)
-    card_h = int(H * 0.55)
-    radius = 32
-
-    # Professional Color Scheme (Navy Blue + Gold)
-    header_c1 = (25, 55, 109)      # Dark Navy Blue
-    header_c2 = (41, 84, 144)      # Medium Navy Blue
-    accent_gold = (212, 175, 55)   # Professional Gold
-    table_bg = (255, 255, 255)
-    table_head_bg = (240, 245, 250)  # Light blue-gray
-    grid = (200, 210, 220)
-    text_primary = (30, 30, 30)
-    text_muted = (100, 110, 120)
-    green = (34, 139, 34)
-    red = (220, 53, 69)
-
-    # Fonts
-    title_font = load_thai_font([
-        (os.path.join(SCRIPT_DIR, "fonts", "LeelawUI.ttf"), 60), # Assuming fonts folder
-        ("C:/Windows/Fonts/LeelawUI.ttf", 60),
-        ("C:/Windows/Fonts/THSarabunNew.ttf", 72),
-        ("C:/Windows/Fonts/Tahoma.ttf", 56),
-        ("C:/Windows/Fonts/segoeui.ttf", 56),
-    ])
-    head_font = load_thai_font([
-        (os.path.join(SCRIPT_DIR, "fonts", "LeelawUI.ttf"), 48),
-        ("C:/Windows/Fonts/LeelawUI.ttf", 48),
-        ("C:/Windows/Fonts/THSarabunNew.ttf", 60),
-        ("C:/Windows/Fonts/Tahoma.ttf", 44),
-        ("C:/Windows/Fonts/segoeui.ttf", 44),
-    ])
-    label_font = load_thai_font([
-        (os.path.join(SCRIPT_DIR, "fonts", "LeelawUI.ttf"), 46),
-        ("C:/Windows/Fonts/LeelawUI.ttf", 46),
-        ("C:/Windows/Fonts/THSarabunNew.ttf", 56),
-        ("C:/Windows/Fonts/Tahoma.ttf", 42),
-        ("C:/Windows/Fonts/segoeui.ttf", 42),
-    ])
-    num_font = load_thai_font([
-        (os.path.join(SCRIPT_DIR, "fonts", "arialbd.ttf"), 48),
-        ("C:/Windows/Fonts/arialbd.ttf", 48),
-        ("C:/Windows/Fonts/Tahoma.ttf", 48),
-        ("C:/Windows/Fonts/segoeuib.ttf", 48),
-    ])
-    chip_l_font = load_thai_font([
-        (os.path.join(SCRIPT_DIR, "fonts", "LeelawUI.ttf"), 40),
-        ("C:/Windows/Fonts/LeelawUI.ttf", 40),
-        ("C:/Windows/Fonts/Tahoma.ttf", 36),
-        ("C:/Windows/Fonts/segoeui.ttf", 36),
-    ])
-    chip_r_font = load_thai_font([
-        (os.path.join(SCRIPT_DIR, "fonts", "arialbd.ttf"), 40),
-        ("C:/Windows/Fonts/arialbd.ttf", 40),
-        ("C:/Windows/Fonts/Tahoma.ttf", 40),
-    ])
-    small_font = load_thai_font([
-        (os.path.join(SCRIPT_DIR, "fonts", "LeelawUI.ttf"), 40),
-        ("C:/Windows/Fonts/LeelawUI.ttf", 40),
-        ("C:/Windows/Fonts/Tahoma.ttf", 36),
-        ("C:/Windows/Fonts/segoeui.ttf", 36),
-    ])
-
-    # Base image with rounded card
-    img = Image.new("RGBA", (card_w, card_h), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(img)
-    try:
-        draw.rounded_rectangle([(0, 0), (card_w - 1, card_h - 1)], radius=radius, fill=(255, 255, 255, 235))
-    except Exception:
-        draw.rectangle([(0, 0), (card_w - 1, card_h - 1)], fill=(255, 255, 255, 235))
-
-    # Header gradient
-    header_h = int(card_h * 0.20)
-    grad = draw_gradient((card_w - 2, header_h), header_c1, header_c2)
-    header_img = Image.new("RGBA", (card_w - 2, header_h))
-    header_img.paste(grad, (0, 0))
-    img.paste(header_img, (1, 1))
-
-    # Header text with subtitle
-    draw = ImageDraw.Draw(img)
-    title = "ราคาทองคำวันนี้"
-    subtitle = "ข้อมูลจากสมาคมค้าทองคำ"
-    
-    tw = draw.textlength(title, font=title_font)
-    draw.text(((card_w - tw) // 2, int(header_h * 0.20)), title, font=title_font, fill=(255, 255, 255))
-    
-    # Subtitle in gold
-    stw = draw.textlength(subtitle, font=small_font)
-    draw.text(((card_w - stw) // 2, int(header_h * 0.60)), subtitle, font=small_font, fill=accent_gold)
-
-    # Metrics chip row (Diff) — centered
-    chip_y = header_h + int(card_h * 0.02)
-    print(f"c_1 -> {chip_y}")
-    goldspot = entry.get("goldspot", "-")
-    bahtusd = entry.get("bahtusd", "-")
-    diff_x = entry.get("diff", "-")
-    mw, _ = _measure_chip_width(draw, "Diff", f"{diff_x}", chip_l_font, chip_r_font,18,16)
-    diff_val = parse_money(str(diff_x))
-
-    dv = (diff_val or 0)
-    is_up = dv > 0                       # or >= 0 if zero should be "UP"
-    m_head = "ขาขึ้น" if is_up else "ขาลง"
-    xbg = green if is_up else red
-
-   
-    start_x = (card_w - mw) // 2
-    _draw_chip(
-        img,
-        (start_x, chip_y),
-        m_head,
-        f"{diff_x}",
-        chip_l_font,
-        chip_r_font,
-        bg=xbg,
-    )
-  
-
-    # Table area
-    table_x = int(card_w * 0.04)
-    table_y = chip_y + int(card_h * 0.10)
-    table_w = card_w - 2 * table_x
-    row_h = int((card_h - table_y - int(card_h * 0.16)) / 4)
-
-    col_left_w = int(table_w * 0.42)
-    col_mid_w = int((table_w - col_left_w) / 2)
-    col_right_w = table_w - col_left_w - col_mid_w
-
-    def cell_rect(row: int, col: int) -> Tuple[int, int, int, int]:
-        x = table_x + [0, col_left_w, col_left_w + col_mid_w][col]
-        w = [col_left_w, col_mid_w, col_right_w][col]
-        y = table_y + row * row_h
-        return x, y, x + w, y + row_h
-
-    # Header row backgrounds
-    draw.rectangle(cell_rect(0, 0), fill=(246, 246, 246))
-    draw.rectangle(cell_rect(0, 1), fill=table_head_bg)
-    draw.rectangle(cell_rect(0, 2), fill=table_head_bg)
-
-    # Grid lines
-    for r in range(5):
-        y = table_y + r * row_h
-        draw.line([(table_x, y), (table_x + table_w, y)], fill=grid, width=2)
-    # verticals
-    draw.line([(table_x, table_y), (table_x, table_y + 4 * row_h)], fill=grid, width=2)
-    draw.line([(table_x + col_left_w, table_y), (table_x + col_left_w, table_y + 4 * row_h)], fill=grid, width=2)
-    draw.line([(table_x + col_left_w + col_mid_w, table_y), (table_x + col_left_w + col_mid_w, table_y + 4 * row_h)], fill=grid, width=2)
-    draw.line([(table_x + table_w, table_y), (table_x + table_w, table_y + 4 * row_h)], fill=grid, width=2)
-
-    # Header labels
-    left_header_box = cell_rect(0, 0)
-    lx, ly = _text_center_y(draw, left_header_box, "96.5%", head_font)
-    draw.text((lx + 16, ly), "96.5%", font=head_font, fill=text_primary)
-    hmid_box = cell_rect(0, 1)
-    hright_box = cell_rect(0, 2)
-    mx, my = _text_center_y(draw, hmid_box, "รับซื้อ", head_font)
-    rx, ry = _text_center_y(draw, hright_box, "ขายออก", head_font)
-    draw.text((mx + 16, my), "รับซื้อ", font=head_font, fill=text_primary)
-    draw.text((rx + 16, ry), "ขายออก", font=head_font, fill=text_primary)
-
-    # Values
-    def draw_row(row_idx: int, label: str, left_val: str, right_val: str):
-        lbox = cell_rect(row_idx, 0)
-        mbox = cell_rect(row_idx, 1)
-        rbox = cell_rect(row_idx, 2)
-        lx, ly = _text_center_y(draw, lbox, label, label_font)
-        draw.text((lx + 16, ly), label, font=label_font, fill=text_primary)
-        # Numbers right-aligned within cells
-        lv = f"{parse_money(left_val):,.2f}" if parse_money(left_val) is not None else left_val
-        rv = f"{parse_money(right_val):,.2f}" if parse_money(right_val) is not None else right_val
-        mx, my = _text_right(draw, mbox, lv, num_font, margin=24)
-        rx, ry = _text_right(draw, rbox, rv, num_font, margin=24)
-        draw.text((mx, my), lv, font=num_font, fill=green)
-        draw.text((rx, ry), rv, font=num_font, fill=green)
-
-    draw_row(1, "ทองคำแท่ง", entry.get("blbuy", "-"), entry.get("blsell", "-"))
-    draw_row(2, "ทองรูปพรรณ", entry.get("ombuy", "-"), entry.get("omsell", "-"))
-
-    # Diff row (วันนี้ ...)
-    # Compute deltas using previous entry if available
-    delta_buy = None
-    delta_sell = None
-    diff_text = None
-    diff_text = entry.get("diff", "")
-    if prev_entry:
-        cb = parse_money(entry.get("blbuy", ""))
-        pb = parse_money(prev_entry.get("blbuy", ""))
-        cs = parse_money(entry.get("blsell", ""))
-        ps = parse_money(prev_entry.get("blsell", ""))
-        if cb is not None and pb is not None:
-            delta_buy = cb - pb
-        if cs is not None and ps is not None:
-            delta_sell = cs - ps
-
-    lbox = cell_rect(3, 0)
-    mbox = cell_rect(3, 1)
-    rbox = cell_rect(3, 2)
-    lx, ly = _text_center_y(draw, lbox, "วันนี้", label_font)
-    draw.text((lx + 16, ly), "วันนี้", font=label_font, fill=text_primary)
-    # Safely parse diff (handles commas/empty) and derive colors/arrows
-    delta_val = parse_money(diff_text)
-    delta_color = green if (delta_val or 0) > 0 else red if (delta_val or 0) < 0 else text_muted
-    is_up = (delta_val or 0) >= 0
-    
-    # Merge both cells - draw in the center spanning both columns
-    tri_size = 24
-    # Calculate merged cell area (columns 1 and 2)
-    merged_x1 = mbox[0]
-    merged_x2 = rbox[2]
-    merged_y1 = mbox[1]
-    merged_y2 = mbox[3]
-    merged_w = merged_x2 - merged_x1
-    
-    # Center the text in merged area
-    text_w = draw.textlength(diff_text + " ", font=label_font)
-    total_w = tri_size + 10 + text_w
-    start_x = merged_x1 + (merged_w - total_w) // 2
-    center_y = (merged_y1 + merged_y2) // 2
-    
-    # Draw triangle and text centered
-    _draw_triangle(draw, (start_x + tri_size // 2, center_y), tri_size, delta_color, up=is_up)
-    draw.text((start_x + tri_size + 10, center_y - 16), diff_text + " ", font=label_font, fill=delta_color)
-
-
-
-    # Metrics chips row (Gold Spot, USD/THB)
-    chip_pad_x = int(card_w * 0.04)
-    chip_y = 850 + int(card_h * 0.02)
-    print(f"c_2 -> {chip_y}")
-    goldspot = entry.get("goldspot", "-")
-    bahtusd = entry.get("bahtusd", "-")
-    diff_x = entry.get("diff", "-")
-    # left chip: Gold Spot
-    x_cursor = chip_pad_x
-    chip_w1 = _draw_chip(
-        img,
-        (x_cursor, chip_y),
-        "Gold Spot",
-        f"${goldspot}",
-        chip_l_font,
-        chip_r_font,
-        bg=accent_gold,
-    )
-    x_cursor += chip_w1 + 16
-    # right chip: USD/THB
-    chip_w2 =   _draw_chip(
-        img,
-        (x_cursor, chip_y),
-        "USD/THB",
-        f"{bahtusd}",
-        chip_l_font,
-        chip_r_font,
-        bg=header_c2,
-    )
+    # horizontal gradient (vectorized and memoized in gradients.py)
+    return horizontal_gradient(size, color1, color2)
 
-   
 
+# --- Panel layout ---
+# The panel is drawn from layouts/panel.json with the colours and strings of
+# layouts/themes/<theme>.json; the static chrome is baked once per process
+# (and cached under cache/layouts). Bump PANEL_LAYOUT_VERSION when
+# _panel_bindings changes, since the layout key only covers the files and fonts.
+PANEL_LAYOUT_VERSION = 2
+DEFAULT_PANEL_THEME = "navy"
 
+# Price fields, also the ids of their cells in the panel layout.
+PRICE_FIELDS = ("blbuy", "blsell", "ombuy", "omsell")
 
-    # Footer date/time line
-    date_str, time_str = thai_date_time(entry.get("asdate", ""))
-    left_info = date_str
-    mid_info = time_str
-    right_info = f"(ครั้งที่ {entry.get('nqy', '-')})"
-    baseline_y = card_h - int(card_h * 0.06)
-    # left
-    draw.text((int(card_w * 0.05), baseline_y), left_info, font=small_font, fill=text_muted)
-    # center
-    mid_w = draw.textlength(mid_info, font=small_font)
-    draw.text(((card_w - mid_w) // 2, baseline_y), mid_info, font=small_font, fill=text_muted)
-    # right
-    right_w = draw.textlength(right_info, font=small_font)
-    draw.text((card_w - right_w - int(card_w * 0.05), baseline_y), right_info, font=small_font, fill=text_muted)
 
-    np_img = np.array(img)
-    return ImageClip(np_img)
+def _price_text(value: str) -> str:
+    money = parse_money(value)
+    return f"{money:,.2f}" if money is not None else value
 
 
-def ensure_background(bg_path: str) -> VideoFileClip:
-    if not os.path.exists(bg_path):
-        raise FileNotFoundError(f"Background video not found: {bg_path}")
-    bg = VideoFileClip(bg_path)
-    if bg.h < H:
-        bg_resized = bg.fx(vfx.resize, height=H)
-    else:
-        bg_resized = bg.fx(vfx.resize, width=W)
+@layout_templates.binding("panel")
+def _panel_bindings(entry: Dict[str, str]) -> Dict[str, str]:
+    """Per-update panel values: trend of the diff, formatted prices, Thai date and time."""
+    delta = parse_money(str(entry["diff"])) or 0
+    date_str, time_str = thai_date_time(entry["asdate"])
+    values = {"trend": "up" if delta > 0 else "down" if delta < 0 else "flat", "date": date_str, "time": time_str}
+    for key in PRICE_FIELDS:
+        values[f"{key}_price"] = _price_text(entry[key])
+    return values
 
-    scale_w = W / bg_resized.w
-    scale_h = H / bg_resized.h
-    scale = max(scale_w, scale_h)
 
-    bg_cover = bg_resized.fx(
-        vfx.resize,
-        newsize=(int(bg_resized.w * scale), int(bg_resized.h * scale))
-    )
+def panel_template(theme_name: str = DEFAULT_PANEL_THEME) -> layout_templates.CompiledLayout:
+    """The compiled panel layout of a theme (fonts, geometry and chrome resolved once per process)."""
+    return layout_templates.compile_layout("panel", theme_name, W=W, H=H)
 
-    x_center = bg_cover.w // 2
-    y_center = bg_cover.h // 2
-    x1 = int(x_center - W / 2)
-    y1 = int(y_center - H / 2)
 
-    bg_cropped = bg_cover.fx(
-        vfx.crop,
-        x1=x1, y1=y1, x2=x1 + W, y2=y1 + H
-    )
+def panel_template_key(theme_name: str = DEFAULT_PANEL_THEME) -> str:
+    """Identifies the panel template (layout, theme, fonts) for output caches."""
+    return f"v{PANEL_LAYOUT_VERSION}_{panel_template(theme_name).key}"
 
-    if bg_cropped.duration < DURATION:
-        bg_cropped = bg_cropped.fx(vfx.loop, duration=DURATION)
 
-    return bg_cropped.subclip(0, DURATION).without_audio()
+def render_panel_image(entry: Dict[str, str], prev_entry: Optional[Dict[str, str]],
+                       theme_name: str = DEFAULT_PANEL_THEME, animated: bool = False) -> Image.Image:
+    """Render the price panel as an RGBA PIL image (cached chrome + dynamic fields).
 
+    With `animated`, the numeric price cells and the diff row are left empty
+    for PanelAnimation to draw per frame.
+    """
+    omit: List[str] = []
+    if animated:
+        omit = ["diff"] + [key for key in PRICE_FIELDS if parse_money(entry.get(key, "-")) is not None]
+    return panel_template(theme_name).render(entry, omit)
 
-def build_video(entries: List[Dict[str, str]], out_video_path: str, 
-                background_theme: str = "random", 
-                custom_message: str = "", 
-                logo_url: str = "",
-                out_image_path: Optional[str] = None) -> None:
-    
-    # Determine background video path based on theme
-    bg_video_path = BG_PATH_DEFAULT
-    if background_theme in BACKGROUND_THEMES and BACKGROUND_THEMES[background_theme] is not None:
-        bg_video_path = BACKGROUND_THEMES[background_theme]
-    
-    # Create background video clip
-    bg = ensure_background(bg_video_path)
-    
-    all_clips = [bg]
+
+def make_panel_clip(entry: Dict[str, str], prev_entry: Optional[Dict[str, str]],
+                    theme_name: str = DEFAULT_PANEL_THEME) -> "ImageClip":
+    return _moviepy().ImageClip(np.array(render_panel_image(entry, prev_entry, theme_name)))
+
+
+# Animated panel (build_video(animate=True)): the prices count up from the
+# previous update's values and the diff row flashes, then the panel holds the
+# static render for the rest of the video.
+COUNT_UP_SECONDS = 2.0
+DIFF_FLASHES = 4  # on/off blinks of the diff row while the prices count up
+
+
+class PanelAnimation:
+    """Per-frame price count-up and diff flash over a blank panel overlay layer.
+
+    The overlay carries `blank_panel` (render_panel_image(animated=True)), and
+    apply() patches each composited frame. Per price row, the patch is the
+    cached blank crop around the ink of the start and final values, with the
+    current values drawn by the glyph atlas. The diff row switches between
+    the blank and full crops of the pixels it changes. Nothing is rasterized
+    with PIL per frame. From COUNT_UP_SECONDS on, the drawn final patches are
+    reused and the frames equal the static render.
+    """
+
+    def __init__(self, entry: Dict[str, str], prev_entry: Optional[Dict[str, str]],
+                 panel_img: Image.Image, panel_pos: Tuple[int, int], theme_name: str = DEFAULT_PANEL_THEME):
+        layout = panel_template(theme_name)
+        values = layout.values(entry)
+        self.blank_panel = render_panel_image(entry, prev_entry, theme_name, animated=True)
+        blank = np.asarray(self.blank_panel)
+        full = np.asarray(panel_img)
+        px, py = panel_pos
+
+        # Prices are placed in panel coordinates first; long values overflow
+        # their cell to the left, so patches are cut from the panel, not the cell.
+        # The price cells of the layout are right-aligned ("align": "right").
+        rows: Dict[int, List[Dict]] = {}
+        for key in PRICE_FIELDS:
+            final = parse_money(entry.get(key, "-"))
+            if final is None:
+                continue  # non-numeric values are drawn statically on the blank panel
+            start = parse_money(prev_entry.get(key, "")) if prev_entry else None
+            op = layout.op(key)
+            final_text = values[f"{key}_price"]
+            _, text_y = op.position(final_text)
+            rows.setdefault(op.box[1], []).append({
+                "start": start if start is not None else 0.0, "final": final, "final_text": final_text,
+                "right": int(op.box[2] - op.pad), "text_y": text_y,
+                "atlas": atlas_for(op.font), "color": layout_templates.resolve(op.fill, values),
+            })
+
+        self.rows = []
+        for fields in rows.values():
+            # Values in between have no more digits than the start or final value.
+            boxes = [f["atlas"].ink_box(text, (f["right"] - int(f["atlas"].text_width(text)), f["text_y"]))
+                     for f in fields for text in (self.price_at(f, 0.0), f["final_text"])]
+            x1, y1 = max(0, min(b[0] for b in boxes)), max(0, min(b[1] for b in boxes))
+            x2, y2 = min(blank.shape[1], max(b[2] for b in boxes)), min(blank.shape[0], max(b[3] for b in boxes))
+            for f in fields:
+                f["right"] -= x1
+                f["text_y"] -= y1
+            patch_row = {"base": blank[y1:y2, x1:x2].copy(), "xy": (px + x1, py + y1), "fields": fields}
+            patch_row["final_planes"] = premultiply(self._draw_row(patch_row, COUNT_UP_SECONDS))
+            self.rows.append(patch_row)
+
+        # Diff row: only the pixels the triangle and text change.
+        _, row_y1, _, row_y2 = (int(v) for v in layout.op("diff").box)
+        changed = np.argwhere((full[row_y1:row_y2] != blank[row_y1:row_y2]).any(axis=2))
+        (y1, x1), (y2, x2) = changed.min(axis=0) + (row_y1, 0), changed.max(axis=0) + (row_y1 + 1, 1)
+        self.diff_xy = (px + int(x1), py + int(y1))
+        self.diff_on = premultiply(full[y1:y2, x1:x2])
+        self.diff_off = premultiply(blank[y1:y2, x1:x2])
+
+    @staticmethod
+    def price_at(field: Dict, t: float) -> str:
+        if t >= COUNT_UP_SECONDS:
+            return field["final_text"]
+        eased = 1.0 - (1.0 - t / COUNT_UP_SECONDS) ** 3  # ease-out cubic
+        return f"{field['start'] + (field['final'] - field['start']) * eased:,.2f}"
+
+    def _draw_row(self, patch_row: Dict, t: float) -> np.ndarray:
+        patch = patch_row["base"].copy()
+        for field in patch_row["fields"]:
+            text = self.price_at(field, t)
+            x = field["right"] - int(field["atlas"].text_width(text))
+            field["atlas"].draw(patch, (x, field["text_y"]), text, field["color"])
+        return patch
+
+    def apply(self, out: np.ndarray, frame: np.ndarray, t: float) -> np.ndarray:
+        """Draw the animated fields at time `t` into the composited frame `out` (background `frame`)."""
+        for patch_row in self.rows:
+            if t >= COUNT_UP_SECONDS:
+                blend_premultiplied(out, frame, patch_row["xy"], *patch_row["final_planes"])
+            else:
+                blend_rgba(out, frame, patch_row["xy"], self._draw_row(patch_row, t))
+        diff_on = t >= COUNT_UP_SECONDS or int(t / COUNT_UP_SECONDS * DIFF_FLASHES * 2) % 2 == 0
+        blend_premultiplied(out, frame, self.diff_xy, *(self.diff_on if diff_on else self.diff_off))
+        return out
+
+
+def ensure_background(bg_path: str) -> "VideoClip":
+    """The background as a W x H clip of DURATION seconds at FPS.
+
+    Cover-scaling, centre-cropping, frame-rate reduction and looping all run
+    inside the ffmpeg decoder (ffmpeg_utils.FrameReader, the same filters as
+    background_cache). Only the frames the render samples are piped into
+    Python, already at output size. A background that background_cache has
+    already prepared passes through the filters unchanged.
+
+    A raw frame file (background_cache.prepare_raw_background) is not decoded
+    at all: its frames are zero-copy views into a memory mapping.
+    """
+    if not os.path.exists(bg_path):
+        raise FileNotFoundError(f"Background video not found: {bg_path}")
+    reader = RawFrames(bg_path) if is_raw(bg_path) else FrameReader(bg_path, W, H, FPS, DURATION)
+    clip = _moviepy().VideoClip(make_frame=reader.frame_at, duration=DURATION)
+    clip.fps = FPS
+    clip.close = reader.close
+    return clip
+
+
+def load_logo_image(logo_url: str, max_logo_w: int = 200) -> Optional[Image.Image]:
+    """The logo scaled to at most `max_logo_w` wide (RGBA), via the on-disk logo cache."""
+    return logo_cache.get_logo(logo_url, max_logo_w)
+
+
+def build_overlay_layers(entries: List[Dict[str, str]],
+                         custom_message: str = "",
+                         logo_url: str = "",
+                         timer: Optional[StageTimer] = None,
+                         theme_name: str = DEFAULT_PANEL_THEME) -> List[Tuple[str, Image.Image, Tuple[int, int]]]:
+    """All static overlays of the video as (name, RGBA image, (x, y)), bottom to top."""
+    layers: List[Tuple[str, Image.Image, Tuple[int, int]]] = []
 
     # Show the latest panel immediately for the full duration (no waiting/segments)
     latest = entries[-1] if entries else {}
     prev = entries[-2] if len(entries) >= 2 else None
-    panel = (
-    make_panel_clip(latest, prev)
-    .set_start(0)
-    .set_duration(DURATION)
-    .set_position(("center", int(H * 0.14))))
-    all_clips.append(panel)
+    with maybe_stage(timer, "panel"):
+        panel_img = render_panel_image(latest, prev, theme_name)
+    layers.append(("panel", panel_img, (int((W - panel_img.width) / 2), int(H * 0.14))))
 
-    # Save static image if path is provided
-    if out_image_path:
-        try:
-            # Get the raw PIL Image from the panel clip
-            # This requires rendering the first frame of the ImageClip
-            # A simpler way is to extract the PIL Image used to create the clip directly
-            if isinstance(panel, ImageClip):
-                panel_pil_image = Image.fromarray(panel.img)
-            else:
-                # If panel is a CompositeVideoClip or similar, render a frame
-                panel_pil_image = Image.fromarray(panel.get_frame(0))
-
-            # Ensure output directory exists for the image
-            os.makedirs(os.path.dirname(out_image_path), exist_ok=True)
-            panel_pil_image.save(out_image_path)
-            print(f"[APP] Saved static panel image: {out_image_path}")
-        except Exception as e:
-            print(f"Error saving static panel image to {out_image_path}: {e}")
-   
     # Footer watermark/info (persistent for entire duration)
     footer_text = "ที่มา: สมาคมค้าทองคำ"
-    footer_clip = make_text_clip(footer_text, width=int(W * 0.94), max_height=140,
-                                 font_color=(255, 255, 255), bg_color=(25, 55, 109, 200), pad=28)
-    footer_clip = (
-    footer_clip
-    .set_position(("center", H - footer_clip.h - 180))
-    .set_duration(DURATION))
-    all_clips.append(footer_clip)
+    with maybe_stage(timer, "text_overlays"):
+        footer_img = render_text_image(footer_text, width=int(W * 0.94), max_height=140,
+                                       font_color=(255, 255, 255), bg_color=(25, 55, 109, 200), pad=28)
+    layers.append(("footer", footer_img, (int((W - footer_img.width) / 2), H - footer_img.height - 180)))
 
     # Add Custom Message if provided
     if custom_message:
-        custom_msg_clip = make_text_clip(custom_message, width=int(W * 0.8), max_height=100,
-                                         font_color=(255, 255, 0), bg_color=(0, 0, 0, 180), pad=15)
+        with maybe_stage(timer, "text_overlays"):
+            msg_img = render_text_image(custom_message, width=int(W * 0.8), max_height=100,
+                                        font_color=(255, 255, 0), bg_color=(0, 0, 0, 180), pad=15)
         # Position above the footer, adjust as needed
-        custom_msg_clip = (
-        custom_msg_clip
-        .set_position(("center", H - custom_msg_clip.h - footer_clip.h - 200))
-        .set_duration(DURATION))
-        all_clips.append(custom_msg_clip)
+        layers.append(("message", msg_img,
+                       (int((W - msg_img.width) / 2), H - msg_img.height - footer_img.height - 200)))
 
     # Add Logo if URL provided
     if logo_url:
-        try:
-            logo_response = requests.get(logo_url, stream=True, timeout=10)
-            logo_response.raise_for_status()
-            logo_img = Image.open(logo_response.raw)
-            
-            # Resize logo to fit (e.g., max width 200, maintain aspect ratio)
-            max_logo_w = 200
-            if logo_img.width > max_logo_w:
-                logo_img = logo_img.resize((max_logo_w, int(logo_img.height * (max_logo_w / logo_img.width))))
-
-            logo_clip = ImageClip(np.array(logo_img)).set_duration(DURATION)
+        with maybe_stage(timer, "logo_download"):
+            logo_img = load_logo_image(logo_url)
+        if logo_img is not None:
             # Position logo (e.g., top-right corner)
-            logo_clip = logo_clip.set_position((W - logo_img.width - 30, 30))
-            all_clips.append(logo_clip)
-        except Exception as e:
-            print(f"Error adding logo from {logo_url}: {e}")
+            layers.append(("logo", logo_img, (W - logo_img.width - 30, 30)))
+
+    return layers
 
-    comp = CompositeVideoClip(all_clips, size=(W, H))
-    comp.write_videofile(out_video_path, fps=FPS, codec="libx264", audio=False, preset="medium", threads=4)
 
+def flatten_overlay(layers: List[Tuple[str, Image.Image, Tuple[int, int]]],
+                    size: Tuple[int, int] = (W, H)) -> Image.Image:
+    """Composite every layer onto one transparent RGBA image (W x H by default)."""
+    overlay = Image.new("RGBA", size, (0, 0, 0, 0))
+    for _, img, pos in layers:
+        overlay.alpha_composite(img.convert("RGBA"), dest=pos)
+    return overlay
 
-def main():
-    parser = argparse.ArgumentParser(description="Generate a gold price video with customization.")
+
+def save_panel_image(panel_img: Image.Image, out_image_path: str) -> bool:
+    try:
+        # Ensure output directory exists for the image
+        os.makedirs(os.path.dirname(out_image_path) or ".", exist_ok=True)
+        if out_image_path.lower().endswith(".png"):
+            panel_img.save(out_image_path)  # keep the rounded-corner transparency
+        else:
+            panel_img.convert("RGB").save(out_image_path)
+        print(f"[APP] Saved static panel image: {out_image_path}")
+        return True
+    except Exception as e:
+        print(f"Error saving static panel image to {out_image_path}: {e}")
+        return False
+
+
+def render_panel_only(entries: List[Dict[str, str]], out_image_path: str = OUT_IMAGE_PATH_DEFAULT,
+                      theme_name: str = DEFAULT_PANEL_THEME) -> Optional[str]:
+    """Render just the panel image (PNG keeps alpha, anything else is saved as RGB).
+
+    Does not import moviepy or touch assets/, so it is fast enough to run
+    right after a new update arrives. Returns the path, or None on failure.
+    """
+    latest = entries[-1] if entries else {}
+    prev = entries[-2] if len(entries) >= 2 else None
+    panel_img = render_panel_image(latest, prev, theme_name)
+    return out_image_path if save_panel_image(panel_img, out_image_path) else None
+
+
+# Per-frame stages: "background_frames" is decode + resize/crop of the
+# background, "composite" the overlay blend on top of it, and "encode" what is
+# left of write_videofile (piping to ffmpeg / x264). "panel_animation" is the
+# per-frame drawing of animated panel fields (build_video(animate=True)).
+FRAME_STAGES = ("background_frames", "composite", "panel_animation")
+
+
+def _timed_background(bg: "VideoClip", timer: Optional[StageTimer]) -> "VideoClip":
+    if timer is not None:
+        bg.make_frame = timer.timed("background_frames", bg.make_frame)
+    return bg
+
+
+def compose_moviepy(bg_video_path: str, layers, timer: Optional[StageTimer] = None) -> "CompositeVideoClip":
+    mpy = _moviepy()
+    with maybe_stage(timer, "background_open"):
+        bg = _timed_background(ensure_background(bg_video_path), timer)
+    all_clips = [bg]
+    for _, img, pos in layers:
+        all_clips.append(mpy.ImageClip(np.array(img)).set_start(0).set_duration(DURATION).set_position(pos))
+    comp = mpy.CompositeVideoClip(all_clips, size=(W, H))
+    if timer is not None:
+        comp.make_frame = timer.timed("composite", comp.make_frame, exclude=("background_frames",))
+    return comp
+
+
+def render_video_moviepy(bg_video_path: str, layers, out_video_path: str,
+                         timer: Optional[StageTimer] = None, profile: Optional[Dict] = None) -> None:
+    profile = profile or DEFAULT_PROFILE
+    comp = compose_moviepy(bg_video_path, layers, timer)
+    with maybe_stage(timer, "encode", exclude=FRAME_STAGES):
+        comp.write_videofile(out_video_path, fps=FPS, codec="libx264", audio=False,
+                             preset=profile["preset"], threads=profile["threads"])
+
+
+def compose_numpy(bg_video_path: str, layers, timer: Optional[StageTimer] = None,
+                  animation: Optional[PanelAnimation] = None) -> "VideoClip":
+    """moviepy clip whose frames come from the ROI compositor instead of CompositeVideoClip."""
+    with maybe_stage(timer, "background_open"):
+        bg = _timed_background(ensure_background(bg_video_path), timer)
+    with maybe_stage(timer, "overlay_flatten"):
+        compositor = OverlayCompositor(np.asarray(flatten_overlay(layers)))
+    composite = compositor.composite
+    if timer is not None:
+        composite = timer.timed("composite", composite)
+    if animation is None:
+        return _moviepy().VideoClip(make_frame=lambda t: composite(bg.get_frame(t)), duration=DURATION)
+
+    animate = animation.apply
+    if timer is not None:
+        animate = timer.timed("panel_animation", animate)
+
+    def make_frame(t):
+        frame = bg.get_frame(t)
+        return animate(composite(frame), frame, t)
+    return _moviepy().VideoClip(make_frame=make_frame, duration=DURATION)
+
+
+def render_video_numpy(bg_video_path: str, layers, out_video_path: str,
+                       timer: Optional[StageTimer] = None, profile: Optional[Dict] = None,
+                       animation: Optional[PanelAnimation] = None) -> None:
+    profile = profile or DEFAULT_PROFILE
+    clip = compose_numpy(bg_video_path, layers, timer, animation)
+    with maybe_stage(timer, "encode", exclude=FRAME_STAGES):
+        clip.write_videofile(out_video_path, fps=FPS, codec="libx264", audio=False,
+                             preset=profile["preset"], threads=profile["threads"])
+
+
+def render_video_pipeline(bg_video_path: str, layers, out_video_path: str,
+                          timer: Optional[StageTimer] = None, profile: Optional[Dict] = None,
+                          animation: Optional[PanelAnimation] = None) -> None:
+    """The numpy engine with decode, composite and encode overlapped on threads (see render_pipeline).
+
+    Frames and encoder arguments are those of render_video_numpy, so the
+    output is the same; the per-stage utilization is printed and recorded in
+    the timing record as "pipeline".
+    """
+    profile = profile or DEFAULT_PROFILE
+    with maybe_stage(timer, "background_open"):
+        bg = ensure_background(bg_video_path)
+    with maybe_stage(timer, "overlay_flatten"):
+        compositor = OverlayCompositor(np.asarray(flatten_overlay(layers)))
+
+    def decode(index: int, buf: np.ndarray) -> None:
+        np.copyto(buf, bg.get_frame(index / FPS))
+
+    def composite(index: int, frame: np.ndarray, out: np.ndarray) -> None:
+        compositor.composite(frame, out)
+        if animation is not None:
+            animation.apply(out, frame, index / FPS)
+
+    encoder = RawVideoEncoder(out_video_path, W, H, FPS, preset=profile["preset"], threads=profile["threads"])
+    try:
+        report = FramePipeline(W, H, DURATION * FPS).run(decode, composite, encoder.write)
+        with maybe_stage(timer, "encode"):
+            encoder.close()  # x264 flushes its lookahead after the last frame
+    except BaseException:
+        encoder.abort()
+        raise
+    finally:
+        bg.close()
+
+    print("[PIPE] " + format_pipeline_report(report).replace("\n", "\n[PIPE] "))
+    if timer is not None:
+        timer.meta["pipeline"] = report
+        for stage, name in (("decode", "background_frames"), ("composite", "composite"), ("encode", "encode")):
+            entry = report["stages"][stage]
+            timer.add(name, entry["busy_s"], entry["cpu_s"], calls=entry["frames"])
+
+
+# Keyframe interval of chunked renders, in frames; chunks are whole GOPs.
+CHUNK_GOP = FPS
+
+
+def _render_chunk(job: Dict) -> Dict:
+    """Composite and encode frames [start, end) to job["path"] (runs in a worker process)."""
+    t0 = time.perf_counter()
+    bg = ensure_background(job["background"])
+    compositor = OverlayCompositor(job["overlay"])
+    animation = PanelAnimation(*job["animation"]) if job["animation"] else None
+    profile = job["profile"]
+    encoder = RawVideoEncoder(job["path"], W, H, FPS, preset=profile["preset"], threads=profile["threads"],
+                              extra_args=gop_args(CHUNK_GOP))
+    try:
+        for index in range(job["start"], job["end"]):
+            t = index / FPS
+            frame = bg.get_frame(t)
+            out = compositor.composite(frame)
+            if animation is not None:
+                animation.apply(out, frame, t)
+            encoder.write(out)
+        encoder.close()
+    except BaseException:
+        encoder.abort()
+        raise
+    finally:
+        bg.close()
+    return {"start": job["start"], "end": job["end"], "wall_s": round(time.perf_counter() - t0, 4)}
+
+
+def render_video_chunked(bg_video_path: str, layers, out_video_path: str,
+                         timer: Optional[StageTimer] = None, profile: Optional[Dict] = None,
+                         chunks: int = 2, animation_args: Optional[Tuple] = None) -> None:
+    """Encode GOP-aligned chunks of the timeline in parallel processes and join them (see chunked_encode).
+
+    Frames are composited as by the numpy engine; `animation_args` are the
+    PanelAnimation arguments, rebuilt in each worker. The output depends
+    only on the inputs, the profile and the chunk count.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    profile = profile or DEFAULT_PROFILE
+    with maybe_stage(timer, "overlay_flatten"):
+        overlay = np.asarray(flatten_overlay(layers))
+    plan = plan_chunks(DURATION * FPS, chunks, CHUNK_GOP)
+    work_dir = chunk_dir(out_video_path)
+    try:
+        jobs = [{"background": bg_video_path, "overlay": overlay, "animation": animation_args,
+                 "profile": profile, "start": start, "end": end,
+                 "path": os.path.join(work_dir, f"chunk_{i:03d}.mp4")} for i, (start, end) in enumerate(plan)]
+        with maybe_stage(timer, "chunk_encode"):
+            with ProcessPoolExecutor(max_workers=len(jobs)) as pool:
+                results = list(pool.map(_render_chunk, jobs))
+        with maybe_stage(timer, "concat"):
+            concat_chunks([job["path"] for job in jobs], out_video_path)
+    finally:
+        remove_chunks(work_dir)
+    print(f"[APP] Encoded {len(plan)} chunk(s): "
+          + ", ".join(f"{r['start']}-{r['end'] - 1} {r['wall_s']:.2f}s" for r in results))
+    if timer is not None:
+        timer.meta["chunks"] = {"gop": CHUNK_GOP, "plan": results}
+
+
+def ffmpeg_overlay_filter() -> str:
+    """filter_complex for input 0 = background video, input 1 = flattened overlay PNG."""
+    # Blend in RGB like moviepy does and leave the yuv420p conversion to
+    # -pix_fmt, exactly as moviepy's rgb24 pipe into ffmpeg gets converted.
+    return (
+        f"[0:v]{cover_filter(W, H, FPS)},format=rgb24[bg];"
+        f"[bg][1:v]overlay=0:0:format=rgb,format=rgb24[v]"
+    )
+
+
+def render_video_ffmpeg(bg_video_path: str, layers, out_video_path: str,
+                        timer: Optional[StageTimer] = None, profile: Optional[Dict] = None) -> None:
+    """Single ffmpeg pass: background -> cover/crop -> one `overlay` of the flattened layers."""
+    profile = profile or DEFAULT_PROFILE
+    if not os.path.exists(bg_video_path):
+        raise FileNotFoundError(f"Background video not found: {bg_video_path}")
+    out_dir = os.path.dirname(out_video_path) or "."
+    os.makedirs(out_dir, exist_ok=True)
+    fd, overlay_path = tempfile.mkstemp(suffix=".png", prefix="overlay_", dir=out_dir)
+    os.close(fd)
+    try:
+        with maybe_stage(timer, "overlay_flatten"):
+            flatten_overlay(layers).save(overlay_path, format="PNG", compress_level=1)
+        # Decode, scale/crop, overlay and x264 all happen inside this one process.
+        with maybe_stage(timer, "ffmpeg_render"):
+            run_ffmpeg([
+                "-y", "-stream_loop", "-1", "-i", bg_video_path,
+                "-loop", "1", "-framerate", str(FPS), "-i", overlay_path,
+                "-filter_complex", ffmpeg_overlay_filter(), "-map", "[v]",
+                "-t", f"{DURATION:g}", "-r", str(FPS), "-an",
+                "-c:v", "libx264", "-preset", profile["preset"], "-threads", str(profile["threads"]),
+                "-pix_fmt", "yuv420p",
+                out_video_path,
+            ])
+    finally:
+        os.remove(overlay_path)
+
+
+RENDER_ENGINES = {
+    "moviepy": render_video_moviepy,
+    "numpy": render_video_numpy,
+    "ffmpeg": render_video_ffmpeg,
+    "pipeline": render_video_pipeline,
+}
+
+# Engines that can draw PanelAnimation per frame.
+ANIMATED_ENGINES = {
+    "numpy": render_video_numpy,
+    "pipeline": render_video_pipeline,
+}
+
+
+# Output formats for build_video(outputs=...). Layout values are relative to
+# the output canvas; "reel" reproduces the single-output W x H layout exactly.
+#   crop_anchor   which part of the cover-scaled background is kept
+#   panel_scale   scale of panel/footer/message/logo relative to the W x H layout
+#   panel_center_x, panel_top   panel placement (fractions of width / height)
+#   footer_bottom footer distance from the bottom edge at scale 1.0 (px)
+#   bitrate       x264 target bitrate (e.g. "4M"), or None for the CRF profile
+OUTPUT_FORMATS: Dict[str, Dict] = {
+    "reel": {"size": (W, H), "crop_anchor": "center", "panel_scale": 1.0,
+             "panel_center_x": 0.5, "panel_top": 0.14, "footer_bottom": 180, "bitrate": None},
+    "feed": {"size": (1080, 1080), "crop_anchor": "center", "panel_scale": 0.78,
+             "panel_center_x": 0.5, "panel_top": 0.04, "footer_bottom": 30, "bitrate": "4M"},
+    "landscape": {"size": (1920, 1080), "crop_anchor": "center", "panel_scale": 0.78,
+                  "panel_center_x": 0.27, "panel_top": 0.04, "footer_bottom": 30, "bitrate": "6M"},
+}
+
+CROP_ANCHORS = {
+    "center": (0.5, 0.5), "top": (0.5, 0.0), "bottom": (0.5, 1.0),
+    "left": (0.0, 0.5), "right": (1.0, 0.5),
+}
+
+
+def output_spec(name: str, out_video_path: str, **overrides) -> Dict:
+    """OUTPUT_FORMATS[name] with a per-format path (<stem>_<name>.mp4) and any overrides."""
+    if name not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format: {name} (choose from {', '.join(OUTPUT_FORMATS)})")
+    stem, ext = os.path.splitext(out_video_path)
+    return {**OUTPUT_FORMATS[name], "name": name, "path": f"{stem}_{name}{ext or '.mp4'}", **overrides}
+
+
+def layout_layers(layers, spec: Dict) -> List[Tuple[str, Image.Image, Tuple[int, int]]]:
+    """Re-place the W x H overlay layers (see build_overlay_layers) on an output canvas."""
+    cw, ch = spec["size"]
+    scale = spec.get("panel_scale", 1.0)
+    cx = cw * spec.get("panel_center_x", 0.5)
+    footer_bottom = int(spec.get("footer_bottom", 180) * scale)
+
+    def scaled(img: Image.Image) -> Image.Image:
+        if scale == 1.0:
+            return img
+        return img.resize((max(1, round(img.width * scale)), max(1, round(img.height * scale))), Image.LANCZOS)
+
+    imgs = {name: scaled(img) for name, img, _ in layers}
+    footer_h = imgs["footer"].height if "footer" in imgs else 0
+    placed = []
+    for name, _, _ in layers:
+        img = imgs[name]
+        if name == "panel":
+            pos = (int(cx - img.width / 2), int(ch * spec.get("panel_top", 0.14)))
+        elif name == "footer":
+            pos = (int(cx - img.width / 2), ch - img.height - footer_bottom)
+        elif name == "message":
+            pos = (int(cx - img.width / 2), ch - img.height - footer_h - footer_bottom - int(20 * scale))
+        elif name == "logo":
+            margin = int(30 * scale)
+            pos = (cw - img.width - margin, margin)
+        else:
+            raise ValueError(f"No layout rule for overlay layer '{name}'")
+        placed.append((name, img, pos))
+    return placed
+
+
+def fanout_filter(specs: List[Dict]) -> str:
+    """filter_complex: input 0 = background, input i+1 = overlay PNG of specs[i].
+
+    The background is decoded and resampled once, then split into one branch
+    per output, each with its own anchored cover crop / scale / overlay.
+    """
+    parts = [f"[0:v]fps={FPS},split={len(specs)}" + "".join(f"[s{i}]" for i in range(len(specs)))]
+    for i, spec in enumerate(specs):
+        w, h = spec["size"]
+        ax, ay = CROP_ANCHORS[spec.get("crop_anchor", "center")]
+        parts.append(
+            f"[s{i}]{cover_crop_scale(w, h, ax, ay)},format=rgb24[b{i}];"
+            f"[b{i}][{i + 1}:v]overlay=0:0:format=rgb,format=rgb24[v{i}]"
+        )
+    return ";".join(parts)
+
+
+def render_video_fanout(bg_video_path: str, layers, specs: List[Dict],
+                        timer: Optional[StageTimer] = None, profile: Optional[Dict] = None) -> None:
+    """Render every output spec from one decode of the background (one ffmpeg, N x264 encoders)."""
+    profile = profile or DEFAULT_PROFILE
+    if not os.path.exists(bg_video_path):
+        raise FileNotFoundError(f"Background video not found: {bg_video_path}")
+    overlay_paths = []
+    try:
+        args = ["-y", "-stream_loop", "-1", "-i", bg_video_path]
+        with maybe_stage(timer, "overlay_flatten"):
+            for spec in specs:
+                out_dir = os.path.dirname(spec["path"]) or "."
+                os.makedirs(out_dir, exist_ok=True)
+                fd, overlay_path = tempfile.mkstemp(suffix=".png", prefix=f"overlay_{spec['name']}_", dir=out_dir)
+                os.close(fd)
+                overlay_paths.append(overlay_path)
+                flatten_overlay(layout_layers(layers, spec), spec["size"]).save(
+                    overlay_path, format="PNG", compress_level=1)
+                args += ["-loop", "1", "-framerate", str(FPS), "-i", overlay_path]
+        args += ["-filter_complex", fanout_filter(specs)]
+        for i, spec in enumerate(specs):
+            args += ["-map", f"[v{i}]", "-t", f"{DURATION:g}", "-r", str(FPS), "-an",
+                     "-c:v", "libx264", "-preset", profile["preset"], "-threads", str(profile["threads"])]
+            if spec.get("bitrate"):
+                rate = spec["bitrate"]
+                args += ["-b:v", rate, "-maxrate", rate, "-bufsize", rate]
+            args += ["-pix_fmt", "yuv420p", spec["path"]]
+        with maybe_stage(timer, "ffmpeg_render"):
+            run_ffmpeg(args)
+    finally:
+        for path in overlay_paths:
+            os.remove(path)
+
+
+def _render_cache_payload(entries: List[Dict[str, str]], bg_source: str, options: Dict,
+                          theme_name: str = DEFAULT_PANEL_THEME) -> Dict:
+    """Everything that decides the rendered pixels, for render_cache.render_key()."""
+    return {
+        "entries": entries[-2:],
+        "background": render_cache.file_fingerprint(bg_source),
+        "options": options,
+        "template": {"layout_version": PANEL_LAYOUT_VERSION, "panel": panel_template_key(theme_name),
+                     "background_version": PREPARE_VERSION,
+                     "size": [W, H], "fps": FPS, "duration": DURATION},
+    }
+
+
+def build_video(entries: List[Dict[str, str]], out_video_path: str,
+                background_theme: str = "random",
+                custom_message: str = "",
+                logo_url: str = "",
+                out_image_path: Optional[str] = None,
+                use_bg_cache: bool = True,
+                engine: str = "moviepy",
+                timer: Optional[StageTimer] = None,
+                encoder_profile: Optional[Dict] = None,
+                concurrency: int = 1,
+                outputs: Optional[List[Dict]] = None,
+                background_seed: str = "",
+                use_render_cache: bool = True,
+                animate: bool = False,
+                raw_bg_cache: bool = False,
+                chunks: int = 1,
+                destinations: Optional[List[str]] = None,
+                panel_theme: str = DEFAULT_PANEL_THEME) -> Dict:
+    """Render the video (and optionally the panel image).
+
+    With `outputs` (a list of specs, see OUTPUT_FORMATS / output_spec) every
+    format is rendered from a single decode of the source background by one
+    ffmpeg process, and `engine` is not used.
+
+    The background is picked by select_background() from the latest entry (or
+    `background_seed`), so the same inputs give the same output. With
+    `use_render_cache`, a render whose inputs were rendered before is copied
+    from render_cache instead of being encoded again.
+
+    Returns the per-stage timing record, which is also written next to the
+    video as <name>.timings.json. Pass `timer` to include stages timed by the
+    caller (e.g. the data fetch in main()). Without `encoder_profile` the
+    host's tuned x264 profile for `concurrency` parallel renders is used; the
+    profile is recorded in the timing record.
+
+    With `animate` the prices count up and the diff flashes (PanelAnimation).
+    This is drawn per frame by the numpy engine, which is then used unless
+    `engine` is "pipeline". It is not available for multi-format `outputs`.
+
+    With `raw_bg_cache` (and `use_bg_cache`) every engine but ffmpeg will
+    read the prepared background from its memory-mapped raw frame file
+    instead of decoding it. The frames are the same, so the render cache
+    key does not change.
+
+    With `chunks` > 1 the timeline is split into that many GOP-aligned
+    chunks that are composited (as by the numpy engine, animated or not) and
+    encoded in parallel worker processes, then joined without re-encoding
+    (render_video_chunked). The x264 profile is then chosen for `concurrency`
+    x `chunks` encoders. The bytes depend on the chunk count, so it is part
+    of the render cache key.
+
+    `destinations` (names from destination_encodes.DESTINATIONS) adds a
+    size-targeted copy of the video per publisher, encoded from the finished
+    video in the same run and written as <stem>_<destination>.mp4. The copies
+    are stored in the render cache with the video.
+
+    `panel_theme` is the layout theme of the panel (see panel_template),
+    both in the video and in the saved panel image.
+    """
+    if engine not in RENDER_ENGINES:
+        raise ValueError(f"Unknown render engine: {engine} (choose from {', '.join(RENDER_ENGINES)})")
+    timer = timer if timer is not None else StageTimer()
+    if animate and outputs:
+        print("[WARN] Animated panels are not supported for multi-format outputs; rendering them static")
+        animate = False
+    destinations = check_destinations(destinations or [])
+    if destinations and outputs:
+        print("[WARN] Destination encodes are not supported for multi-format outputs; skipping them")
+        destinations = []
+    if chunks > 1 and outputs:
+        print("[WARN] Chunked encoding is not supported for multi-format outputs; encoding in one pass")
+        chunks = 1
+    if chunks > 1:
+        if engine != "numpy":
+            print(f"[APP] Chunked encoding composites with the numpy engine instead of '{engine}'")
+        engine = "numpy"
+    elif animate and engine not in ANIMATED_ENGINES:
+        print(f"[APP] Animated panel: rendering with the numpy engine instead of '{engine}'")
+        engine = "numpy"
+
+    # Determine background video path based on theme
+    latest = entries[-1] if entries else {}
+    bg_video_path = BG_PATH_DEFAULT or select_background(latest, background_seed)
+    if background_theme in BACKGROUND_THEMES and BACKGROUND_THEMES[background_theme] is not None:
+        bg_video_path = BACKGROUND_THEMES[background_theme]
+    bg_source = bg_video_path
+
+    profile = encoder_profile or choose_profile(concurrency=concurrency * max(1, chunks))
+    timer.meta.update({"engine": "fanout" if outputs else "chunked" if chunks > 1 else engine,
+                       "encoder_profile": profile,
+                       "background": os.path.basename(bg_source),
+                       "frames": DURATION * FPS, "output_video": out_video_path, "animate": animate})
+    if outputs:
+        timer.meta["outputs"] = [{"name": s.get("name"), "path": s["path"], "size": list(s["size"]),
+                                  "bitrate": s.get("bitrate")} for s in outputs]
+
+    # Cached file name -> output path, for every file this call produces.
+    targets = {f"video_{s['name']}.mp4": s["path"] for s in outputs} if outputs else {"video.mp4": out_video_path}
+    for name in destinations:
+        targets[f"video_to_{name}.mp4"] = destination_path(out_video_path, name)
+    if out_image_path:
+        targets["panel" + (os.path.splitext(out_image_path)[1] or ".jpg")] = out_image_path
+
+    cache_key = None
+    if use_render_cache:
+        with timer.stage("render_cache"):
+            options = {"custom_message": custom_message, "logo_url": logo_url,
+                       "logo": logo_cache.fingerprint(logo_url) if logo_url else None,
+                       "engine": timer.meta["engine"],
+                       "animate": animate, "chunks": max(1, chunks),
+                       "destinations": {name: DESTINATIONS[name] for name in destinations},
+                       "use_bg_cache": use_bg_cache, "encoder": [profile["preset"], profile["threads"]],
+                       "outputs": [{k: v for k, v in s.items() if k != "path"} for s in outputs or []]}
+            cache_key = render_cache.render_key(_render_cache_payload(entries, bg_source, options, panel_theme))
+            hit = render_cache.restore(cache_key, targets)
+        timer.meta["render_cache"] = {"key": cache_key, "hit": hit}
+        if hit:
+            print(f"[APP] Render cache hit {cache_key[:12]}: reused {', '.join(targets.values())}")
+            return _finish_build(timer, out_video_path)
+
+    # Use the pre-transcoded copy (prepared on first use or when the source changes).
+    # Fan-out renders crop the source differently per format, so they need the original.
+    if raw_bg_cache and (engine == "ffmpeg" or outputs):
+        print("[WARN] Raw background frames are not read by the ffmpeg engine or multi-format outputs; ignoring")
+        raw_bg_cache = False
+    if use_bg_cache and not outputs and os.path.exists(bg_video_path):
+        with timer.stage("background_prepare"):
+            bg_video_path = resolve_background(bg_video_path, W, H, FPS, DURATION, raw=raw_bg_cache)
+
+    layers = build_overlay_layers(entries, custom_message=custom_message, logo_url=logo_url, timer=timer,
+                                  theme_name=panel_theme)
+
+    # Save static image if path is provided
+    if out_image_path:
+        with timer.stage("save_image"):
+            save_panel_image(layers[0][1], out_image_path)
+
+    animation_args = None
+    if animate:
+        _, panel_img, panel_pos = layers[0]
+        animation_args = (latest, entries[-2] if len(entries) >= 2 else None, panel_img, panel_pos, panel_theme)
+        with timer.stage("panel"):
+            animation = PanelAnimation(*animation_args)
+        layers = [("panel", animation.blank_panel, panel_pos)] + layers[1:]
+
+    if chunks > 1:
+        render_video_chunked(bg_video_path, layers, out_video_path, timer, profile,
+                             chunks=chunks, animation_args=animation_args)
+    elif animate:
+        ANIMATED_ENGINES[engine](bg_video_path, layers, out_video_path, timer, profile, animation=animation)
+    elif outputs:
+        render_video_fanout(bg_video_path, layers, outputs, timer, profile)
+    else:
+        RENDER_ENGINES[engine](bg_video_path, layers, out_video_path, timer, profile)
+
+    if destinations:
+        with timer.stage("destination_encodes"):
+            timer.meta["destinations"] = encode_destinations(out_video_path, destinations, DURATION,
+                                                             preset=profile["preset"], threads=profile["threads"])
+
+    if cache_key:
+        with timer.stage("render_cache"):
+            render_cache.store(cache_key, targets, meta={"entry": {"asdate": latest.get("asdate"),
+                                                                    "nqy": latest.get("nqy")},
+                                                          "background": os.path.basename(bg_source)})
+            render_cache.evict()
+    return _finish_build(timer, out_video_path)
+
+
+def _finish_build(timer: StageTimer, out_video_path: str) -> Dict:
+    timings_path = timings_path_for(out_video_path)
+    record = timer.write(timings_path)
+    print(f"[APP] Stage timings ({timings_path}):\n{format_record(record)}")
+    return record
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="app.py", description="Generate a gold price video with customization.")
     parser.add_argument("--background_theme", type=str, default="random",
                         help="Theme for background video (e.g., 'random', 'elegant', 'modern').")
     parser.add_argument("--custom_message", type=str, default="",
@@ -737,36 +1030,112 @@ def main():
                         help="Path to save the output video.")
     parser.add_argument("--output_image_path", type=str, default=OUT_IMAGE_PATH_DEFAULT,
                         help="Path to save the output static image.")
-    args = parser.parse_args()
+    parser.add_argument("--prepare_backgrounds", action="store_true",
+                        help="Transcode every background in assets/ to the render format and exit.")
+    parser.add_argument("--no_bg_cache", action="store_true",
+                        help="Use the source background directly instead of the prepared copy.")
+    parser.add_argument("--raw_bg_cache", action="store_true",
+                        help="Keep the prepared background as memory-mapped raw frames and skip decoding "
+                             "(not the ffmpeg engine; uses W*H*3 bytes per frame on disk).")
+    parser.add_argument("--image_only", "--image-only", action="store_true",
+                        help="Only render the panel image (no moviepy, no background video).")
+    parser.add_argument("--data_file", type=str, default="",
+                        help="Read entries from this JSON file instead of fetching them online.")
+    parser.add_argument("--engine", type=str, default="moviepy", choices=sorted(RENDER_ENGINES),
+                        help="Video render engine: 'moviepy' (default), 'numpy' (moviepy with the ROI "
+                             "frame compositor), 'pipeline' (the numpy engine with decode / composite / "
+                             "encode on separate threads) or 'ffmpeg' (single overlay filter pass).")
+    parser.add_argument("--formats", type=str, default="",
+                        help=f"Comma-separated output formats rendered in one pass ({', '.join(OUTPUT_FORMATS)}); "
+                             "files are written as <output_video_path stem>_<format>.mp4.")
+    parser.add_argument("--background_seed", type=str, default="",
+                        help="Seed for the background pick (default: the update's asdate + nqy).")
+    parser.add_argument("--no_render_cache", action="store_true",
+                        help="Always render, even if the same inputs were rendered before.")
+    parser.add_argument("--animate_prices", action="store_true",
+                        help="Count the prices up from the previous update and flash the diff "
+                             "(rendered with the numpy engine, or the pipeline engine if selected).")
+    parser.add_argument("--destinations", type=str, default="",
+                        help=f"Comma-separated publishers to encode size-targeted copies for "
+                             f"({', '.join(DESTINATIONS)}); written as <output_video_path stem>_<name>.mp4.")
+    parser.add_argument("--chunks", type=int, default=1,
+                        help="Encode the video as this many GOP-aligned chunks in parallel processes "
+                             "and join them without re-encoding.")
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="Renders running at once on this host (limits the x264 thread count).")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run app.py with `argv` (default: sys.argv[1:]); returns the exit code.
+
+    Also called in-process by render_daemon.py, so failures return a code
+    instead of exiting.
+    """
+    args = build_arg_parser().parse_args(argv)
 
-    try:
-        entries = fetch_entries(URL)
-    except Exception as e:
-        print(f"Failed to fetch remote data: {e}")
-        # Fallback to local cache if exists
-        cache = os.path.join(SCRIPT_DIR, "data", "gold_prices.json")
-        if os.path.exists(cache):
-            with open(cache, "r", encoding="utf-8") as f:
+    if args.prepare_backgrounds:
+        prepared = prepare_all_backgrounds(W, H, FPS, DURATION, raw=args.raw_bg_cache)
+        print(f"Prepared {len(prepared)} background(s)")
+        return 0
+
+    timer = StageTimer()
+    if args.data_file:
+        with timer.stage("data_load"):
+            with open(args.data_file, "r", encoding="utf-8") as f:
                 entries = json.load(f)
-        else:
-            sys.exit(1)
+    else:
+        try:
+            with timer.stage("data_fetch"):
+                entries = fetch_entries(URL)
+        except Exception as e:
+            print(f"Failed to fetch remote data: {e}")
+            # Fallback to local cache if exists
+            cache = os.path.join(SCRIPT_DIR, "data", "gold_prices.json")
+            if os.path.exists(cache):
+                with open(cache, "r", encoding="utf-8") as f:
+                    entries = json.load(f)
+            else:
+                return 1
 
-    # Persist a local cache snapshot for repeatability
-    os.makedirs(os.path.join(SCRIPT_DIR, "data"), exist_ok=True)
-    try:
-        with open(os.path.join(SCRIPT_DIR, "data", "gold_prices.json"), "w", encoding="utf-8") as f:
-            json.dump(entries, f, ensure_ascii=False, indent=2)
-    except Exception:
-        pass
+        # Persist a local cache snapshot for repeatability
+        os.makedirs(os.path.join(SCRIPT_DIR, "data"), exist_ok=True)
+        try:
+            with open(os.path.join(SCRIPT_DIR, "data", "gold_prices.json"), "w", encoding="utf-8") as f:
+                json.dump(entries, f, ensure_ascii=False, indent=2)
+        except Exception:
+            pass
+
+    outputs = [output_spec(name.strip(), args.output_video_path)
+               for name in args.formats.split(",") if name.strip()]
+
+    if args.image_only:
+        if not render_panel_only(entries, args.output_image_path):
+            return 1
+        print(f"Saved image: {args.output_image_path}")
+        return 0
 
     build_video(entries, args.output_video_path, 
                 background_theme=args.background_theme, 
                 custom_message=args.custom_message, 
                 logo_url=args.logo_url,
-                out_image_path=args.output_image_path)
-    print(f"Saved video: {args.output_video_path}")
+                out_image_path=args.output_image_path,
+                use_bg_cache=not args.no_bg_cache,
+                engine=args.engine,
+                timer=timer,
+                concurrency=args.concurrency,
+                outputs=outputs,
+                background_seed=args.background_seed,
+                use_render_cache=not args.no_render_cache,
+                raw_bg_cache=args.raw_bg_cache,
+                chunks=args.chunks,
+                destinations=[name.strip() for name in args.destinations.split(",") if name.strip()],
+                animate=args.animate_prices)
+    for path in ([spec["path"] for spec in outputs] if outputs else [args.output_video_path]):
+        print(f"Saved video: {path}")
     print(f"Saved image: {args.output_image_path}")
+    return 0
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,246 @@
+"""
+Historical backfill: render the panel and/or video of every update in
+data/gold_prices.json (or a date range), each against the update before it.
+
+Jobs run on a process pool sized to the machine. Every worker compiles the
+panel layout (fonts, cached chrome) once at start-up. The parent process
+records each finished job in out/archive/backfill_manifest.json, together
+with the panel layout version, layout key and theme it was rendered with. An
+interrupted run therefore resumes where it stopped, and a template change
+(edited layouts/ files, new PANEL_LAYOUT_VERSION or --theme) re-renders the
+affected jobs. The manifest
+also holds the live progress, which --status prints.
+
+Usage:
+    python backfill.py [--mode panel|video|both] [--from 2026-02-01] [--to 2026-02-28]
+                       [--workers N] [--force] [--engine ffmpeg]
+    python backfill.py --status
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import Dict, List, Optional
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_FILE = os.path.join(SCRIPT_DIR, "data", "gold_prices.json")
+ARCHIVE_DIR = os.path.join(SCRIPT_DIR, "out", "archive")
+MANIFEST_NAME = "backfill_manifest.json"
+
+MODES = ("panel", "video", "both")
+
+
+def entry_date(entry: Dict[str, str]) -> str:
+    """YYYY-MM-DD of an update (asdate_iso, else the Buddhist-era asdate)."""
+    iso = entry.get("asdate_iso", "")
+    if iso:
+        return iso[:10]
+    day, month, year = entry.get("asdate", "").split(" ")[0].split("/")
+    return f"{int(year) - 543:04d}-{int(month):02d}-{int(day):02d}"
+
+
+def job_key(entry: Dict[str, str]) -> str:
+    """Stable file stem per update, e.g. 2026-02-24_1646_nqy29."""
+    iso = entry.get("asdate_iso", "")
+    hhmm = iso[11:16].replace(":", "") if iso else entry.get("asdate", "").split(" ")[-1].replace(":", "")
+    return f"{entry_date(entry)}_{hhmm}_nqy{entry.get('nqy', '')}"
+
+
+def select_jobs(entries: List[Dict[str, str]], date_from: str = "", date_to: str = "") -> List[Dict]:
+    jobs = []
+    for i, entry in enumerate(entries):
+        try:
+            date = entry_date(entry)
+        except (ValueError, AttributeError):
+            print(f"[BACKFILL] Skipping update with an unreadable date: asdate={entry.get('asdate')!r} "
+                  f"nqy={entry.get('nqy')!r}")
+            continue
+        if (date_from and date < date_from) or (date_to and date > date_to):
+            continue
+        # Same pair build_video/render_panel_only use: [previous, current].
+        jobs.append({"key": job_key(entry), "entries": entries[max(0, i - 1):i + 1]})
+    return jobs
+
+
+# ---------- manifest (written by the parent process only) ----------
+
+def _manifest_path(out_dir: str) -> str:
+    return os.path.join(out_dir, MANIFEST_NAME)
+
+
+def load_manifest(out_dir: str) -> Dict:
+    try:
+        with open(_manifest_path(out_dir), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data.setdefault("jobs", {})
+            return data
+    except Exception:
+        pass
+    return {"jobs": {}, "progress": {}}
+
+
+def save_manifest(out_dir: str, manifest: Dict) -> None:
+    os.makedirs(out_dir, exist_ok=True)
+    path = _manifest_path(out_dir)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def is_done(manifest: Dict, key: str, mode: str, template: Dict, out_dir: str) -> bool:
+    record = manifest["jobs"].get(key)
+    if not record or record.get("status") != "done" or record.get("template") != template:
+        return False
+    wanted = {"panel", "video"} if mode == "both" else {mode}
+    outputs = record.get("outputs", {})
+    return all(kind in outputs and os.path.exists(os.path.join(out_dir, outputs[kind])) for kind in wanted)
+
+
+# ---------- worker side ----------
+
+_WORKER: Dict = {}
+
+
+def _init_worker(theme: str) -> None:
+    """Load app and the compiled panel layout (fonts, chrome) once per worker process."""
+    import app
+    app.panel_template(theme)
+    _WORKER["app"] = app
+
+
+def render_job(job: Dict, mode: str, out_dir: str, theme: str, engine: str, concurrency: int) -> Dict:
+    app = _WORKER.get("app")
+    if app is None:
+        _init_worker(theme)
+        app = _WORKER["app"]
+    start = time.perf_counter()
+    outputs = {}
+    try:
+        if mode in ("panel", "both"):
+            name = f"{job['key']}_panel.jpg"
+            if not app.render_panel_only(job["entries"], os.path.join(out_dir, name), theme):
+                raise RuntimeError("panel image could not be saved")
+            outputs["panel"] = name
+        if mode in ("video", "both"):
+            name = f"{job['key']}.mp4"
+            app.build_video(job["entries"], os.path.join(out_dir, name), engine=engine,
+                            concurrency=concurrency, panel_theme=theme,
+                            use_render_cache=False)  # one-off renders; the manifest tracks them
+            outputs["video"] = name
+        return {"key": job["key"], "outputs": outputs, "seconds": time.perf_counter() - start}
+    except Exception as e:
+        return {"key": job["key"], "outputs": outputs, "seconds": time.perf_counter() - start,
+                "error": f"{type(e).__name__}: {e}"}
+
+
+# ---------- parent ----------
+
+def _progress(total: int, done: int, failed: int, started: float) -> Dict:
+    elapsed = time.perf_counter() - started
+    finished = done + failed
+    eta = (elapsed / finished) * (total - finished) if finished else None
+    return {"total": total, "done": done, "failed": failed, "elapsed_s": round(elapsed, 1),
+            "eta_s": round(eta, 1) if eta is not None else None,
+            "updated_at": datetime.now().isoformat(timespec="seconds")}
+
+
+def run_backfill(mode: str = "panel", date_from: str = "", date_to: str = "",
+                 workers: Optional[int] = None, force: bool = False, out_dir: str = ARCHIVE_DIR,
+                 data_file: str = DATA_FILE, theme: str = "", engine: str = "moviepy") -> Dict:
+    from app import DEFAULT_PANEL_THEME, PANEL_LAYOUT_VERSION, panel_template_key
+
+    theme = theme or DEFAULT_PANEL_THEME
+    template = {"layout_version": PANEL_LAYOUT_VERSION, "theme": theme, "layout": panel_template_key(theme)}
+    with open(data_file, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+
+    manifest = load_manifest(out_dir)
+    jobs = select_jobs(entries, date_from, date_to)
+    pending = [job for job in jobs if force or not is_done(manifest, job["key"], mode, template, out_dir)]
+    skipped = len(jobs) - len(pending)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(pending) or 1))
+    print(f"[BACKFILL] {len(jobs)} update(s) selected, {skipped} already rendered, "
+          f"{len(pending)} to render with {workers} worker(s) (mode={mode})")
+
+    started = time.perf_counter()
+    done = failed = 0
+    if not pending:
+        return _progress(0, 0, 0, started)
+    manifest["progress"] = _progress(len(pending), 0, 0, started)
+    save_manifest(out_dir, manifest)
+
+    os.makedirs(out_dir, exist_ok=True)
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(theme,))
+    try:
+        futures = [pool.submit(render_job, job, mode, out_dir, theme, engine, workers) for job in pending]
+        for future in as_completed(futures):
+            result = future.result()
+            record = manifest["jobs"].setdefault(result["key"], {})
+            record.setdefault("outputs", {}).update(result["outputs"])
+            record.update({"template": template, "seconds": round(result["seconds"], 3),
+                           "rendered_at": datetime.now().isoformat(timespec="seconds")})
+            if "error" in result:
+                failed += 1
+                record.update({"status": "failed", "error": result["error"]})
+                print(f"[BACKFILL] {result['key']} failed: {result['error']}")
+            else:
+                done += 1
+                record["status"] = "done"
+                record.pop("error", None)
+            manifest["progress"] = _progress(len(pending), done, failed, started)
+            save_manifest(out_dir, manifest)
+            p = manifest["progress"]
+            eta = f"{p['eta_s']:.0f}s" if p["eta_s"] is not None else "?"
+            print(f"[BACKFILL] {done + failed}/{len(pending)} ({failed} failed)  {result['key']} "
+                  f"{result['seconds']:.2f}s  elapsed {p['elapsed_s']:.0f}s  eta {eta}")
+    except KeyboardInterrupt:
+        print("[BACKFILL] Interrupted; finished jobs are saved, rerun to resume.")
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    pool.shutdown()
+    return manifest["progress"]
+
+
+def print_status(out_dir: str = ARCHIVE_DIR) -> None:
+    manifest = load_manifest(out_dir)
+    statuses = [j.get("status") for j in manifest["jobs"].values()]
+    print(f"[BACKFILL] manifest: {_manifest_path(out_dir)}")
+    print(f"[BACKFILL] jobs recorded: {len(statuses)}  done: {statuses.count('done')}  "
+          f"failed: {statuses.count('failed')}")
+    if manifest.get("progress"):
+        print(f"[BACKFILL] last run: {json.dumps(manifest['progress'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render panels/videos for past gold price updates.")
+    parser.add_argument("--mode", choices=MODES, default="panel")
+    parser.add_argument("--from", dest="date_from", type=str, default="", help="First date (YYYY-MM-DD).")
+    parser.add_argument("--to", dest="date_to", type=str, default="", help="Last date (YYYY-MM-DD).")
+    parser.add_argument("--workers", type=int, default=0, help="Worker processes (default: CPU count).")
+    parser.add_argument("--force", action="store_true", help="Re-render even if already in the manifest.")
+    parser.add_argument("--out_dir", type=str, default=ARCHIVE_DIR)
+    parser.add_argument("--data_file", type=str, default=DATA_FILE)
+    parser.add_argument("--theme", type=str, default="", help="Panel theme (default: app default).")
+    parser.add_argument("--engine", type=str, default="moviepy", help="Video engine for --mode video/both.")
+    parser.add_argument("--status", action="store_true", help="Print progress of the last run and exit.")
+    args = parser.parse_args()
+
+    if args.status:
+        print_status(args.out_dir)
+        return
+    try:
+        progress = run_backfill(args.mode, args.date_from, args.date_to, args.workers or None,
+                                args.force, args.out_dir, args.data_file, args.theme, args.engine)
+    except KeyboardInterrupt:
+        sys.exit(130)
+    sys.exit(1 if progress.get("failed") else 0)
+
+
+if __name__ == "__main__":
+    main()
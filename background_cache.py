@@ -0,0 +1,206 @@
+"""
+Background preparation cache for assets/bg_XX.mp4.
+
+Each source background is transcoded once with ffmpeg to the exact render
+format (cover-scaled and centre-cropped to W x H, target fps, looped/trimmed
+to the video duration, no audio). A manifest under cache/backgrounds records
+the source size/mtime and target format for every prepared file, so a new or
+modified background is re-prepared automatically on the next render.
+
+With raw=True the prepared copy is additionally decoded once into a
+memory-mapped .rgbraw frame file (see raw_frames), so renders skip H.264
+decoding altogether.
+
+Usage:
+    python background_cache.py            # prepare everything in assets/
+    python background_cache.py --raw      # ... and their raw frame files
+"""
+
+import glob
+import hashlib
+import json
+import os
+import sys
+from typing import Dict, List
+
+from ffmpeg_utils import FFmpegError, cover_filter, raw_frames_args, run_ffmpeg
+from raw_frames import HEADER_SIZE, RAW_EXT, write_header
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ASSETS_DIR = os.path.join(SCRIPT_DIR, "assets")
+CACHE_DIR = os.path.join(SCRIPT_DIR, "cache", "backgrounds")
+MANIFEST_PATH = os.path.join(CACHE_DIR, "manifest.json")
+
+# Bump when the ffmpeg preparation command changes (also part of the render cache key).
+# 2: cover crop in source coordinates before scaling (ffmpeg_utils.cover_crop_scale).
+# 3: even crop sizes and setsar=1 in cover_crop_scale, so cached renders with SAR 404:405 are redone.
+PREPARE_VERSION = 3
+
+
+def _load_manifest() -> Dict[str, Dict]:
+    try:
+        with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except Exception:
+        return {}
+
+
+def _save_manifest(manifest: Dict[str, Dict]) -> None:
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = f"{MANIFEST_PATH}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, MANIFEST_PATH)
+
+
+def _source_fingerprint(src_path: str) -> Dict:
+    st = os.stat(src_path)
+    return {"size": st.st_size, "mtime": st.st_mtime}
+
+
+def _target_spec(width: int, height: int, fps: int, duration: float) -> Dict:
+    return {"width": width, "height": height, "fps": fps, "duration": duration,
+            "version": PREPARE_VERSION}
+
+
+def prepared_path_for(src_path: str, width: int, height: int, fps: int, duration: float) -> str:
+    stem = os.path.splitext(os.path.basename(src_path))[0]
+    key = hashlib.sha1(os.path.abspath(src_path).encode("utf-8")).hexdigest()[:8]
+    return os.path.join(CACHE_DIR, f"{stem}_{width}x{height}_{fps}fps_{duration:g}s_{key}.mp4")
+
+
+def transcode_background(src_path: str, dst_path: str, width: int, height: int,
+                         fps: int, duration: float) -> None:
+    """Resample, centre-crop, scale, loop/trim and strip audio in one ffmpeg pass."""
+    vf = cover_filter(width, height, fps)
+    os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+    tmp_path = f"{dst_path}.{os.getpid()}.tmp.mp4"
+    try:
+        run_ffmpeg([
+            "-y", "-stream_loop", "-1", "-i", src_path,
+            "-t", f"{duration:g}", "-an", "-vf", vf,
+            "-c:v", "libx264", "-preset", "fast", "-crf", "16", "-pix_fmt", "yuv420p",
+            "-movflags", "+faststart",
+            tmp_path,
+        ])
+        os.replace(tmp_path, dst_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def prepare_background(src_path: str, width: int, height: int, fps: int, duration: float,
+                       force: bool = False) -> str:
+    """Return the path of the prepared copy of `src_path`, transcoding it if needed."""
+    if not os.path.exists(src_path):
+        raise FileNotFoundError(f"Background video not found: {src_path}")
+
+    src_key = os.path.abspath(src_path)
+    fingerprint = _source_fingerprint(src_path)
+    target = _target_spec(width, height, fps, duration)
+    dst_path = prepared_path_for(src_path, width, height, fps, duration)
+
+    manifest = _load_manifest()
+    record = manifest.get(src_key)
+    if (not force and record and record.get("source") == fingerprint
+            and record.get("target") == target and os.path.exists(dst_path)):
+        return dst_path
+
+    print(f"[BG] Preparing background {src_path} -> {dst_path}")
+    transcode_background(src_path, dst_path, width, height, fps, duration)
+
+    # Re-read in case another render updated the manifest meanwhile.
+    manifest = _load_manifest()
+    manifest[src_key] = {"source": fingerprint, "target": target,
+                         "prepared": os.path.basename(dst_path)}
+    _save_manifest(manifest)
+    return dst_path
+
+
+def decode_raw_background(prepared_path: str, dst_path: str, width: int, height: int,
+                          fps: int, duration: float) -> None:
+    """Decode a prepared background into a .rgbraw file (header + rgb24 frames)."""
+    tmp_path = f"{dst_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            write_header(f, width, height, fps, 0)
+            f.flush()
+            run_ffmpeg(raw_frames_args(prepared_path, width, height, fps, duration), stdout=f)
+            frames = (f.tell() - HEADER_SIZE) // (width * height * 3)
+            if frames <= 0:
+                raise FFmpegError(f"no frames decoded from {prepared_path}")
+            write_header(f, width, height, fps, frames)
+        os.replace(tmp_path, dst_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def prepare_raw_background(src_path: str, width: int, height: int, fps: int, duration: float,
+                           force: bool = False) -> str:
+    """Return the path of the raw frame file of `src_path`, preparing it (and the mp4) if needed."""
+    prepared = prepare_background(src_path, width, height, fps, duration, force=force)
+    src_key = os.path.abspath(src_path)
+    target = _target_spec(width, height, fps, duration)
+    dst_path = os.path.splitext(prepared)[0] + RAW_EXT
+
+    # Tied to the prepared mp4 it was decoded from: a re-prepare invalidates it.
+    raw_record = {"prepared": os.path.basename(prepared), "target": target}
+    record = _load_manifest().get(src_key) or {}
+    if not force and record.get("raw") == raw_record and os.path.exists(dst_path):
+        return dst_path
+
+    print(f"[BG] Decoding raw frames {prepared} -> {dst_path}")
+    decode_raw_background(prepared, dst_path, width, height, fps, duration)
+
+    manifest = _load_manifest()
+    if src_key in manifest:
+        manifest[src_key]["raw"] = raw_record
+        _save_manifest(manifest)
+    return dst_path
+
+
+def resolve_background(src_path: str, width: int, height: int, fps: int, duration: float,
+                       raw: bool = False) -> str:
+    """prepare_background (or prepare_raw_background), but fall back if ffmpeg is unavailable.
+
+    A failed raw decode falls back to the prepared mp4, a failed preparation
+    to the source file.
+    """
+    if raw:
+        try:
+            return prepare_raw_background(src_path, width, height, fps, duration)
+        except (FFmpegError, OSError) as e:
+            print(f"[WARN] Could not decode raw frames for {src_path}, using the prepared video: {e}")
+    try:
+        return prepare_background(src_path, width, height, fps, duration)
+    except FFmpegError as e:
+        print(f"[WARN] Could not prepare background {src_path}, using it as-is: {e}")
+        return src_path
+
+
+def list_source_backgrounds(assets_dir: str = ASSETS_DIR) -> List[str]:
+    return sorted(glob.glob(os.path.join(assets_dir, "*.mp4")))
+
+
+def prepare_all_backgrounds(width: int, height: int, fps: int, duration: float,
+                            assets_dir: str = ASSETS_DIR, force: bool = False,
+                            raw: bool = False) -> List[str]:
+    prepare = prepare_raw_background if raw else prepare_background
+    prepared = []
+    for src in list_source_backgrounds(assets_dir):
+        try:
+            prepared.append(prepare(src, width, height, fps, duration, force=force))
+        except (FFmpegError, OSError) as e:
+            print(f"[ERROR] Failed to prepare {src}: {e}")
+    return prepared
+
+
+if __name__ == "__main__":
+    from app import W, H, FPS, DURATION
+
+    force = "--force" in sys.argv[1:]
+    raw = "--raw" in sys.argv[1:]
+    done = prepare_all_backgrounds(W, H, FPS, DURATION, force=force, raw=raw)
+    print(f"[OK] {len(done)} background(s) ready in {CACHE_DIR}")
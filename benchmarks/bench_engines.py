@@ -0,0 +1,123 @@
+"""
+Compare the render engines of app.build_video against the moviepy baseline.
+
+Renders the same entry with every engine and reports wall time per engine.
+Equivalence is checked twice: on the composited RGB frames before encoding
+(should differ by at most 1 level from rounding) and on decoded output frames
+(PSNR, since two x264 encodes of near-identical input are never bit-equal).
+
+Usage:
+    python benchmarks/bench_engines.py [--background path/to/bg.mp4] [--repeat 2]
+
+Without --background a synthetic 1280x720 clip is generated with ffmpeg.
+Prepared backgrounds go to a temporary cache directory, not cache/backgrounds.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPT_DIR)
+sys.path.append(ROOT_DIR)
+
+import app  # noqa: E402
+import background_cache  # noqa: E402
+from ffmpeg_utils import ffmpeg_binary, run_ffmpeg  # noqa: E402
+
+
+def use_background_cache_dir(cache_dir: str) -> None:
+    """Prepare backgrounds (and keep their manifest) in `cache_dir` instead of the repo's cache."""
+    background_cache.CACHE_DIR = cache_dir
+    background_cache.MANIFEST_PATH = os.path.join(cache_dir, "manifest.json")
+
+
+def make_synthetic_background(path: str, size: str = "1280x720", rate: int = 30, seconds: int = 4) -> str:
+    run_ffmpeg(["-y", "-f", "lavfi", "-i", f"testsrc2=size={size}:rate={rate}",
+                "-t", str(seconds), "-pix_fmt", "yuv420p", path])
+    return path
+
+
+def read_frame(video_path: str, t: float) -> np.ndarray:
+    cmd = [ffmpeg_binary(), "-hide_banner", "-loglevel", "error", "-ss", f"{t:.3f}", "-i", video_path,
+           "-frames:v", "1", "-f", "rawvideo", "-pix_fmt", "rgb24", "-"]
+    raw = subprocess.run(cmd, capture_output=True, check=True).stdout
+    return np.frombuffer(raw, dtype=np.uint8).reshape(app.H, app.W, 3)
+
+
+def composite_frame_ffmpeg(bg_path: str, overlay_path: str, t: float) -> np.ndarray:
+    """One RGB frame straight out of app.ffmpeg_overlay_filter(), before any encoding."""
+    frame_index = int(round(t * app.FPS))
+    cmd = [ffmpeg_binary(), "-hide_banner", "-loglevel", "error",
+           "-i", bg_path, "-loop", "1", "-framerate", str(app.FPS), "-i", overlay_path,
+           "-filter_complex", app.ffmpeg_overlay_filter() + f";[v]select=eq(n\\,{frame_index})[out]",
+           "-map", "[out]", "-frames:v", "1", "-f", "rawvideo", "-pix_fmt", "rgb24", "-"]
+    raw = subprocess.run(cmd, capture_output=True, check=True).stdout
+    return np.frombuffer(raw, dtype=np.uint8).reshape(app.H, app.W, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark app.py render engines.")
+    parser.add_argument("--background", type=str, default="")
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    with open(os.path.join(ROOT_DIR, "data", "gold_prices.json"), "r", encoding="utf-8") as f:
+        entries = json.load(f)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        use_background_cache_dir(os.path.join(tmp, "backgrounds"))
+        bg_path = args.background or make_synthetic_background(os.path.join(tmp, "bg_synthetic.mp4"))
+        app.BG_PATH_DEFAULT = bg_path
+        # Prepare the background up front so both engines start from the same file.
+        app.resolve_background(bg_path, app.W, app.H, app.FPS, app.DURATION)
+
+        outputs = {}
+        for engine in app.RENDER_ENGINES:
+            out_path = os.path.join(tmp, f"out_{engine}.mp4")
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                app.build_video(entries, out_path, engine=engine, use_render_cache=False)
+                timings.append(time.perf_counter() - start)
+            outputs[engine] = out_path
+            print(f"[BENCH] {engine:8s} best {min(timings):6.2f}s  "
+                  f"mean {sum(timings) / len(timings):6.2f}s  ({app.DURATION * app.FPS / min(timings):.1f} fps)")
+
+        # Pre-encode composites: moviepy's CompositeVideoClip vs the ffmpeg filter graph.
+        layers = app.build_overlay_layers(entries)
+        prepared_bg = app.resolve_background(bg_path, app.W, app.H, app.FPS, app.DURATION)
+        comp = app.compose_moviepy(prepared_bg, layers)
+        numpy_clip = app.compose_numpy(prepared_bg, layers)
+        overlay_path = os.path.join(tmp, "overlay.png")
+        app.flatten_overlay(layers).save(overlay_path)
+        for t in (0.0, app.DURATION / 2):
+            a = comp.get_frame(t).astype(np.int16)
+            others = {
+                "numpy": numpy_clip.get_frame(t).astype(np.int16),
+                "ffmpeg": composite_frame_ffmpeg(prepared_bg, overlay_path, t).astype(np.int16),
+            }
+            for engine, b in others.items():
+                diff = np.abs(a - b)
+                print(f"[BENCH] composite {engine:6s} t={t:5.2f}s  max diff {diff.max():3d}  "
+                      f"mean diff {diff.mean():.3f}")
+
+        for engine in outputs:
+            if engine == "moviepy":
+                continue
+            for t in (0.0, app.DURATION / 2, app.DURATION - 1.0 / app.FPS):
+                a = read_frame(outputs["moviepy"], t).astype(np.float64)
+                b = read_frame(outputs[engine], t).astype(np.float64)
+                mse = np.mean((a - b) ** 2)
+                psnr = float("inf") if mse == 0 else 10 * np.log10(255.0 ** 2 / mse)
+                print(f"[BENCH] encoded   {engine:6s} t={t:5.2f}s  PSNR {psnr:.2f} dB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""
+Renderer benchmark suite.
+
+Every case runs in its own interpreter so peak RSS is per case. Cases use a
+synthetic background generated locally with ffmpeg (no assets/ needed) and
+the last two entries of data/gold_prices.json.
+
+For each case the report shows the cold (first) run, the best warm run,
+frames per second (video frames for the video cases, one frame per call for
+the image cases) and peak RSS. Results are written to
+benchmarks/results/<host>_<timestamp>.json and compared with the previous
+run from the same host (or --compare FILE).
+
+Usage:
+    python benchmarks/bench_render.py [--cases build_video,wrap_text] [--repeat 3]
+                                      [--engine numpy] [--compare results/x.json]
+"""
+
+import argparse
+import glob
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPT_DIR)
+RESULTS_DIR = os.path.join(SCRIPT_DIR, "results")
+SYNTHETIC_BG_PATH = os.path.join(ROOT_DIR, "cache", "bench", "bg_synthetic_1280x720.mp4")
+sys.path.append(ROOT_DIR)
+
+from render_metrics import peak_rss_mb  # noqa: E402
+
+WRAP_TEXT = ("ราคาทองคำแท่งรับซื้อและขายออกตามประกาศสมาคมค้าทองคำ อัปเดตล่าสุดวันนี้ "
+             "Gold bar buy / sell prices from the Gold Traders Association ") * 4
+
+
+def ensure_synthetic_background(path: str = SYNTHETIC_BG_PATH) -> str:
+    """1280x720 30 fps testsrc2 clip, generated once and reused between runs."""
+    if not os.path.exists(path):
+        from bench_engines import make_synthetic_background
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        make_synthetic_background(path)
+    return path
+
+
+def load_fixed_entries() -> List[Dict[str, str]]:
+    with open(os.path.join(ROOT_DIR, "data", "gold_prices.json"), "r", encoding="utf-8") as f:
+        return json.load(f)[-2:]
+
+
+# ---------- cases ----------
+# Each factory does its setup (imports, inputs) and returns (run, frames per run).
+
+def case_make_panel_clip(ctx) -> Tuple[Callable[[], object], int]:
+    import app
+    latest, prev = ctx["entries"][-1], ctx["entries"][0]
+    return (lambda: app.make_panel_clip(latest, prev)), 1
+
+
+def case_make_text_clip(ctx):
+    import app
+    return (lambda: app.make_text_clip("ที่มา: สมาคมค้าทองคำ", width=int(app.W * 0.94), max_height=140,
+                                       bg_color=(25, 55, 109, 200), pad=28)), 1
+
+
+def case_wrap_text(ctx):
+    import app
+    from PIL import Image, ImageDraw
+    draw = ImageDraw.Draw(Image.new("RGB", (10, 10)))
+    font = app.get_font("text_body", 48)
+    return (lambda: app.wrap_text(draw, WRAP_TEXT, font, int(app.W * 0.8))), 1
+
+
+def case_draw_gradient(ctx):
+    import app
+    return (lambda: app.draw_gradient((app.W, 320), (25, 55, 109), (212, 175, 55))), 1
+
+
+def case_ensure_background(ctx):
+    import app
+
+    def run():
+        clip = app.ensure_background(ctx["background"])
+        for _ in clip.iter_frames(fps=app.FPS):
+            pass
+        clip.close()
+    return run, app.DURATION * app.FPS
+
+
+# Cover-fit of the background per frame: ffmpeg decodes, resamples and fits
+# it, and the rgb24 frames are read from the pipe as FrameReader reads them.
+# "cover_fit_crop" is the current chain (ffmpeg_utils.cover_crop_scale, crop in
+# source coordinates, then scale); "cover_fit_scale" is the scale-to-cover-
+# then-crop chain it replaced, kept here as the before side of the comparison.
+
+def _cover_fit_case(fit: Callable[[int, int], str]):
+    def factory(ctx):
+        import app
+        from ffmpeg_utils import ffmpeg_binary
+        frame_bytes = app.W * app.H * 3
+        cmd = [ffmpeg_binary(), "-hide_banner", "-loglevel", "error", "-nostdin",
+               "-stream_loop", "-1", "-i", ctx["background"], "-t", f"{app.DURATION:g}", "-an",
+               "-vf", f"fps={app.FPS},{fit(app.W, app.H)}", "-f", "rawvideo", "-pix_fmt", "rgb24", "pipe:1"]
+
+        def run():
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, bufsize=frame_bytes)
+            while len(proc.stdout.read(frame_bytes)) == frame_bytes:
+                pass
+            proc.stdout.close()
+            if proc.wait() != 0:
+                raise RuntimeError(f"ffmpeg exited with {proc.returncode}")
+        return run, app.DURATION * app.FPS
+    return factory
+
+
+def _scale_then_crop(width: int, height: int) -> str:
+    return f"scale={width}:{height}:force_original_aspect_ratio=increase,crop={width}:{height},setsar=1"
+
+
+def _crop_then_scale(width: int, height: int) -> str:
+    from ffmpeg_utils import cover_crop_scale
+    return cover_crop_scale(width, height)
+
+
+def case_build_video(ctx, animate: bool = False):
+    import app
+    app.BG_PATH_DEFAULT = ctx["background"]
+    if ctx["use_bg_cache"]:
+        # Prepare outside the timed region, like a warm production host.
+        app.resolve_background(ctx["background"], app.W, app.H, app.FPS, app.DURATION)
+    suffix = "_animated" if animate else ""
+    out_path = os.path.join(ROOT_DIR, "cache", "bench", f"bench_{ctx['engine']}{suffix}.mp4")
+    return (lambda: app.build_video(ctx["entries"], out_path, use_bg_cache=ctx["use_bg_cache"],
+                                    engine=ctx["engine"], use_render_cache=False,
+                                    animate=animate)), app.DURATION * app.FPS
+
+
+def case_build_video_animated(ctx):
+    # Price count-up / diff flash; always the numpy engine, compare with --engine numpy.
+    return case_build_video(ctx, animate=True)
+
+
+def _facebook_case(style: str):
+    def factory(ctx):
+        from facebook_image_post import FacebookImageGenerator
+        gen = FacebookImageGenerator(data_file=os.path.join(ROOT_DIR, "data", "gold_prices.json"))
+        gen.latest_price = ctx["entries"][-1]
+        return getattr(gen, f"create_gold_price_image_{style}"), 1
+    return factory
+
+
+CASES: Dict[str, Callable] = {
+    "make_panel_clip": case_make_panel_clip,
+    "make_text_clip": case_make_text_clip,
+    "wrap_text": case_wrap_text,
+    "draw_gradient": case_draw_gradient,
+    "ensure_background": case_ensure_background,
+    "cover_fit_crop": _cover_fit_case(_crop_then_scale),
+    "cover_fit_scale": _cover_fit_case(_scale_then_crop),
+    "build_video": case_build_video,
+    "build_video_animated": case_build_video_animated,
+    "fb_modern": _facebook_case("modern"),
+    "fb_simple": _facebook_case("simple"),
+    "fb_premium": _facebook_case("premium"),
+}
+
+
+def run_case_in_process(name: str, ctx: Dict, repeat: int) -> Dict:
+    run, frames = CASES[name](ctx)
+    timings = []
+    for _ in range(max(1, repeat) + 1):  # first run is the cold one
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    warm = timings[1:]
+    best = min(warm)
+    return {
+        "case": name,
+        "cold_s": timings[0],
+        "best_s": best,
+        "mean_s": sum(warm) / len(warm),
+        "frames": frames,
+        "fps": frames / best if best > 0 else None,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_case_subprocess(name: str, args, background: str) -> Dict:
+    cmd = [sys.executable, os.path.abspath(__file__), "--child", name, "--repeat", str(args.repeat),
+           "--engine", args.engine, "--background", background]
+    if args.no_bg_cache:
+        cmd.append("--no_bg_cache")
+    # Quiet the renderers' own progress output; only the result line matters.
+    result = subprocess.run(cmd, cwd=ROOT_DIR, capture_output=True, text=True)
+    for line in reversed(result.stdout.splitlines()):
+        if line.startswith("[RESULT] "):
+            return json.loads(line[len("[RESULT] "):])
+    tail = (result.stderr.strip().splitlines() or ["no output"])[-1]
+    return {"case": name, "error": tail}
+
+
+def previous_results(host: str, exclude: str) -> Optional[str]:
+    files = sorted(glob.glob(os.path.join(RESULTS_DIR, f"{host}_*.json")))
+    files = [f for f in files if os.path.abspath(f) != os.path.abspath(exclude)]
+    return files[-1] if files else None
+
+
+def print_report(results: List[Dict], baseline: Optional[Dict]) -> None:
+    base_by_case = {r["case"]: r for r in (baseline or {}).get("results", []) if "error" not in r}
+    for r in results:
+        if "error" in r:
+            print(f"[BENCH] {r['case']:18s} failed: {r['error']}")
+            continue
+        rss = f"{r['peak_rss_mb']:7.1f} MB" if r.get("peak_rss_mb") is not None else "    n/a"
+        line = (f"[BENCH] {r['case']:18s} cold {r['cold_s'] * 1000:9.1f} ms  best {r['best_s'] * 1000:9.1f} ms  "
+                f"{r['fps']:9.1f} fps  peak {rss}")
+        prev = base_by_case.get(r["case"])
+        if prev:
+            delta = (r["best_s"] - prev["best_s"]) / prev["best_s"] * 100.0
+            line += f"  ({delta:+.1f}% vs baseline)"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the renderers.")
+    parser.add_argument("--cases", type=str, default=",".join(CASES),
+                        help=f"Comma-separated subset of: {', '.join(CASES)}")
+    parser.add_argument("--repeat", type=int, default=3, help="Warm runs per case (after one cold run).")
+    parser.add_argument("--engine", type=str, default="moviepy", help="Render engine for build_video.")
+    parser.add_argument("--no_bg_cache", action="store_true", help="build_video without the prepared background.")
+    parser.add_argument("--background", type=str, default="", help="Use this video instead of the synthetic one.")
+    parser.add_argument("--compare", type=str, default="", help="Results file to compare against.")
+    parser.add_argument("--child", type=str, default="", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        ctx = {"entries": load_fixed_entries(), "background": args.background,
+               "engine": args.engine, "use_bg_cache": not args.no_bg_cache}
+        print("[RESULT] " + json.dumps(run_case_in_process(args.child, ctx, args.repeat)))
+        return
+
+    names = [n.strip() for n in args.cases.split(",") if n.strip()]
+    unknown = [n for n in names if n not in CASES]
+    if unknown:
+        parser.error(f"unknown case(s): {', '.join(unknown)}")
+
+    background = args.background or ensure_synthetic_background()
+    results = [run_case_subprocess(name, args, background) for name in names]
+
+    host = socket.gethostname() or "host"
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    out_path = os.path.join(RESULTS_DIR, f"{host}_{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    record = {
+        "host": host,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "engine": args.engine,
+        "use_bg_cache": not args.no_bg_cache,
+        "repeat": args.repeat,
+        "background": os.path.relpath(background, ROOT_DIR),
+        "entries": [e.get("asdate") for e in load_fixed_entries()],
+        "results": results,
+    }
+
+    baseline_path = args.compare or previous_results(host, out_path)
+    baseline = None
+    if baseline_path:
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"[BENCH] baseline: {os.path.relpath(baseline_path, ROOT_DIR)}")
+    print_report(results, baseline)
+
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(record, f, ensure_ascii=False, indent=2)
+    print(f"[BENCH] results saved to {os.path.relpath(out_path, ROOT_DIR)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Import-time report for every script entry point (`python -X importtime`).
+
+Each entry point is imported in a fresh interpreter (its `__main__` block does
+not run) and the cumulative time of its top-level imports is compared with
+the budget below. main_workflow.py starts a new interpreter for every step, so
+this cost is paid again on each `run_script` call.
+
+Budgets (milliseconds, module import only, interpreter startup excluded):
+
+    main_workflow.py         50   sqlite/subprocess + daemon client; facebook + requests load in step 7
+    app.py                  200   PIL + numpy for the panel; moviepy loads on first video render
+    getgold_old.py          300   requests + bs4, both needed for the scrape itself
+    pypost_gold.py           50   googleapiclient loads in get_service()
+    pyblogs.py               50   googleapiclient loads in get_service()
+    telegram_notify.py      200   requests
+    facebook_auto_post.py   200   requests
+    facebook_post.py         50   stdlib only
+    facebook_image_post.py  300   PIL + numpy (gradients)
+    web_app.py              400   flask
+
+Usage:
+    python benchmarks/import_times.py [--repeat 3] [--top 5] [--strict]
+
+--strict exits non-zero when any script is over budget. A script whose
+dependencies are not installed is reported as "import failed" and skipped.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List, Optional, Tuple
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPT_DIR)
+
+BUDGETS_MS: Dict[str, int] = {
+    "main_workflow": 50,
+    "app": 200,
+    "getgold_old": 300,
+    "pypost_gold": 50,
+    "pyblogs": 50,
+    "telegram_notify": 200,
+    "facebook_auto_post": 200,
+    "facebook_post": 50,
+    "facebook_image_post": 300,
+    "web_app": 400,
+}
+
+
+def _parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """(name, cumulative us, depth) for every line of `-X importtime` output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        rows.append((name.strip(), int(cumulative), depth))
+    return rows
+
+
+def measure(module: str) -> Tuple[Optional[float], List[Tuple[str, float]], str]:
+    """Import `module` once; return (own import ms, heaviest direct imports, error)."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=ROOT_DIR, capture_output=True, text=True)
+    if result.returncode != 0:
+        last = (result.stderr.strip().splitlines() or ["?"])[-1]
+        return None, [], last
+    rows = _parse_importtime(result.stderr)
+    total_us = next((cum for name, cum, depth in rows if name == module and depth == 0), None)
+    if total_us is None:
+        return None, [], "module not found in importtime output"
+
+    # Direct children of the module are the depth-1 rows listed right before it.
+    children = []
+    idx = max(i for i, (name, _, depth) in enumerate(rows) if name == module and depth == 0)
+    for name, cum, depth in reversed(rows[:idx]):
+        if depth == 0:
+            break
+        if depth == 1:
+            children.append((name, cum / 1000.0))
+    children.sort(key=lambda item: item[1], reverse=True)
+    return total_us / 1000.0, children, ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time report for the entry point scripts.")
+    parser.add_argument("--repeat", type=int, default=3, help="Best of N fresh interpreters.")
+    parser.add_argument("--top", type=int, default=5, help="Heaviest direct imports to list.")
+    parser.add_argument("--strict", action="store_true", help="Exit 1 if any script is over budget.")
+    args = parser.parse_args()
+
+    over_budget = []
+    for module, budget in BUDGETS_MS.items():
+        best, children, error = None, [], ""
+        for _ in range(max(1, args.repeat)):
+            total, kids, error = measure(module)
+            if total is None:
+                break
+            if best is None or total < best:
+                best, children = total, kids
+        if best is None:
+            print(f"[IMPORT] {module + '.py':24s} import failed: {error}")
+            continue
+
+        status = "OK" if best <= budget else "OVER"
+        if status == "OVER":
+            over_budget.append(module)
+        print(f"[IMPORT] {module + '.py':24s} {best:7.1f} ms  budget {budget:4d} ms  {status}")
+        for name, ms in children[:args.top]:
+            print(f"           {name:32s} {ms:7.1f} ms")
+
+    if over_budget and args.strict:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Chunked encoding helpers (build_video(chunks=N)).
+
+The timeline is split into N runs of whole GOPs. Each run is composited
+and encoded to its own mp4 by a separate worker process. The chunks are
+then joined with ffmpeg's concat demuxer and stream copy, so nothing is
+encoded twice.
+
+Every chunk starts on an IDR frame. gop_args pins the keyframe interval
+and disables scene-cut keyframes, so a chunk boundary is also a GOP
+boundary of the joined file and no frame references across it.
+Timestamps are rebased by the concat demuxer, so playback runs straight
+through the joins.
+
+The chunk plan depends only on the frame count, the GOP size and N. x264
+is deterministic for fixed settings, so a given chunk count always gives
+the same bytes.
+"""
+
+import os
+import shutil
+import tempfile
+from typing import List, Tuple
+
+from ffmpeg_utils import run_ffmpeg
+
+
+def gop_args(gop: int) -> List[str]:
+    """x264 args for fixed GOPs of `gop` frames (keyframes only at the GOP starts)."""
+    return ["-g", str(gop), "-keyint_min", str(gop), "-sc_threshold", "0"]
+
+
+def plan_chunks(n_frames: int, chunks: int, gop: int) -> List[Tuple[int, int]]:
+    """[start, end) frame ranges of at most `chunks` runs of whole GOPs, as even as possible."""
+    n_gops = max(1, -(-n_frames // gop))
+    chunks = max(1, min(chunks, n_gops))
+    bounds = [min(n_frames, (i * n_gops // chunks) * gop) for i in range(chunks + 1)]
+    bounds[-1] = n_frames
+    return [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+
+def chunk_dir(out_path: str) -> str:
+    """Scratch directory for the chunks of `out_path`, on the same filesystem."""
+    out_dir = os.path.dirname(out_path) or "."
+    os.makedirs(out_dir, exist_ok=True)
+    return tempfile.mkdtemp(prefix="chunks_", dir=out_dir)
+
+
+def concat_chunks(chunk_paths: List[str], out_path: str) -> None:
+    """Join encoded chunks into `out_path` with the concat demuxer (stream copy, no re-encode)."""
+    work_dir = os.path.dirname(chunk_paths[0])
+    list_path = os.path.join(work_dir, "chunks.txt")
+    with open(list_path, "w", encoding="utf-8") as f:
+        for path in chunk_paths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+    tmp_path = os.path.join(work_dir, "joined" + (os.path.splitext(out_path)[1] or ".mp4"))
+    run_ffmpeg(["-y", "-f", "concat", "-safe", "0", "-i", list_path,
+                "-c", "copy", "-movflags", "+faststart", tmp_path])
+    os.replace(tmp_path, out_path)
+
+
+def remove_chunks(work_dir: str) -> None:
+    shutil.rmtree(work_dir, ignore_errors=True)
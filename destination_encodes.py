@@ -0,0 +1,163 @@
+"""
+Size-targeted copies of the rendered video per destination (build_video(destinations=[...])).
+
+Upload time dominates end-to-end latency, so every publisher sends the
+smallest file that is good enough for where it goes. That file is one of
+these copies, not the master render. Each destination profile has an
+output size and a byte budget for one DURATION-long video. The budget
+becomes a bitrate ceiling through one of two rate controls:
+
+    crf        -crf with -maxrate/-bufsize at the ceiling: easy content
+               stays below the budget, busy content is capped at it.
+               One pass, and every "crf" destination is encoded by the
+               same ffmpeg process from one decode of the master.
+    two_pass   average bitrate over two passes at the ceiling, or at the
+               master's own bitrate if that is lower (more bits cannot add
+               detail the master does not have): the file lands close to
+               that size with the best quality for it.
+
+The copies are written next to the master as <stem>_<destination>.mp4.
+video_for() gives a publisher its copy, or the master when there is no
+copy, it is older than the master, or it is not smaller (an over-budget
+encode of busy content can come out larger than the master).
+
+Usage:
+    python destination_encodes.py out/output.mp4 [telegram,facebook]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+from ffmpeg_utils import run_ffmpeg
+
+# max_mb is for one DURATION-long render (container overhead included).
+DESTINATIONS: Dict[str, Dict] = {
+    # Shown inline in chat on phones, so 720p is plenty.
+    "telegram": {"size": (720, 1280), "max_mb": 2.0, "crf": 26, "rate_control": "crf"},
+    # Facebook re-encodes uploads itself. Send full size and let its encoder pick the ladder.
+    "facebook": {"size": (1080, 1920), "max_mb": 4.0, "crf": 23, "rate_control": "crf"},
+    # For embedding in Blogger posts. pypost_gold.py posts HTML only, so nothing uploads it yet.
+    "blogger": {"size": (720, 1280), "max_mb": 1.0, "rate_control": "two_pass"},
+}
+
+# Share of the byte budget given to the video stream; the rest covers the mp4 container.
+_VIDEO_SHARE = 0.97
+
+
+def destination_path(video_path: str, name: str) -> str:
+    """out/output.mp4 -> out/output_telegram.mp4"""
+    stem, ext = os.path.splitext(video_path)
+    return f"{stem}_{name}{ext or '.mp4'}"
+
+
+def video_for(destination: str, video_path: str) -> str:
+    """The copy of `video_path` encoded for `destination` if it is current and smaller, else `video_path`."""
+    path = destination_path(video_path, destination)
+    if not os.path.exists(path):
+        return video_path
+    if not os.path.exists(video_path):
+        return path
+    if (os.path.getmtime(path) >= os.path.getmtime(video_path)
+            and os.path.getsize(path) < os.path.getsize(video_path)):
+        return path
+    return video_path
+
+
+def ceiling_kbps(spec: Dict, duration: float) -> int:
+    """Video bitrate ceiling (kbit/s) that keeps a `duration`-long encode within spec["max_mb"]."""
+    return max(100, int(spec["max_mb"] * 1024 * 1024 * 8 * _VIDEO_SHARE / duration / 1000))
+
+
+def _scale(spec: Dict) -> str:
+    w, h = spec["size"]
+    return f"scale={w}:{h}"
+
+
+def _x264(preset: str, threads: int) -> List[str]:
+    return ["-an", "-c:v", "libx264", "-preset", preset, "-threads", str(threads), "-pix_fmt", "yuv420p"]
+
+
+def _encode_crf(master: str, specs: Dict[str, Dict], paths: Dict[str, str], duration: float,
+                preset: str, threads: int) -> None:
+    """Every "crf" destination from one decode of the master (split -> scale -> x264 each)."""
+    names = list(specs)
+    graph = [f"[0:v]split={len(names)}" + "".join(f"[s{i}]" for i in range(len(names)))]
+    graph += [f"[s{i}]{_scale(specs[name])}[o{i}]" for i, name in enumerate(names)]
+    args = ["-y", "-i", master, "-filter_complex", ";".join(graph)]
+    for i, name in enumerate(names):
+        rate = ceiling_kbps(specs[name], duration)
+        args += ["-map", f"[o{i}]", *_x264(preset, threads), "-crf", str(specs[name]["crf"]),
+                 "-maxrate", f"{rate}k", "-bufsize", f"{rate}k", "-movflags", "+faststart", paths[name]]
+    run_ffmpeg(args)
+
+
+def _encode_two_pass(master: str, spec: Dict, path: str, duration: float, preset: str, threads: int) -> None:
+    master_kbps = int(os.path.getsize(master) * 8 / duration / 1000)
+    rate = f"{max(100, min(ceiling_kbps(spec, duration), master_kbps))}k"
+    common = ["-vf", _scale(spec), *_x264(preset, threads), "-b:v", rate, "-maxrate", rate,
+              "-bufsize", rate]
+    with tempfile.TemporaryDirectory() as tmp:
+        log = os.path.join(tmp, "x264pass")
+        run_ffmpeg(["-y", "-i", master, *common, "-pass", "1", "-passlogfile", log, "-f", "null", os.devnull])
+        run_ffmpeg(["-y", "-i", master, *common, "-pass", "2", "-passlogfile", log,
+                    "-movflags", "+faststart", path])
+
+
+def check_destinations(names: List[str]) -> List[str]:
+    """Validated, de-duplicated destination names (raises ValueError for unknown ones)."""
+    seen: List[str] = []
+    for name in names:
+        if name not in DESTINATIONS:
+            raise ValueError(f"Unknown destination: {name} (choose from {', '.join(DESTINATIONS)})")
+        if name not in seen:
+            seen.append(name)
+    return seen
+
+
+def encode_destinations(master: str, names: List[str], duration: float,
+                        preset: str = "medium", threads: int = 4) -> Dict[str, Dict]:
+    """Encode `master` for every destination in `names`; returns {name: {path, bytes, ...}}.
+
+    A copy over its budget is kept but flagged: the publisher still gets
+    the smallest file this run produced.
+    """
+    names = check_destinations(names)
+    paths = {name: destination_path(master, name) for name in names}
+    seconds: Dict[str, float] = {}
+
+    crf_specs = {n: DESTINATIONS[n] for n in names if DESTINATIONS[n]["rate_control"] == "crf"}
+    if crf_specs:
+        t0 = time.perf_counter()
+        _encode_crf(master, crf_specs, paths, duration, preset, threads)
+        seconds.update({n: time.perf_counter() - t0 for n in crf_specs})
+    for name in names:
+        if DESTINATIONS[name]["rate_control"] == "two_pass":
+            t0 = time.perf_counter()
+            _encode_two_pass(master, DESTINATIONS[name], paths[name], duration, preset, threads)
+            seconds[name] = time.perf_counter() - t0
+
+    report = {}
+    for name in names:
+        spec = DESTINATIONS[name]
+        size = os.path.getsize(paths[name])
+        report[name] = {"path": paths[name], "size": list(spec["size"]), "rate_control": spec["rate_control"],
+                        "ceiling_kbps": ceiling_kbps(spec, duration), "bytes": size,
+                        "max_bytes": int(spec["max_mb"] * 1024 * 1024),
+                        "within_budget": size <= spec["max_mb"] * 1024 * 1024,
+                        "seconds": round(seconds[name], 3)}
+        flag = "" if report[name]["within_budget"] else "  OVER BUDGET"
+        print(f"[ENC] {name:9s} {spec['size'][0]}x{spec['size'][1]} {spec['rate_control']:8s} "
+              f"{size / (1024.0 * 1024.0):6.2f} MB / {spec['max_mb']:.2f} MB{flag}")
+    return report
+
+
+if __name__ == "__main__":
+    from app import DURATION
+
+    if len(sys.argv) < 2:
+        sys.exit("usage: python destination_encodes.py VIDEO [telegram,facebook,...]")
+    chosen = sys.argv[2].split(",") if len(sys.argv) > 2 else list(DESTINATIONS)
+    encode_destinations(sys.argv[1], [n.strip() for n in chosen if n.strip()], DURATION)
@@ -0,0 +1,173 @@
+"""
+Per-host x264 encoder profiles for the video renders.
+
+`tune()` encodes a reference clip at the render size with every candidate
+preset / thread count, and stores encode time and output size in a per-host
+table (cache/encoder_profiles.json). `choose_profile()` then picks the
+best-compressing profile that still meets the target encode time and file
+size. Only threads that fit the host's share per concurrent render are
+considered. Without a tuned table the historical default
+(medium, 4 threads) is used.
+
+Usage:
+    python encoder_profiles.py --tune [--reference clip.mp4] [--seconds 4]
+    python encoder_profiles.py              # show the table and current choice
+"""
+
+import argparse
+import json
+import os
+import socket
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from ffmpeg_utils import FFmpegError, run_ffmpeg
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROFILE_TABLE_PATH = os.path.join(SCRIPT_DIR, "cache", "encoder_profiles.json")
+
+CANDIDATE_PRESETS = ["ultrafast", "superfast", "veryfast", "faster", "fast", "medium"]
+DEFAULT_PROFILE = {"preset": "medium", "threads": 4, "source": "default"}
+
+# Targets for one DURATION-long render, encode stage only.
+DEFAULT_TARGET_SECONDS = 20.0
+DEFAULT_MAX_MB = 20.0
+
+
+def host_key() -> str:
+    return f"{socket.gethostname() or 'host'}-{os.cpu_count() or 1}cpu"
+
+
+def candidate_threads(cpu_count: Optional[int] = None) -> List[int]:
+    cpu_count = cpu_count or os.cpu_count() or 1
+    return sorted({t for t in (1, 2, 4, cpu_count) if t <= cpu_count})
+
+
+def _load_table() -> Dict[str, Dict]:
+    try:
+        with open(PROFILE_TABLE_PATH, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except Exception:
+        return {}
+
+
+def _save_table(table: Dict[str, Dict]) -> None:
+    os.makedirs(os.path.dirname(PROFILE_TABLE_PATH), exist_ok=True)
+    tmp_path = f"{PROFILE_TABLE_PATH}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(table, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, PROFILE_TABLE_PATH)
+
+
+def make_reference_clip(path: str, width: int, height: int, fps: int, seconds: float) -> str:
+    """Synthetic moving test pattern at the render size, stored near-lossless."""
+    run_ffmpeg(["-y", "-f", "lavfi", "-i", f"testsrc2=size={width}x{height}:rate={fps}",
+                "-t", f"{seconds:g}", "-c:v", "libx264", "-preset", "ultrafast", "-qp", "0",
+                "-pix_fmt", "yuv420p", path])
+    return path
+
+
+def encode_reference(reference: str, out_path: str, preset: str, threads: int,
+                     width: int, height: int, fps: int, seconds: float) -> Dict:
+    """Encode the first `seconds` of `reference` the way the renders do; return time and bytes."""
+    start = time.perf_counter()
+    run_ffmpeg(["-y", "-t", f"{seconds:g}", "-i", reference,
+                "-vf", f"scale={width}:{height}:force_original_aspect_ratio=increase,crop={width}:{height},fps={fps}",
+                "-an", "-c:v", "libx264", "-preset", preset, "-threads", str(threads),
+                "-pix_fmt", "yuv420p", out_path])
+    return {"seconds": time.perf_counter() - start, "bytes": os.path.getsize(out_path)}
+
+
+def tune(width: int, height: int, fps: int, duration: float, reference: str = "",
+         seconds: float = 4.0, presets: Optional[List[str]] = None,
+         threads: Optional[List[int]] = None) -> Dict:
+    """Benchmark every preset x thread count on this host and store the results."""
+    presets = presets or CANDIDATE_PRESETS
+    threads = threads or candidate_threads()
+    results = []
+    reference_name = os.path.basename(reference) if reference else "testsrc2"
+    with tempfile.TemporaryDirectory() as tmp:
+        if not reference:
+            reference = make_reference_clip(os.path.join(tmp, "reference.mkv"), width, height, fps, seconds)
+        # Times and sizes are scaled from the reference length to a full render.
+        scale = duration / seconds
+        for preset in presets:
+            for t in threads:
+                out_path = os.path.join(tmp, f"{preset}_{t}.mp4")
+                try:
+                    r = encode_reference(reference, out_path, preset, t, width, height, fps, seconds)
+                except FFmpegError as e:
+                    print(f"[ENC] {preset:9s} threads={t:<2d} failed: {e}")
+                    continue
+                row = {"preset": preset, "threads": t,
+                       "seconds": round(r["seconds"] * scale, 3),
+                       "megabytes": round(r["bytes"] * scale / (1024.0 * 1024.0), 3)}
+                results.append(row)
+                print(f"[ENC] {preset:9s} threads={t:<2d} {row['seconds']:7.2f}s  {row['megabytes']:6.2f} MB "
+                      f"(per {duration:g}s render)")
+
+    entry = {
+        "cpu_count": os.cpu_count() or 1,
+        "measured_at": datetime.now().isoformat(timespec="seconds"),
+        "render": {"width": width, "height": height, "fps": fps, "duration": duration},
+        "reference": reference_name,
+        "results": results,
+    }
+    table = _load_table()
+    table[host_key()] = entry
+    _save_table(table)
+    return entry
+
+
+def choose_profile(target_seconds: float = DEFAULT_TARGET_SECONDS, max_mb: float = DEFAULT_MAX_MB,
+                   concurrency: int = 1) -> Dict:
+    """Pick preset/threads for this host from the tuned table (or the default profile)."""
+    entry = _load_table().get(host_key())
+    if not entry or not entry.get("results"):
+        return dict(DEFAULT_PROFILE)
+
+    thread_budget = max(1, entry.get("cpu_count", 1) // max(1, concurrency))
+    usable = [r for r in entry["results"] if r["threads"] <= thread_budget]
+    if not usable:
+        return dict(DEFAULT_PROFILE)
+    # Per preset keep the best thread count that fits the budget.
+    best_per_preset: Dict[str, Dict] = {}
+    for r in usable:
+        current = best_per_preset.get(r["preset"])
+        if current is None or r["seconds"] < current["seconds"]:
+            best_per_preset[r["preset"]] = r
+    rows = list(best_per_preset.values())
+
+    meeting = [r for r in rows if r["seconds"] <= target_seconds and r["megabytes"] <= max_mb]
+    if meeting:
+        chosen = min(meeting, key=lambda r: (r["megabytes"], r["seconds"]))
+        reason = "meets targets"
+    else:
+        # Nothing fits both: stay under the size cap if possible, else be fast.
+        under_size = [r for r in rows if r["megabytes"] <= max_mb]
+        chosen = min(under_size or rows, key=lambda r: r["seconds"])
+        reason = "fastest under size cap" if under_size else "fastest (no profile meets targets)"
+
+    return {"preset": chosen["preset"], "threads": chosen["threads"], "source": host_key(),
+            "reason": reason, "expected_seconds": chosen["seconds"], "expected_mb": chosen["megabytes"],
+            "target_seconds": target_seconds, "max_mb": max_mb, "concurrency": concurrency}
+
+
+if __name__ == "__main__":
+    from app import W, H, FPS, DURATION
+
+    parser = argparse.ArgumentParser(description="Tune and inspect x264 encoder profiles for this host.")
+    parser.add_argument("--tune", action="store_true", help="Benchmark presets/threads and store the table.")
+    parser.add_argument("--reference", type=str, default="", help="Reference clip (default: synthetic).")
+    parser.add_argument("--seconds", type=float, default=4.0, help="Seconds of the reference clip to encode.")
+    parser.add_argument("--target_seconds", type=float, default=DEFAULT_TARGET_SECONDS)
+    parser.add_argument("--max_mb", type=float, default=DEFAULT_MAX_MB)
+    parser.add_argument("--concurrency", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.tune:
+        tune(W, H, FPS, DURATION, reference=args.reference, seconds=args.seconds)
+    print(f"[ENC] {host_key()}: {json.dumps(choose_profile(args.target_seconds, args.max_mb, args.concurrency))}")
@@ -8,6 +8,22 @@ from PIL import Image, ImageDraw, ImageFont
 from pathlib import Path
 from datetime import datetime
 
+import font_registry
+from gradients import vertical_gradient
+import layout_templates
+
+
+@layout_templates.binding("facebook_trend")
+def trend_values(data):
+    """แนวโน้มราคา (up/down/flat) และส่วนต่างแบบไม่มีเครื่องหมาย สำหรับ layout ของ Facebook"""
+    try:
+        diff_value = int(data['diff'].replace(',', ''))
+    except Exception:
+        return {"trend": "flat", "diff_abs": ""}
+    trend = "up" if diff_value > 0 else "down" if diff_value < 0 else "flat"
+    return {"trend": trend, "diff_abs": f"{abs(diff_value):,}"}
+
+
 class FacebookImageGenerator:
     def __init__(self, data_file="data/gold_prices.json"):
         self.data_file = data_file
@@ -38,396 +54,31 @@ class FacebookImageGenerator:
             return False
     
     def get_font(self, size, bold=False):
-        """ดึง font ไทยที่รองรับภาษาไทยได้ดี"""
-        try:
-            # ลำดับความสำคัญของ font ไทย
-            if bold:
-                font_paths = [
-                    "C:/Windows/Fonts/tahomabd.ttf",  # Tahoma Bold - รองรับไทยดี
-                    "C:/Windows/Fonts/THSarabunNew Bold.ttf",
-                    "C:/Windows/Fonts/arialbd.ttf",
-                    "C:/Windows/Fonts/Angsana.ttc",
-                ]
-            else:
-                font_paths = [
-                    "C:/Windows/Fonts/tahoma.ttf",  # Tahoma - รองรับไทยดีที่สุด
-                    "C:/Windows/Fonts/THSarabunNew.ttf",
-                    "C:/Windows/Fonts/arial.ttf",
-                    "C:/Windows/Fonts/Angsana.ttc",
-                ]
-            
-            for font_path in font_paths:
-                if Path(font_path).exists():
-                    return ImageFont.truetype(font_path, size)
-            
-            # ถ้าไม่มี font ไทย แจ้งเตือน
-            print(f"⚠️ ไม่พบ font ไทย กำลังใช้ font default")
-            return ImageFont.truetype("C:/Windows/Fonts/arial.ttf", size)
-            
-        except Exception as e:
-            print(f"❌ ไม่สามารถโหลด font: {e}")
-            print("💡 กรุณาติดตั้ง Tahoma font หรือ Arial font")
-            # ใช้ font default ของระบบ
-            return ImageFont.load_default()
+        """ดึง font ไทยที่รองรับภาษาไทยได้ดี (แคชไว้ใน font_registry ต่อ process)"""
+        return font_registry.get_font("fb_bold" if bold else "fb_regular", size)
     
     def create_gradient_background(self, color1, color2):
-        """สร้างพื้นหลังแบบ gradient"""
-        base = Image.new('RGB', (self.width, self.height), color1)
-        top = Image.new('RGB', (self.width, self.height), color2)
-        mask = Image.new('L', (self.width, self.height))
-        mask_data = []
-        for y in range(self.height):
-            mask_data.extend([int(255 * (y / self.height))] * self.width)
-        mask.putdata(mask_data)
-        base.paste(top, (0, 0), mask)
-        return base
+        """สร้างพื้นหลังแบบ gradient (บนลงล่าง, แคชไว้ใน gradients.py)"""
+        return vertical_gradient((self.width, self.height), color1, color2)
     
-    def create_gold_price_image_modern(self):
-        """สร้างรูปภาพแบบโมเดิร์น - ปรับปรุงใหม่"""
+    def render_layout(self, style):
+        """วาดรูปภาพตาม layout ใน layouts/facebook_<style>.json (คอมไพล์และแคชไว้ต่อ process)"""
         if not self.latest_price:
             return None
-        
-        data = self.latest_price
-        
-        # สร้างพื้นหลัง gradient (ทอง)
-        img = self.create_gradient_background(
-            (255, 215, 0),   # Gold
-            (218, 165, 32)   # Goldenrod
-        )
-        
-        draw = ImageDraw.Draw(img)
-        
-        # Fonts - ปรับขนาดให้พอดีกับพื้นที่
-        font_title = self.get_font(70, bold=True)
-        font_large = self.get_font(50, bold=True)
-        font_medium = self.get_font(42, bold=False)
-        font_small = self.get_font(34, bold=False)
-        
-        # วาดกรอบขาว
-        margin = 30
-        draw.rectangle(
-            [(margin, margin), (self.width - margin, self.height - margin)],
-            outline=(255, 255, 255),
-            width=6
-        )
-        
-        # หัวข้อ - ใช้ข้อความไทยล้วน
-        y_pos = 65
-        title = "ราคาทองคำวันนี้"
-        # วัดความกว้างของข้อความ
-        title_bbox = draw.textbbox((0, 0), title, font=font_title)
-        title_width = title_bbox[2] - title_bbox[0]
-        draw.text(
-            ((self.width - title_width) / 2, y_pos),
-            title,
-            fill=(255, 255, 255),
-            font=font_title,
-            stroke_width=2,
-            stroke_fill=(0, 0, 0)
-        )
-        
-        # วันที่และเวลา
-        y_pos = 155
-        date_text = f"อัปเดต: {data['asdate']}"
-        date_bbox = draw.textbbox((0, 0), date_text, font=font_small)
-        date_width = date_bbox[2] - date_bbox[0]
-        draw.text(
-            ((self.width - date_width) / 2, y_pos),
-            date_text,
-            fill=(255, 255, 255),
-            font=font_small
-        )
-        
-        # เส้นแบ่ง
-        y_pos = 210
-        draw.line([(80, y_pos), (self.width - 80, y_pos)], fill=(255, 255, 255), width=2)
-        
-        # ทองคำแท่ง (ซ้าย)
-        y_pos = 245
-        x_left = 90
-        draw.text((x_left, y_pos), "ทองคำแท่ง 96.5%", fill=(255, 255, 255), font=font_large, stroke_width=2, stroke_fill=(0, 0, 0))
-        
-        y_pos += 60
-        draw.text((x_left + 15, y_pos), f"รับซื้อ", fill=(255, 255, 255), font=font_medium)
-        draw.text((x_left + 160, y_pos), f"{data['blbuy']}", fill=(255, 255, 255), font=font_medium, stroke_width=2, stroke_fill=(0, 0, 0))
-        
-        y_pos += 55
-        draw.text((x_left + 15, y_pos), f"ขาย", fill=(255, 255, 255), font=font_medium)
-        draw.text((x_left + 160, y_pos), f"{data['blsell']}", fill=(255, 255, 255), font=font_medium, stroke_width=2, stroke_fill=(0, 0, 0))
-        
-        # ทองรูปพรรณ (ขวา)
-        y_pos = 245
-        x_right = 630
-        draw.text((x_right, y_pos), "ทองรูปพรรณ 96.5%", fill=(255, 255, 255), font=font_large, stroke_width=2, stroke_fill=(0, 0, 0))
-        
-        y_pos += 60
-        draw.text((x_right + 15, y_pos), f"รับซื้อ", fill=(255, 255, 255), font=font_medium)
-        y_pos += 55
-        draw.text((x_right + 15, y_pos), f"{data['ombuy']}", fill=(255, 255, 255), font=font_medium, stroke_width=2, stroke_fill=(0, 0, 0))
-        
-        # เส้นแบ่ง
-        y_pos = 485
-        draw.line([(80, y_pos), (self.width - 80, y_pos)], fill=(255, 255, 255), width=2)
-        
-        # การเปลี่ยนแปลง
-        y_pos = 515
-        try:
-            diff_value = int(data['diff'].replace(',', ''))
-            if diff_value > 0:
-                trend_text = f"เพิ่มขึ้น {data['diff']} บาท"
-                trend_color = (0, 255, 0)
-                trend_icon = "↑"
-            elif diff_value < 0:
-                trend_text = f"ลดลง {abs(diff_value):,} บาท"
-                trend_color = (255, 50, 50)
-                trend_icon = "↓"
-            else:
-                trend_text = f"ไม่เปลี่ยนแปลง"
-                trend_color = (255, 255, 255)
-                trend_icon = "→"
-        except:
-            trend_text = f"ไม่เปลี่ยนแปลง"
-            trend_color = (255, 255, 255)
-            trend_icon = "→"
-        
-        trend_full = f"{trend_icon} {trend_text}"
-        trend_bbox = draw.textbbox((0, 0), trend_full, font=font_large)
-        trend_width = trend_bbox[2] - trend_bbox[0]
-        draw.text(
-            ((self.width - trend_width) / 2, y_pos),
-            trend_full,
-            fill=trend_color,
-            font=font_large,
-            stroke_width=3,
-            stroke_fill=(0, 0, 0)
-        )
-        
-        return img
-    
+        return layout_templates.compile_layout(f"facebook_{style}").render(self.latest_price)
+
+    def create_gold_price_image_modern(self):
+        """สร้างรูปภาพแบบโมเดิร์น - พื้นหลังทอง (layouts/facebook_modern.json)"""
+        return self.render_layout("modern")
+
     def create_gold_price_image_simple(self):
-        """สร้างรูปภาพแบบเรียบง่าย - ปรับปรุงใหม่"""
-        if not self.latest_price:
-            return None
-        
-        data = self.latest_price
-        
-        # สร้างพื้นหลังสีเข้ม
-        img = Image.new('RGB', (self.width, self.height), (25, 25, 35))
-        draw = ImageDraw.Draw(img)
-        
-        # Fonts - ปรับขนาดให้สมดุล
-        font_title = self.get_font(72, bold=True)
-        font_large = self.get_font(52, bold=True)
-        font_medium = self.get_font(44, bold=False)
-        font_small = self.get_font(36, bold=False)
-        
-        # หัวข้อ
-        y_pos = 70
-        title = "ราคาทองคำ"
-        title_bbox = draw.textbbox((0, 0), title, font=font_title)
-        title_width = title_bbox[2] - title_bbox[0]
-        draw.text(
-            ((self.width - title_width) / 2, y_pos),
-            title,
-            fill=(255, 215, 0),
-            font=font_title,
-            stroke_width=2,
-            stroke_fill=(0, 0, 0)
-        )
-        
-        # วันที่
-        y_pos = 160
-        date_text = f"อัปเดต: {data['asdate']}"
-        date_bbox = draw.textbbox((0, 0), date_text, font=font_small)
-        date_width = date_bbox[2] - date_bbox[0]
-        draw.text(
-            ((self.width - date_width) / 2, y_pos),
-            date_text,
-            fill=(180, 180, 180),
-            font=font_small
-        )
-        
-        # เส้นแบ่ง
-        y_pos = 220
-        draw.line([(100, y_pos), (self.width - 100, y_pos)], fill=(255, 215, 0), width=2)
-        
-        # ทองคำแท่ง
-        y_pos = 255
-        draw.text((100, y_pos), "ทองแท่ง 96.5%", fill=(255, 215, 0), font=font_large)
-        y_pos += 60
-        draw.text((120, y_pos), f"รับซื้อ: {data['blbuy']}", fill=(255, 255, 255), font=font_medium)
-        y_pos += 55
-        draw.text((120, y_pos), f"ขาย: {data['blsell']}", fill=(255, 255, 255), font=font_medium)
-        
-        # ทองรูปพรรณ
-        y_pos = 255
-        x_right = 650
-        draw.text((x_right, y_pos), "ทองรูปพรรณ 96.5%", fill=(255, 215, 0), font=font_large)
-        y_pos += 60
-        draw.text((x_right + 20, y_pos), f"รับซื้อ:", fill=(255, 255, 255), font=font_medium)
-        y_pos += 55
-        draw.text((x_right + 20, y_pos), f"{data['ombuy']}", fill=(255, 255, 255), font=font_medium)
-        
-        # เส้นแบ่ง
-        y_pos = 490
-        draw.line([(100, y_pos), (self.width - 100, y_pos)], fill=(255, 215, 0), width=2)
-        
-        # การเปลี่ยนแปลง
-        y_pos = 520
-        try:
-            diff_value = int(data['diff'].replace(',', ''))
-            if diff_value > 0:
-                trend_text = f"↑ เพิ่มขึ้น {data['diff']} บาท"
-                trend_color = (0, 255, 100)
-            elif diff_value < 0:
-                trend_text = f"↓ ลดลง {abs(diff_value):,} บาท"
-                trend_color = (255, 50, 50)
-            else:
-                trend_text = f"→ ไม่เปลี่ยนแปลง"
-                trend_color = (200, 200, 200)
-        except:
-            trend_text = f"→ ไม่เปลี่ยนแปลง"
-            trend_color = (200, 200, 200)
-        
-        trend_bbox = draw.textbbox((0, 0), trend_text, font=font_large)
-        trend_width = trend_bbox[2] - trend_bbox[0]
-        draw.text(
-            ((self.width - trend_width) / 2, y_pos),
-            trend_text,
-            fill=trend_color,
-            font=font_large,
-            stroke_width=2,
-            stroke_fill=(0, 0, 0)
-        )
-        
-        return img
-    
+        """สร้างรูปภาพแบบเรียบง่าย - พื้นหลังดำ (layouts/facebook_simple.json)"""
+        return self.render_layout("simple")
+
     def create_gold_price_image_premium(self):
-        """สร้างรูปภาพแบบพรีเมียม - ปรับปรุงใหม่"""
-        if not self.latest_price:
-            return None
-        
-        data = self.latest_price
-        
-        # สร้างพื้นหลัง gradient (เข้มสวยงาม)
-        img = self.create_gradient_background(
-            (15, 15, 30),    # Dark blue
-            (30, 15, 45)     # Purple
-        )
-        
-        draw = ImageDraw.Draw(img)
-        
-        # Fonts - ปรับขนาดให้สมดุล
-        font_title = self.get_font(70, bold=True)
-        font_large = self.get_font(50, bold=True)
-        font_medium = self.get_font(42, bold=False)
-        font_small = self.get_font(34, bold=False)
-        
-        # วาดกรอบทองหลายชั้น
-        margin = 25
-        for i in range(4):
-            draw.rectangle(
-                [(margin + i*2, margin + i*2), (self.width - margin - i*2, self.height - margin - i*2)],
-                outline=(255, 215, 0),
-                width=2
-            )
-        
-        # พื้นหลังกล่องข้อมูลโปร่งแสง
-        box_margin = 50
-        # สร้าง overlay สีดำโปร่งแสง
-        overlay = Image.new('RGBA', (self.width, self.height), (0, 0, 0, 0))
-        overlay_draw = ImageDraw.Draw(overlay)
-        overlay_draw.rectangle(
-            [(box_margin, 70), (self.width - box_margin, self.height - 70)],
-            fill=(0, 0, 0, 180),
-            outline=(255, 215, 0),
-            width=4
-        )
-        img.paste(overlay, (0, 0), overlay)
-        draw = ImageDraw.Draw(img)  # สร้าง draw ใหม่หลัง paste overlay
-        
-        # หัวข้อ
-        y_pos = 80
-        title = "ราคาทองคำวันนี้"
-        title_bbox = draw.textbbox((0, 0), title, font=font_title)
-        title_width = title_bbox[2] - title_bbox[0]
-        draw.text(
-            ((self.width - title_width) / 2, y_pos),
-            title,
-            fill=(255, 215, 0),
-            font=font_title,
-            stroke_width=3,
-            stroke_fill=(0, 0, 0)
-        )
-        
-        # วันที่และครั้งที่
-        y_pos = 165
-        date_text = f"อัปเดต: {data['asdate']} (ครั้งที่ {data['nqy']})"
-        date_bbox = draw.textbbox((0, 0), date_text, font=font_small)
-        date_width = date_bbox[2] - date_bbox[0]
-        draw.text(
-            ((self.width - date_width) / 2, y_pos),
-            date_text,
-            fill=(200, 200, 200),
-            font=font_small
-        )
-        
-        # เส้นแบ่งทอง
-        y_pos = 220
-        draw.line([(90, y_pos), (self.width - 90, y_pos)], fill=(255, 215, 0), width=3)
-        
-        # ทองคำแท่ง (ซ้าย)
-        y_pos = 255
-        x_left = 90
-        draw.text((x_left, y_pos), "ทองคำแท่ง 96.5%", fill=(255, 215, 0), font=font_large, stroke_width=2, stroke_fill=(0, 0, 0))
-        y_pos += 60
-        draw.text((x_left + 20, y_pos), f"รับซื้อ: {data['blbuy']}", fill=(255, 255, 255), font=font_medium)
-        y_pos += 55
-        draw.text((x_left + 20, y_pos), f"ขาย: {data['blsell']}", fill=(255, 255, 255), font=font_medium)
-        
-        # ทองรูปพรรณ (ขวา)
-        y_pos = 255
-        x_right = 640
-        draw.text((x_right, y_pos), "ทองรูปพรรณ 96.5%", fill=(255, 215, 0), font=font_large, stroke_width=2, stroke_fill=(0, 0, 0))
-        y_pos += 60
-        draw.text((x_right + 20, y_pos), f"รับซื้อ:", fill=(255, 255, 255), font=font_medium)
-        y_pos += 55
-        draw.text((x_right + 20, y_pos), f"{data['ombuy']}", fill=(255, 255, 255), font=font_medium)
-        
-        # เส้นแบ่งทอง
-        y_pos = 480
-        draw.line([(90, y_pos), (self.width - 90, y_pos)], fill=(255, 215, 0), width=3)
-        
-        # การเปลี่ยนแปลง
-        y_pos = 510
-        try:
-            diff_value = int(data['diff'].replace(',', ''))
-            if diff_value > 0:
-                trend_text = f"↑ เพิ่มขึ้น {data['diff']} บาท"
-                trend_color = (0, 255, 100)
-            elif diff_value < 0:
-                trend_text = f"↓ ลดลง {abs(diff_value):,} บาท"
-                trend_color = (255, 50, 50)
-            else:
-                trend_text = f"→ ไม่เปลี่ยนแปลง"
-                trend_color = (200, 200, 200)
-        except:
-            trend_text = f"→ ไม่เปลี่ยนแปลง"
-            trend_color = (200, 200, 200)
-        
-        trend_bbox = draw.textbbox((0, 0), trend_text, font=font_large)
-        trend_width = trend_bbox[2] - trend_bbox[0]
-        draw.text(
-            ((self.width - trend_width) / 2, y_pos),
-            trend_text,
-            fill=trend_color,
-            font=font_large,
-            stroke_width=3,
-            stroke_fill=(0, 0, 0)
-        )
-        
-        return img
-    
+        """สร้างรูปภาพแบบพรีเมียม - กรอบทองและกล่องโปร่งแสง (layouts/facebook_premium.json)"""
+        return self.render_layout("premium")
+
     def save_image(self, img, filename="facebook_gold_post.jpg"):
         """บันทึกรูปภาพ"""
         try:
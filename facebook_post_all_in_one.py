@@ -9,6 +9,7 @@ from pathlib import Path
 from facebook_post import FacebookGoldPost
 from facebook_image_post import FacebookImageGenerator
 from facebook_auto_post import FacebookAutoPost
+from destination_encodes import video_for
 
 class FacebookPostAllInOne:
     def __init__(self):
@@ -146,7 +147,7 @@ class FacebookPostAllInOne:
         elif post_to_fb == "2":
             self.auto_poster.post_with_image(result["text"], result["image_path"])
         elif post_to_fb == "3":
-            video_path = "out/output.mp4"
+            video_path = video_for("facebook", "out/output.mp4")
             if Path(video_path).exists():
                 self.auto_poster.post_with_video(result["text"], video_path)
             else:
@@ -0,0 +1,166 @@
+"""
+Helpers for running the ffmpeg binary directly (outside moviepy).
+
+The binary is taken from IMAGEIO_FFMPEG_EXE / FFMPEG_BINARY, then PATH, then
+the copy bundled with imageio-ffmpeg (which moviepy already depends on).
+
+FrameReader decodes a background with the fps / cover crop / scale filters
+running inside ffmpeg. Only output-sized frames at the render rate reach
+Python: for a 4K 60 fps source that is about 1/16 of the bytes moviepy's
+full-size reader would pipe.
+
+numpy is imported by the first FrameReader, not by this module: scripts that
+only run ffmpeg (e.g. telegram_notify.py via destination_encodes) stay light.
+"""
+
+import os
+import shutil
+import subprocess
+from functools import lru_cache
+from typing import TYPE_CHECKING, BinaryIO, List, Optional
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+class FFmpegError(RuntimeError):
+    pass
+
+
+@lru_cache(maxsize=None)
+def ffmpeg_binary() -> Optional[str]:
+    for env in ("IMAGEIO_FFMPEG_EXE", "FFMPEG_BINARY"):
+        exe = os.environ.get(env)
+        if exe and exe != "auto-detect" and (os.path.exists(exe) or shutil.which(exe)):
+            return exe
+    exe = shutil.which("ffmpeg")
+    if exe:
+        return exe
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return None
+
+
+def run_ffmpeg(args: List[str], timeout: Optional[float] = None,
+               stdout: Optional[BinaryIO] = None) -> subprocess.CompletedProcess:
+    """Run ffmpeg with `args` (without the binary); raise FFmpegError on failure.
+
+    `stdout` receives ffmpeg's output stream for "pipe:1" outputs.
+    """
+    exe = ffmpeg_binary()
+    if not exe:
+        raise FFmpegError("ffmpeg binary not found")
+    cmd = [exe, "-hide_banner", "-loglevel", "error", "-nostdin", *args]
+    result = subprocess.run(cmd, stdout=stdout if stdout is not None else subprocess.PIPE,
+                            stderr=subprocess.PIPE, text=True, timeout=timeout)
+    if result.returncode != 0:
+        raise FFmpegError(f"ffmpeg exited with {result.returncode}: {result.stderr.strip()[-2000:]}")
+    return result
+
+
+def cover_crop_scale(width: int, height: int, anchor_x: float = 0.5, anchor_y: float = 0.5) -> str:
+    """Cover-fit to width x height as one crop + one scale, anchored at (anchor_x, anchor_y).
+
+    The crop is taken in source coordinates (the largest width:height window
+    of the input), so the scaler only touches the pixels that survive it.
+    Scaling the whole frame to cover and cropping afterwards would resample
+    up to several times as many pixels and throw most of them away.
+
+    The window is rounded down to even sizes, which yuv420p sources need
+    anyway, and its width is taken from the rounded height, so it stays
+    within one pixel pair of width:height. setsar=1 keeps that last pixel of
+    rounding from showing up as a non-square sample aspect ratio.
+    """
+    crop_h = f"2*trunc(min(ih,iw*{height}/{width})/2)"
+    crop_w = f"2*trunc(min(iw,{crop_h}*{width}/{height})/2)"
+    return (f"crop=w='{crop_w}':h='{crop_h}':x='(iw-ow)*{anchor_x:g}':y='(ih-oh)*{anchor_y:g}',"
+            f"scale={width}:{height},setsar=1")
+
+
+def cover_filter(width: int, height: int, fps: int, start_frame: int = 0) -> str:
+    """-vf chain: resample to fps, centre-crop to the target aspect, scale to width x height.
+
+    fps comes first so that frames the render would drop are never scaled.
+    With `start_frame`, the output frames before it are dropped before scaling too.
+    """
+    trim = f",trim=start_frame={start_frame}" if start_frame else ""
+    return f"fps={fps}{trim},{cover_crop_scale(width, height)}"
+
+
+def raw_frames_args(path: str, width: int, height: int, fps: int, duration: float,
+                    start_frame: int = 0) -> List[str]:
+    """ffmpeg args writing the cover-fitted, looped/trimmed rgb24 frames of `path` to pipe:1."""
+    return ["-stream_loop", "-1", "-i", path, "-t", f"{duration:g}", "-an",
+            "-vf", cover_filter(width, height, fps, start_frame),
+            "-f", "rawvideo", "-pix_fmt", "rgb24", "pipe:1"]
+
+
+class FrameReader:
+    """Sequential RGB frames of a video, already cover-fitted, resampled and looped/trimmed by ffmpeg.
+
+    frame_at(t) serves the frame for time t. Reading forward skips frames
+    inside the pipe, and going back restarts the decoder. That matches how
+    moviepy's write_videofile and iter_frames walk a clip. The decoder is
+    started at the first requested frame, so a reader for the second half of
+    the timeline never scales or pipes the first.
+    """
+
+    def __init__(self, path: str, width: int, height: int, fps: int, duration: float):
+        self.path = path
+        self.width, self.height, self.fps, self.duration = width, height, fps, duration
+        self.frame_bytes = width * height * 3
+        self.n_frames = max(1, int(round(duration * fps)))
+        self._proc: Optional[subprocess.Popen] = None
+        self._index = -1
+        self._frame: Optional["np.ndarray"] = None
+
+    def _open(self, start_frame: int = 0) -> None:
+        self.close()
+        exe = ffmpeg_binary()
+        if not exe:
+            raise FFmpegError("ffmpeg binary not found")
+        cmd = [exe, "-hide_banner", "-loglevel", "error", "-nostdin",
+               *raw_frames_args(self.path, self.width, self.height, self.fps, self.duration, start_frame)]
+        self._proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                      bufsize=self.frame_bytes)
+        self._index = start_frame - 1
+        self._frame = None
+
+    def _read(self) -> bool:
+        import numpy as np
+
+        data = self._proc.stdout.read(self.frame_bytes)
+        if len(data) < self.frame_bytes:
+            if self._frame is None:
+                err = self._proc.stderr.read().decode("utf-8", "replace").strip()
+                raise FFmpegError(f"ffmpeg could not decode {self.path}: {err[-2000:] or 'no frames'}")
+            return False  # stream ended early: keep showing the last frame
+        self._frame = np.frombuffer(data, dtype=np.uint8).reshape(self.height, self.width, 3)
+        self._index += 1
+        return True
+
+    def frame_at(self, t: float) -> "np.ndarray":
+        index = min(int(t * self.fps + 1e-5), self.n_frames - 1)
+        if self._proc is None or index < self._index:
+            self._open(index)
+        while self._index < index:
+            if not self._read():
+                break
+        return self._frame
+
+    def close(self) -> None:
+        if self._proc is not None:
+            self._proc.stdout.close()
+            self._proc.stderr.close()
+            if self._proc.poll() is None:
+                self._proc.terminate()
+            self._proc.wait()
+            self._proc = None
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
@@ -0,0 +1,188 @@
+"""
+Process-wide font registry shared by the renderers (app.py, pyclipgold.py,
+facebook_image_post.py).
+
+Each role (title/head/label/num/chip/...) has an ordered candidate list of
+(font file, size). A role+size is resolved once per process and the loaded
+FreeType handle is cached, so repeated panel renders never walk the candidate
+lists or hit ImageFont.truetype again.
+
+On Linux the registry also consults a fontconfig index (`fc-list`) so a
+Thai-capable font is found even when none of the Windows font files exist.
+The index is cached in memory and on disk under cache/.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from PIL import ImageFont
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+FONTS_DIR = os.path.join(SCRIPT_DIR, "fonts")
+WINDOWS_FONTS_DIR = "C:/Windows/Fonts"
+FONTCONFIG_CACHE_PATH = os.path.join(SCRIPT_DIR, "cache", "fontconfig_index.json")
+
+# role -> ordered (font file, size) candidates. The first candidate's size is
+# the role's base size; other sizes are scaled relative to it on request.
+ROLE_CANDIDATES: Dict[str, List[Tuple[str, int]]] = {
+    # Panel (app.py / pyclipgold.py)
+    "title": [("LeelawUI.ttf", 60), ("THSarabunNew.ttf", 72), ("Tahoma.ttf", 56), ("segoeui.ttf", 56)],
+    "head": [("LeelawUI.ttf", 48), ("THSarabunNew.ttf", 60), ("Tahoma.ttf", 44), ("segoeui.ttf", 44)],
+    "label": [("LeelawUI.ttf", 46), ("THSarabunNew.ttf", 56), ("Tahoma.ttf", 42), ("segoeui.ttf", 42)],
+    "num": [("arialbd.ttf", 48), ("Tahoma.ttf", 48), ("segoeuib.ttf", 48)],
+    "chip_label": [("LeelawUI.ttf", 40), ("Tahoma.ttf", 36), ("segoeui.ttf", 36)],
+    "chip_value": [("arialbd.ttf", 40), ("Tahoma.ttf", 40)],
+    "small": [("LeelawUI.ttf", 40), ("Tahoma.ttf", 36), ("segoeui.ttf", 36)],
+    # Text boxes (footer / custom message)
+    "text_title": [("THSarabunNew.ttf", 72), ("LeelawUI.ttf", 64), ("Tahoma.ttf", 60),
+                   ("Arial Unicode.ttf", 60), ("arialuni.ttf", 60)],
+    "text_body": [("THSarabunNew.ttf", 56), ("LeelawUI.ttf", 50), ("Tahoma.ttf", 48),
+                  ("Arial Unicode.ttf", 48), ("arialuni.ttf", 48)],
+    "latin_title": [("arialbd.ttf", 64), ("segoeuib.ttf", 64), ("Arial.ttf", 64)],
+    "latin_body": [("arial.ttf", 48), ("segoeui.ttf", 48), ("Arial.ttf", 48)],
+    # Facebook images
+    "fb_bold": [("tahomabd.ttf", 50), ("THSarabunNew Bold.ttf", 50), ("arialbd.ttf", 50), ("Angsana.ttc", 50)],
+    "fb_regular": [("tahoma.ttf", 42), ("THSarabunNew.ttf", 42), ("arial.ttf", 42), ("Angsana.ttc", 42)],
+}
+
+# Roles that should fall back to a bold face when only fontconfig can help.
+BOLD_ROLES = {"num", "chip_value", "latin_title", "fb_bold"}
+# Roles that never carry Thai text and may fall back to any Latin font.
+LATIN_ROLES = {"num", "chip_value", "latin_title", "latin_body"}
+
+
+def _run_fc_list(*args: str) -> List[str]:
+    if sys.platform.startswith("win") or not shutil.which("fc-list"):
+        return []
+    try:
+        out = subprocess.run(["fc-list", *args], capture_output=True, text=True, timeout=15)
+    except Exception:
+        return []
+    if out.returncode != 0:
+        return []
+    return [line for line in out.stdout.splitlines() if line.strip()]
+
+
+def _build_fontconfig_index() -> Dict[str, List[Dict[str, str]]]:
+    """Return {"all": [...], "thai": [...]} entries of {file, style}."""
+    fmt = "--format=%{file}\t%{style[0]}\n"
+    index = {"all": [], "thai": []}
+    for key, pattern in (("all", ":"), ("thai", ":lang=th")):
+        for line in _run_fc_list(pattern, fmt):
+            path, _, style = line.partition("\t")
+            index[key].append({"file": path, "style": style})
+    return index
+
+
+def _fontconfig_signature() -> List[float]:
+    """mtimes of the font directories; a change invalidates the disk index."""
+    dirs = ["/usr/share/fonts", "/usr/local/share/fonts", os.path.expanduser("~/.fonts"),
+            os.path.expanduser("~/.local/share/fonts"), FONTS_DIR]
+    return [os.path.getmtime(d) if os.path.isdir(d) else 0.0 for d in dirs]
+
+
+@lru_cache(maxsize=None)
+def fontconfig_index() -> Dict[str, List[Dict[str, str]]]:
+    """fontconfig font list, cached per process and on disk between runs."""
+    signature = _fontconfig_signature()
+    try:
+        with open(FONTCONFIG_CACHE_PATH, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached.get("signature") == signature:
+            return cached["index"]
+    except Exception:
+        pass
+
+    index = _build_fontconfig_index()
+    if index["all"]:
+        try:
+            os.makedirs(os.path.dirname(FONTCONFIG_CACHE_PATH), exist_ok=True)
+            with open(FONTCONFIG_CACHE_PATH, "w", encoding="utf-8") as f:
+                json.dump({"signature": signature, "index": index}, f, ensure_ascii=False)
+        except Exception:
+            pass
+    return index
+
+
+@lru_cache(maxsize=None)
+def resolve_font_path(name: str) -> Optional[str]:
+    """Find a font file by name: project fonts/, Windows fonts, then fontconfig."""
+    for folder in (FONTS_DIR, WINDOWS_FONTS_DIR):
+        path = os.path.join(folder, name)
+        if os.path.exists(path):
+            return path
+    lowered = name.lower()
+    for item in fontconfig_index()["all"]:
+        if os.path.basename(item["file"]).lower() == lowered:
+            return item["file"]
+    return None
+
+
+def _fontconfig_fallback(role: str) -> Optional[str]:
+    """Best fontconfig match for a role when none of its candidates exist."""
+    index = fontconfig_index()
+    pool = index["thai"] or (index["all"] if role in LATIN_ROLES else [])
+    if not pool:
+        return None
+    want_bold = role in BOLD_ROLES
+
+    def score(item: Dict[str, str]) -> Tuple[int, int]:
+        style = item["style"].lower()
+        is_bold = "bold" in style
+        plain = style in ("regular", "book", "normal", "medium", "bold")
+        return (0 if is_bold == want_bold else 1, 0 if plain else 1)
+
+    return min(pool, key=score)["file"]
+
+
+@lru_cache(maxsize=None)
+def _truetype(path: str, size: int):
+    return ImageFont.truetype(path, size=size)
+
+
+@lru_cache(maxsize=None)
+def get_font(role: str, size: Optional[int] = None):
+    """Return the cached font for `role`, optionally at a different base size."""
+    candidates = ROLE_CANDIDATES[role]
+    base_size = candidates[0][1]
+    scale = (size / base_size) if size else 1.0
+
+    for name, cand_size in candidates:
+        # An unresolved bare name still lets PIL search its own font dirs.
+        path = resolve_font_path(name) or name
+        try:
+            return _truetype(path, max(1, round(cand_size * scale)))
+        except Exception:
+            continue
+
+    path = _fontconfig_fallback(role)
+    if path:
+        try:
+            return _truetype(path, max(1, round(base_size * scale)))
+        except Exception:
+            pass
+
+    print(f"[WARN] No usable font for role '{role}', using PIL default font")
+    return ImageFont.load_default()
+
+
+def load_font(candidates: List[Tuple[str, int]]):
+    """Cached replacement for the old try_load_font(candidates) helpers."""
+    return _load_font_candidates(tuple((str(name), int(size)) for name, size in candidates))
+
+
+@lru_cache(maxsize=None)
+def _load_font_candidates(candidates: Tuple[Tuple[str, int], ...]):
+    for name, size in candidates:
+        path = name if os.path.isabs(name) else (resolve_font_path(name) or name)
+        try:
+            return _truetype(path, size)
+        except Exception:
+            continue
+    print("[WARN] None of the font candidates could be loaded, using PIL default font")
+    return ImageFont.load_default()
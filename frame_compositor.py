@@ -0,0 +1,133 @@
+"""
+Region-of-interest alpha compositor for static overlays on a moving background.
+
+The overlay is flattened once into premultiplied integer planes and cut into
+the bounding boxes of its non-transparent regions. Per frame, only those
+boxes are blended (integer math, written straight into a reused output
+buffer); every other pixel of the background frame is copied through as-is.
+No full-frame temporaries are allocated after construction.
+
+moviepy's ffmpeg reader hands out read-only frames, so the output buffer is
+the one unavoidable frame-sized write.
+"""
+
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+Box = Tuple[int, int, int, int]  # y1, y2, x1, x2
+
+
+def _runs(mask: np.ndarray) -> List[Tuple[int, int]]:
+    """[start, end) index runs where a 1-D bool mask is True."""
+    padded = np.concatenate(([False], mask, [False]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    return [(int(a), int(b)) for a, b in zip(edges[::2], edges[1::2])]
+
+
+def opaque_regions(alpha: np.ndarray) -> List[Box]:
+    """Bounding boxes covering every pixel with alpha > 0.
+
+    Rows are split into bands of consecutive non-transparent rows and each
+    band into column runs, which keeps transparent gaps between the panel,
+    footer and logo out of the blend.
+    """
+    boxes: List[Box] = []
+    visible = alpha > 0
+    for y1, y2 in _runs(visible.any(axis=1)):
+        for x1, x2 in _runs(visible[y1:y2].any(axis=0)):
+            boxes.append((y1, y2, x1, x2))
+    return boxes
+
+
+class OverlayCompositor:
+    """Blend one precomputed RGBA overlay onto frames of the same size."""
+
+    def __init__(self, overlay_rgba: np.ndarray):
+        if overlay_rgba.ndim != 3 or overlay_rgba.shape[2] != 4:
+            raise ValueError("overlay must be an (H, W, 4) RGBA array")
+        self.height, self.width = overlay_rgba.shape[:2]
+        alpha = overlay_rgba[:, :, 3]
+        self.boxes = opaque_regions(alpha)
+
+        # Per region: premultiplied colour rgb*a and inverse alpha (255 - a),
+        # both uint16 so bg*inv + premult (<= 255*255) never overflows.
+        self._regions = []
+        for y1, y2, x1, x2 in self.boxes:
+            a = alpha[y1:y2, x1:x2].astype(np.uint16)[:, :, np.newaxis]
+            premult = overlay_rgba[y1:y2, x1:x2, :3].astype(np.uint16) * a + 128
+            inv = np.broadcast_to(255 - a, premult.shape).copy()
+            scratch = (np.empty_like(premult), np.empty_like(premult))
+            self._regions.append((y1, y2, x1, x2, premult, inv, scratch))
+
+        self._row_bands = self._passthrough_bands()
+        self.buffer = np.empty((self.height, self.width, 3), dtype=np.uint8)
+
+    def _passthrough_bands(self) -> List[Box]:
+        """Frame areas outside every blend box, as (row band, column gap) boxes."""
+        covered = np.zeros((self.height, self.width), dtype=bool)
+        for y1, y2, x1, x2 in self.boxes:
+            covered[y1:y2, x1:x2] = True
+        # Split rows wherever the covered-column pattern changes.
+        changes = np.flatnonzero((covered[1:] != covered[:-1]).any(axis=1)) + 1
+        starts = [0] + changes.tolist()
+        ends = changes.tolist() + [self.height]
+        bands: List[Box] = []
+        for y1, y2 in zip(starts, ends):
+            for x1, x2 in _runs(~covered[y1]):
+                bands.append((y1, y2, x1, x2))
+        return bands
+
+    @property
+    def blended_fraction(self) -> float:
+        area = sum((y2 - y1) * (x2 - x1) for y1, y2, x1, x2 in self.boxes)
+        return area / float(self.height * self.width)
+
+    def composite(self, frame: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Return `frame` with the overlay applied, in `out` (default: the shared output buffer)."""
+        out = self.buffer if out is None else out
+        for y1, y2, x1, x2 in self._row_bands:
+            out[y1:y2, x1:x2] = frame[y1:y2, x1:x2]
+        for y1, y2, x1, x2, premult, inv, (t, shifted) in self._regions:
+            # out = round((bg * (255 - a) + rgb * a) / 255), exact via the
+            # (t + (t >> 8)) >> 8 identity for t = x + 128.
+            np.multiply(frame[y1:y2, x1:x2, :3], inv, out=t, dtype=np.uint16)
+            np.add(t, premult, out=t)
+            np.right_shift(t, 8, out=shifted)
+            np.add(t, shifted, out=t)
+            np.right_shift(t, 8, out=t)
+            np.copyto(out[y1:y2, x1:x2], t, casting="unsafe")
+        return out
+
+
+def premultiply(rgba: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(rgb * a + 128, 255 - a) planes of an RGBA patch, as OverlayCompositor keeps per region."""
+    a = np.repeat(rgba[:, :, 3:4].astype(np.uint16), 3, axis=2)
+    premult = rgba[:, :, :3].astype(np.uint16)
+    premult *= a
+    premult += 128
+    np.subtract(255, a, out=a)
+    return premult, a
+
+
+def blend_premultiplied(out: np.ndarray, frame: np.ndarray, xy: Tuple[int, int],
+                        premult: np.ndarray, inv: np.ndarray) -> None:
+    """Blend a premultiply()-ed patch over `frame` at xy = (x, y) into `out`."""
+    x, y = xy
+    h, w = premult.shape[:2]
+    t = frame[y:y + h, x:x + w, :3].astype(np.uint16)
+    t *= inv
+    t += premult
+    t += t >> 8
+    t >>= 8
+    np.copyto(out[y:y + h, x:x + w], t, casting="unsafe")
+
+
+def blend_rgba(out: np.ndarray, frame: np.ndarray, xy: Tuple[int, int], rgba: np.ndarray) -> None:
+    """Blend an RGBA patch over `frame` at xy = (x, y) into `out`, with OverlayCompositor's rounding.
+
+    Used for overlay areas that change per frame (animated panel fields): the
+    patch replaces the static overlay pixels there, so the result is what a
+    full-frame composite of the updated overlay would give.
+    """
+    blend_premultiplied(out, frame, xy, *premultiply(rgba))
@@ -0,0 +1,112 @@
+"""
+Pre-rasterized glyphs for text that changes every frame (animated prices).
+
+A GlyphAtlas renders each character of a font once, as a coverage mask plus
+its bearing and advance. Drawing a string is then a few NumPy blends of those
+masks at the pen positions PIL would use. No FreeType calls happen per frame.
+With the hinted advances of the panel fonts, the result matches
+ImageDraw.text for digits and separators.
+
+The masks are blended straight into an RGBA array the way ImageDraw blends
+text into an RGBA image. The caller therefore draws onto a copy of the cached
+panel pixels, and then composites that patch like any other overlay (see
+frame_compositor.blend_rgba).
+"""
+
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+# Digits, separators, signs and arrows: everything a price / diff field shows.
+NUMERIC_CHARS = "0123456789,.+-% ▲▼"
+
+Glyph = Tuple[int, int, Optional[np.ndarray], float]  # left, top, coverage (h, w, 4) uint16, advance
+
+
+class GlyphAtlas:
+    """Coverage masks and advances of one font, rasterized once per character."""
+
+    def __init__(self, font, chars: str = NUMERIC_CHARS):
+        self.font = font
+        self.glyphs: Dict[str, Glyph] = {}
+        # (char, colour) -> (ink * coverage + 128, 255 - coverage), filled on first draw.
+        self._inked: Dict[Tuple[str, Tuple[int, ...]], Tuple[np.ndarray, np.ndarray]] = {}
+        for ch in chars:
+            self._glyph(ch)
+
+    def _glyph(self, ch: str) -> Glyph:
+        glyph = self.glyphs.get(ch)
+        if glyph is None:
+            # Characters outside the pre-rasterized set are added on first use.
+            left, top, right, bottom = self.font.getbbox(ch)
+            coverage = None
+            if right > left and bottom > top:
+                img = Image.new("L", (right - left, bottom - top), 0)
+                ImageDraw.Draw(img).text((-left, -top), ch, font=self.font, fill=255)
+                # Repeated over RGBA up front: per-frame math then never broadcasts.
+                coverage = np.repeat(np.asarray(img, dtype=np.uint16)[:, :, np.newaxis], 4, axis=2)
+            glyph = (left, top, coverage, self.font.getlength(ch))
+            self.glyphs[ch] = glyph
+        return glyph
+
+    def _inked_glyph(self, ch: str, ink: Tuple[int, ...]) -> Tuple[np.ndarray, np.ndarray]:
+        planes = self._inked.get((ch, ink))
+        if planes is None:
+            coverage = self._glyph(ch)[2]
+            planes = (coverage * np.array(ink, dtype=np.uint16) + 128, 255 - coverage)
+            self._inked[(ch, ink)] = planes
+        return planes
+
+    def text_width(self, text: str) -> float:
+        """Advance width of `text` (ImageDraw.textlength for these fonts)."""
+        return sum(self._glyph(ch)[3] for ch in text)
+
+    def ink_box(self, text: str, xy: Tuple[int, int] = (0, 0)) -> Tuple[int, int, int, int]:
+        """(x1, y1, x2, y2) of the pixels draw(rgba, xy, text, ...) can touch."""
+        x, y = xy
+        boxes = []
+        pen = 0.0
+        for ch in text:
+            left, top, coverage, advance = self._glyph(ch)
+            if coverage is not None:
+                gx, gy = x + int(pen) + left, y + top
+                boxes.append((gx, gy, gx + coverage.shape[1], gy + coverage.shape[0]))
+            pen += advance
+        if not boxes:
+            return x, y, x, y
+        return (min(b[0] for b in boxes), min(b[1] for b in boxes),
+                max(b[2] for b in boxes), max(b[3] for b in boxes))
+
+    def draw(self, rgba: np.ndarray, xy: Tuple[int, int], text: str, color: Tuple[int, ...]) -> None:
+        """Draw `text` into the (H, W, 4) uint8 array `rgba` in place, like ImageDraw.text((x, y), ...)."""
+        ink = tuple(color[:3]) + ((color[3],) if len(color) > 3 else (255,))
+        height, width = rgba.shape[:2]
+        x, y = xy
+        pen = 0.0
+        for ch in text:
+            left, top, coverage, advance = self._glyph(ch)
+            if coverage is not None:
+                gx, gy = x + int(pen) + left, y + top
+                gh, gw = coverage.shape[:2]
+                # Clip to the target; glyphs normally sit well inside their patch.
+                x1, y1, x2, y2 = max(gx, 0), max(gy, 0), min(gx + gw, width), min(gy + gh, height)
+                if x1 < x2 and y1 < y2:
+                    inked, inv = self._inked_glyph(ch, ink)
+                    crop = (slice(y1 - gy, y2 - gy), slice(x1 - gx, x2 - gx))
+                    region = rgba[y1:y2, x1:x2]
+                    # round((region * (255 - m) + ink * m) / 255), as in OverlayCompositor.
+                    t = region.astype(np.uint16)
+                    t *= inv[crop]
+                    t += inked[crop]
+                    t += t >> 8
+                    t >>= 8
+                    np.copyto(region, t, casting="unsafe")
+            pen += advance
+
+
+@lru_cache(maxsize=32)
+def atlas_for(font) -> GlyphAtlas:
+    """Process-wide atlas per font (fonts come from font_registry and are shared)."""
+    return GlyphAtlas(font)
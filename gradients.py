@@ -0,0 +1,100 @@
+"""
+NumPy gradient builder shared by the panel header (app.py, pyclipgold.py) and
+the Facebook image backgrounds.
+
+Gradients are built as one interpolated row/column and broadcast to the full
+size, and the result is kept in an LRU cache keyed by size, direction and
+colour stops. Horizontal ramps use the original per-column formula
+c1 * (1 - t) + c2 * t with t = x / (w - 1), and vertical_gradient keeps
+the Facebook backgrounds' original 8-bit mask blend, so both match the
+loops they replaced pixel for pixel. After the first render the navy panel
+header and the Modern / Premium Facebook backgrounds are plain cache hits
+(plus one image copy).
+"""
+
+from functools import lru_cache
+from typing import Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+Color = Tuple[int, int, int]
+Stop = Tuple[float, Color]
+
+
+def _normalize_stops(stops: Sequence[Stop]) -> Tuple[Stop, ...]:
+    if len(stops) < 2:
+        raise ValueError("A gradient needs at least two colour stops")
+    ordered = sorted((float(pos), tuple(int(c) for c in color)) for pos, color in stops)
+    return tuple(ordered)
+
+
+def _ramp(length: int, stops: Tuple[Stop, ...]) -> np.ndarray:
+    """(length, 3) uint8 colours interpolated along one axis."""
+    t = np.arange(length, dtype=np.float64) / max(1, length - 1)
+    out = np.empty((length, 3), dtype=np.float64)
+    out[:] = stops[0][1]
+    out[t >= stops[-1][0]] = stops[-1][1]
+    for (p1, c1), (p2, c2) in zip(stops, stops[1:]):
+        if p2 <= p1:
+            continue
+        inside = (t >= p1) & (t < p2)
+        u = (t[inside] - p1) / (p2 - p1)
+        # c1 * (1 - u) + c2 * u, as the original per-line gradient computed it;
+        # c1 + (c2 - c1) * u rounds differently for some widths.
+        out[inside] = (np.multiply.outer(1 - u, np.array(c1, dtype=np.float64))
+                       + np.multiply.outer(u, np.array(c2, dtype=np.float64)))
+    # Truncate like the original per-line int() gradient did.
+    return out.astype(np.uint8)
+
+
+def _mask_column(height: int, color1: Color, color2: Color) -> np.ndarray:
+    """(height, 3) column of the Facebook backgrounds' original gradient.
+
+    That gradient pasted color2 over color1 through an 8-bit mask of
+    int(255 * y / height), so it never quite reaches color2. PIL does the
+    blend here too, on a one-pixel-wide column, to keep its rounding.
+    """
+    base = Image.new("RGB", (1, height), color1)
+    mask = Image.fromarray((255 * np.arange(height) // height).astype(np.uint8)[:, np.newaxis], "L")
+    base.paste(Image.new("RGB", (1, height), color2), (0, 0), mask)
+    return np.asarray(base)[:, 0, :]
+
+
+@lru_cache(maxsize=32)
+def _cached_gradient(size: Tuple[int, int], stops: Tuple[Stop, ...], direction: str) -> Image.Image:
+    w, h = size
+    if direction == "horizontal":
+        arr = np.broadcast_to(_ramp(w, stops)[np.newaxis, :, :], (h, w, 3))
+    elif direction == "vertical":
+        arr = np.broadcast_to(_ramp(h, stops)[:, np.newaxis, :], (h, w, 3))
+    elif direction == "vertical_mask":
+        (_, color1), (_, color2) = stops
+        arr = np.broadcast_to(_mask_column(h, color1, color2)[:, np.newaxis, :], (h, w, 3))
+    else:
+        raise ValueError(f"Unknown gradient direction: {direction}")
+    return Image.fromarray(np.ascontiguousarray(arr), "RGB")
+
+
+def multi_stop_gradient(size: Tuple[int, int], stops: Sequence[Stop],
+                        direction: str = "horizontal") -> Image.Image:
+    """RGB gradient through `stops` [(position 0..1, (r, g, b)), ...].
+
+    Returns a copy, so callers are free to draw on the result.
+    """
+    key = (int(size[0]), int(size[1]))
+    return _cached_gradient(key, _normalize_stops(stops), direction).copy()
+
+
+def horizontal_gradient(size: Tuple[int, int], color1: Color, color2: Color) -> Image.Image:
+    return multi_stop_gradient(size, [(0.0, color1), (1.0, color2)], "horizontal")
+
+
+def vertical_gradient(size: Tuple[int, int], color1: Color, color2: Color) -> Image.Image:
+    """Top-to-bottom gradient with the Facebook backgrounds' original mask formula (see _mask_column)."""
+    return multi_stop_gradient(size, [(0.0, color1), (1.0, color2)], "vertical_mask")
+
+
+def gradient_cache_info():
+    """functools cache statistics (hits/misses/currsize) for diagnostics."""
+    return _cached_gradient.cache_info()
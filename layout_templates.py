@@ -0,0 +1,531 @@
+"""
+Declarative layouts for the price panel (app.py) and the Facebook images.
+
+A layout is a JSON file in layouts/. A .yaml/.yml file works too when PyYAML
+is installed. It declares the canvas, fonts, colours, compile-time geometry
+and an ordered list of draw ops:
+
+    {
+      "size": ["card_w", "card_h"], "mode": "RGBA", "background": [0, 0, 0, 0],
+      "theme": "navy",                       # layouts/themes/navy.json
+      "vars": {"card_w": "int(W * 0.94)"},   # evaluated once, in order
+      "fonts": {"num": "num", "big": ["fb_bold", 70]},
+      "bindings": ["panel"], "defaults": {"diff": "-"},
+      "ops": [{"op": "text", "text": "{blbuy}", "font": "num", "fill": "@green",
+               "box": "[x1, y1, x2, y2]", "align": "right", "pad": 24}]
+    }
+
+Numbers and boxes may be arithmetic expressions over "vars" and the
+variables the caller passes in (W, H). "@name" looks up a theme colour or
+string. Text with {field} placeholders and {"switch": field, "cases": {...}}
+values are bindings. They are evaluated for each render from the data plus
+the derived values of the registered binding functions; everything else is
+resolved when the layout is compiled.
+
+compile_layout() does that once per process. It resolves fonts through
+font_registry, pre-measures static text and bakes the leading run of static
+ops into a base image, which is also kept under cache/layouts. A render
+copies the base and draws only the remaining ops, so adding a theme or a
+layout needs no new drawing code and still takes the cached path.
+
+Text placement options: "align" (left / center / right within "box", with
+"pad" from the aligned edge), "valign" (top / center on the ink height),
+"measure" (advance or ink width) and "snap" ("offset" floors the centring
+offset, "width" truncates the measured width).
+"""
+
+import ast
+import hashlib
+import json
+import math
+import operator
+import os
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from PIL import Image, ImageDraw
+
+import font_registry
+import text_layout
+from gradients import horizontal_gradient, vertical_gradient
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+LAYOUTS_DIR = os.path.join(SCRIPT_DIR, "layouts")
+THEMES_DIR = os.path.join(LAYOUTS_DIR, "themes")
+CACHE_DIR = os.path.join(SCRIPT_DIR, "cache", "layouts")
+
+# Bump when the meaning of an op below changes, so baked bases on disk are not reused.
+# 2: gradient ops reproduce the original gradient formulas exactly (gradients.py).
+ENGINE_VERSION = 2
+
+Box = Tuple[float, float, float, float]
+
+
+class LayoutError(ValueError):
+    """A layout or theme file that cannot be compiled."""
+
+
+# ---------- files ----------
+
+def _read_document(directory: str, name: str) -> Dict:
+    for ext in (".json", ".yaml", ".yml"):
+        path = os.path.join(directory, name + ext)
+        if not os.path.exists(path):
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            if ext == ".json":
+                return json.load(f)
+            try:
+                import yaml
+            except ImportError:
+                raise LayoutError(f"{path} needs PyYAML (pip install pyyaml)") from None
+            return yaml.safe_load(f)
+    raise LayoutError(f"No layout file '{name}' in {directory}")
+
+
+def available_themes() -> List[str]:
+    if not os.path.isdir(THEMES_DIR):
+        return []
+    return sorted(os.path.splitext(f)[0] for f in os.listdir(THEMES_DIR)
+                  if f.endswith((".json", ".yaml", ".yml")))
+
+
+def load_spec(name: str, theme: Optional[str] = None) -> Dict:
+    """Layout `name` with its theme's colours, strings and vars merged in."""
+    spec = _read_document(LAYOUTS_DIR, name)
+    theme = theme or spec.get("theme")
+    if theme:
+        overrides = _read_document(THEMES_DIR, theme)
+        for section in ("vars", "colors", "strings"):
+            spec[section] = {**spec.get(section, {}), **overrides.get(section, {})}
+        spec["theme"] = theme
+    return spec
+
+
+# ---------- compile-time expressions ----------
+
+_FUNCTIONS = {"int": int, "min": min, "max": max, "round": round, "abs": abs}
+_BINARY = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul,
+           ast.Div: operator.truediv, ast.FloorDiv: operator.floordiv, ast.Mod: operator.mod}
+
+
+def _eval_node(node, env: Dict):
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+        return node.value
+    if isinstance(node, ast.Name):
+        if node.id not in env:
+            raise LayoutError(f"Unknown layout variable '{node.id}'")
+        return env[node.id]
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY:
+        return _BINARY[type(node.op)](_eval_node(node.left, env), _eval_node(node.right, env))
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        value = _eval_node(node.operand, env)
+        return -value if isinstance(node.op, ast.USub) else value
+    if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name)
+            and node.func.id in _FUNCTIONS and not node.keywords):
+        return _FUNCTIONS[node.func.id](*(_eval_node(arg, env) for arg in node.args))
+    if isinstance(node, (ast.List, ast.Tuple)):
+        return [_eval_node(elt, env) for elt in node.elts]
+    if isinstance(node, ast.Subscript):
+        return _eval_node(node.value, env)[_eval_node(node.slice, env)]
+    raise LayoutError(f"Unsupported layout expression: {ast.dump(node)}")
+
+
+def evaluate(expr, env: Dict):
+    """Evaluate a number, an expression string or a list of them against `env`."""
+    if isinstance(expr, (int, float)) and not isinstance(expr, bool):
+        return expr
+    if isinstance(expr, list):
+        return [evaluate(item, env) for item in expr]
+    if isinstance(expr, str):
+        try:
+            return _eval_node(ast.parse(expr, mode="eval").body, env)
+        except SyntaxError as e:
+            raise LayoutError(f"Bad layout expression '{expr}': {e}") from None
+    raise LayoutError(f"Expected a number or expression, got {expr!r}")
+
+
+# ---------- per-render values ----------
+
+BINDINGS: Dict[str, Callable[[Dict], Dict]] = {}
+
+
+def binding(name: str):
+    """Register fn(data) -> derived values for layouts that list `name` in "bindings"."""
+    def register(fn):
+        BINDINGS[name] = fn
+        return fn
+    return register
+
+
+class Binding:
+    """A value that depends on the data of one render."""
+
+    def __init__(self, fn: Callable[[Dict], object]):
+        self.fn = fn
+
+
+def resolve(value, values: Dict):
+    return value.fn(values) if isinstance(value, Binding) else value
+
+
+class _Compiler:
+    """Resolves op arguments against one layout's vars, fonts and theme."""
+
+    def __init__(self, spec: Dict, env: Dict, fonts: Dict):
+        self.env = env
+        self.fonts = fonts
+        self.colors = spec.get("colors", {})
+        self.strings = spec.get("strings", {})
+
+    def num(self, expr):
+        return evaluate(expr, self.env)
+
+    def box(self, expr) -> Box:
+        box = self.num(expr)
+        if len(box) == 2:  # an [x, y] point
+            box = [box[0], box[1], box[0], box[1]]
+        if len(box) != 4:
+            raise LayoutError(f"Expected [x1, y1, x2, y2], got {box!r}")
+        return tuple(box)
+
+    def font(self, alias: str):
+        if alias not in self.fonts:
+            raise LayoutError(f"Unknown layout font '{alias}'")
+        return self.fonts[alias]
+
+    def _lookup(self, table: Dict, ref: str, kind: str):
+        if ref[1:] not in table:
+            raise LayoutError(f"Unknown theme {kind} '{ref}'")
+        return table[ref[1:]]
+
+    def _switch(self, raw: Dict, convert: Callable):
+        field = raw["switch"]
+        cases = {key: convert(value) for key, value in raw["cases"].items()}
+        default = convert(raw["default"]) if "default" in raw else None
+        return Binding(lambda values: resolve(cases.get(str(values[field]), default), values))
+
+    def color(self, raw):
+        if raw is None:
+            return None
+        if isinstance(raw, dict):
+            return self._switch(raw, self.color)
+        if isinstance(raw, str) and raw.startswith("@"):
+            raw = self._lookup(self.colors, raw, "colour")
+        return tuple(int(c) for c in raw)
+
+    def text(self, raw):
+        if isinstance(raw, dict):
+            return self._switch(raw, self.text)
+        raw = str(raw)
+        if raw.startswith("@"):
+            raw = str(self._lookup(self.strings, raw, "string"))
+        if "{" in raw:
+            return Binding(lambda values: raw.format_map(values))
+        return raw
+
+
+# ---------- ops ----------
+
+class Op:
+    """One draw operation; `dynamic` ops depend on the render data."""
+
+    dynamic = False
+    overlay = False  # drawn on a transparent layer and alpha-pasted
+
+    def __init__(self, raw: Dict, c: _Compiler):
+        self.id = raw.get("id")
+        self.overlay = raw.get("layer") == "overlay"
+
+    def _mark(self, *values) -> None:
+        self.dynamic = self.dynamic or any(isinstance(v, Binding) for v in values)
+
+    def draw(self, img: Image.Image, draw: ImageDraw.ImageDraw, values: Dict) -> None:
+        raise NotImplementedError
+
+
+class RectOp(Op):
+    def __init__(self, raw, c):
+        super().__init__(raw, c)
+        self.box = c.box(raw["box"])
+        self.fill = c.color(raw.get("fill"))
+        self.outline = c.color(raw.get("outline"))
+        self.width = int(c.num(raw.get("width", 1)))
+        self.radius = int(c.num(raw.get("radius", 0)))
+        self._mark(self.fill, self.outline)
+
+    def draw(self, img, draw, values):
+        kwargs = {"fill": resolve(self.fill, values), "outline": resolve(self.outline, values), "width": self.width}
+        if self.radius:
+            draw.rounded_rectangle(self.box, radius=self.radius, **kwargs)
+        else:
+            draw.rectangle(self.box, **kwargs)
+
+
+class GradientOp(Op):
+    def __init__(self, raw, c):
+        super().__init__(raw, c)
+        self.xy = tuple(int(v) for v in c.num(raw.get("xy", [0, 0])))
+        self.size = tuple(int(v) for v in c.num(raw["size"]))
+        self.colors = [c.color(color) for color in raw["colors"]]
+        self.direction = raw.get("direction", "horizontal")
+        if self.direction not in ("horizontal", "vertical"):
+            raise LayoutError(f"Unknown gradient direction: {self.direction}")
+        self._mark(*self.colors)
+
+    def draw(self, img, draw, values):
+        c1, c2 = (resolve(color, values) for color in self.colors)
+        build = horizontal_gradient if self.direction == "horizontal" else vertical_gradient
+        img.paste(build(self.size, c1, c2), self.xy)
+
+
+class LineOp(Op):
+    def __init__(self, raw, c):
+        super().__init__(raw, c)
+        self.points = [tuple(point) for point in c.num(raw["points"])]
+        self.fill = c.color(raw.get("fill"))
+        self.width = int(c.num(raw.get("width", 1)))
+        self._mark(self.fill)
+
+    def draw(self, img, draw, values):
+        draw.line(self.points, fill=resolve(self.fill, values), width=self.width)
+
+
+class TextOp(Op):
+    def __init__(self, raw, c):
+        super().__init__(raw, c)
+        self.text = c.text(raw["text"])
+        self.font = c.font(raw["font"])
+        self.fill = c.color(raw.get("fill", [255, 255, 255]))
+        stroke = raw.get("stroke")
+        self.stroke_width = int(c.num(stroke[0])) if stroke else 0
+        self.stroke_fill = c.color(stroke[1]) if stroke else None
+        self.box = c.box(raw["box"] if "box" in raw else raw["xy"])
+        self.align = raw.get("align", "left")
+        self.valign = raw.get("valign", "top")
+        self.pad = c.num(raw.get("pad", 0))
+        self.measure = raw.get("measure", "advance")
+        self.snap = raw.get("snap")
+        self.y = c.num(raw["y"]) if "y" in raw else None
+        marker = raw.get("marker")
+        self.marker = None
+        if marker:
+            self.marker = {
+                "size": int(c.num(marker.get("size", 24))),
+                "gap": c.num(marker.get("gap", 10)),
+                "cy": c.num(marker["cy"]),
+                "direction": c.text(marker.get("direction", "up")),
+            }
+            self._mark(self.marker["direction"])
+        self._mark(self.text, self.fill, self.stroke_fill)
+        # Static text is placed once here instead of on every render.
+        self._static_position = None if isinstance(self.text, Binding) else self.position(self.text)
+
+    def _width(self, text: str) -> float:
+        if self.measure == "ink":
+            bbox = text_layout.text_bbox(text, self.font)
+            width = bbox[2] - bbox[0]
+        else:
+            width = text_layout.text_length(text, self.font)
+        if self.snap == "width":
+            width = int(width)
+        if self.marker:
+            width += self.marker["size"] + self.marker["gap"]
+        return width
+
+    def position(self, text: str) -> Tuple[float, float]:
+        """Where draw.text() puts `text` (the marker's left edge when there is one)."""
+        x1, y1, x2, y2 = self.box
+        if self.align == "left":
+            x = x1 + self.pad
+        elif self.align == "right":
+            x = x2 - self.pad - self._width(text)
+        else:
+            offset = (x2 - x1 - self._width(text)) / 2
+            x = x1 + (math.floor(offset) if self.snap == "offset" else offset)
+        if self.y is not None:
+            y = self.y
+        elif self.valign == "center":
+            y = int(y1 + (y2 - y1 - text_layout.text_height(text, self.font)) / 2)
+        else:
+            y = y1
+        return x, y
+
+    def draw(self, img, draw, values):
+        text = resolve(self.text, values)
+        x, y = self._static_position or self.position(text)
+        fill = resolve(self.fill, values)
+        if self.marker:
+            size = self.marker["size"]
+            cx, cy = x + size // 2, self.marker["cy"]
+            if resolve(self.marker["direction"], values) == "down":
+                pts = [(cx, cy + size // 2), (cx - size // 2, cy - size // 2), (cx + size // 2, cy - size // 2)]
+            else:
+                pts = [(cx, cy - size // 2), (cx - size // 2, cy + size // 2), (cx + size // 2, cy + size // 2)]
+            draw.polygon(pts, fill=fill)
+            x += size + self.marker["gap"]
+        draw.text((x, y), text, font=self.font, fill=fill,
+                  stroke_width=self.stroke_width, stroke_fill=resolve(self.stroke_fill, values))
+
+
+@lru_cache(maxsize=256)
+def chip_metrics(label: str, value: str, font_label, font_value, pad_x: int, pad_y: int) -> Tuple[int, int, float]:
+    """(chip width, chip height, label advance), memoized per label/value pair."""
+    tlw = text_layout.text_length(label, font_label)
+    trw = text_layout.text_length(value, font_value)
+    h = max(text_layout.text_height(label, font_label), text_layout.text_height(value, font_value)) + pad_y * 2
+    return int(tlw + trw + pad_x * 3), h, tlw
+
+
+class ChipsOp(Op):
+    """A row of pill-shaped label/value chips, left-aligned or centred in "box"."""
+
+    def __init__(self, raw, c):
+        super().__init__(raw, c)
+        self.box = c.box(raw["box"] if "box" in raw else raw["xy"])
+        self.align = raw.get("align", "left")
+        self.gap = int(c.num(raw.get("gap", 16)))
+        self.pad_x, self.pad_y = (int(v) for v in c.num(raw.get("pad", [18, 10])))
+        self.font_label, self.font_value = (c.font(alias) for alias in raw["fonts"])
+        self.chips = []
+        for chip in raw["chips"]:
+            fg = chip.get("fg", [[255, 255, 255], [255, 255, 255]])
+            self.chips.append((c.text(chip["label"]), c.text(chip["value"]), c.color(chip["bg"]),
+                               c.color(fg[0]), c.color(fg[1])))
+            self._mark(*self.chips[-1])
+
+    def draw(self, img, draw, values):
+        chips = [tuple(resolve(v, values) for v in chip) for chip in self.chips]
+        metrics = [chip_metrics(label, value, self.font_label, self.font_value, self.pad_x, self.pad_y)
+                   for label, value, *_ in chips]
+        x1, y, x2, _ = self.box
+        x = x1
+        if self.align == "center":
+            total = sum(w for w, _, _ in metrics) + self.gap * (len(chips) - 1)
+            x = x1 + (x2 - x1 - total) // 2
+        for (label, value, bg, fg_label, fg_value), (w, h, tlw) in zip(chips, metrics):
+            draw.rounded_rectangle([x, y, x + w, y + h], radius=h // 2, fill=bg)
+            ty = y + self.pad_y
+            draw.text((x + self.pad_x, ty), label, font=self.font_label, fill=fg_label)
+            draw.text((x + self.pad_x + tlw + self.pad_x // 2, ty), value, font=self.font_value, fill=fg_value)
+            x += w + self.gap
+
+
+OPS = {"rect": RectOp, "gradient": GradientOp, "line": LineOp, "text": TextOp, "chips": ChipsOp}
+
+
+def _draw_ops(img: Image.Image, ops: Iterable[Op], values: Dict) -> None:
+    draw = ImageDraw.Draw(img)
+    for op in ops:
+        if op.overlay:
+            layer = Image.new("RGBA", img.size, (0, 0, 0, 0))
+            op.draw(layer, ImageDraw.Draw(layer), values)
+            img.paste(layer, (0, 0), layer)
+            draw = ImageDraw.Draw(img)
+        else:
+            op.draw(img, draw, values)
+
+
+# ---------- compiled layouts ----------
+
+class CompiledLayout:
+    """A layout with fonts, geometry and static text resolved, and its static ops pre-drawn."""
+
+    def __init__(self, name: str, spec: Dict, variables: Dict):
+        self.name = name
+        self.theme = spec.get("theme")
+        self.vars = dict(variables)
+        for var, expr in spec.get("vars", {}).items():
+            self.vars[var] = evaluate(expr, self.vars)
+        self.fonts = {}
+        for alias, ref in spec.get("fonts", {}).items():
+            role, size = (ref, None) if isinstance(ref, str) else ref
+            self.fonts[alias] = font_registry.get_font(role, size)
+        c = _Compiler(spec, self.vars, self.fonts)
+        self.size = tuple(int(v) for v in c.num(spec["size"]))
+        self.mode = spec.get("mode", "RGB")
+        self.defaults = dict(spec.get("defaults", {}))
+        self.bindings = list(spec.get("bindings", []))
+        for name_ in self.bindings:
+            if name_ not in BINDINGS:
+                raise LayoutError(f"Layout '{name}' uses unregistered binding '{name_}'")
+
+        ops = []
+        for raw in spec.get("ops", []):
+            if raw.get("op") not in OPS:
+                raise LayoutError(f"Unknown op in layout '{name}': {raw.get('op')!r}")
+            ops.append(OPS[raw["op"]](raw, c))
+        self.by_id = {op.id: op for op in ops if op.id}
+        # Ops up to the first dynamic (or omittable) one are baked into the base.
+        split = next((i for i, op in enumerate(ops) if op.dynamic or op.id), len(ops))
+        self.static_ops, self.ops = ops[:split], ops[split:]
+
+        # Resolved font files are part of the key: a host with different
+        # fonts must not reuse a base rendered elsewhere.
+        font_ids = sorted((k, getattr(f, "path", "default"), getattr(f, "size", 0)) for k, f in self.fonts.items())
+        payload = json.dumps([ENGINE_VERSION, spec, sorted(variables.items()), font_ids],
+                             sort_keys=True, ensure_ascii=False, default=str)
+        self.key = hashlib.sha1(payload.encode("utf-8")).hexdigest()[:12]
+        self._background = spec.get("background", [0, 0, 0, 0] if self.mode == "RGBA" else [0, 0, 0])
+        self.base = self._load_base()
+
+    def _blank(self) -> Image.Image:
+        bg = self._background
+        if isinstance(bg, dict):
+            build = vertical_gradient if bg.get("direction", "vertical") == "vertical" else horizontal_gradient
+            img = build(self.size, *(tuple(color) for color in bg["colors"]))
+            return img if img.mode == self.mode else img.convert(self.mode)
+        return Image.new(self.mode, self.size, tuple(bg))
+
+    def _load_base(self) -> Image.Image:
+        label = f"{self.name}_{self.theme}" if self.theme else self.name
+        cache_path = os.path.join(CACHE_DIR, f"{label}_{self.key}.png")
+        if os.path.exists(cache_path):
+            try:
+                with Image.open(cache_path) as cached:
+                    cached.load()
+                    if cached.mode == self.mode and cached.size == self.size:
+                        return cached.copy()
+            except Exception as e:
+                print(f"[WARN] Ignoring unreadable layout cache {cache_path}: {e}")
+
+        img = self._blank()
+        _draw_ops(img, self.static_ops, {})
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            img.save(tmp_path, format="PNG", compress_level=1)
+            os.replace(tmp_path, cache_path)
+        except Exception as e:
+            print(f"[WARN] Could not write layout cache {cache_path}: {e}")
+        return img
+
+    def op(self, op_id: str) -> Op:
+        return self.by_id[op_id]
+
+    def values(self, data: Dict) -> Dict:
+        """Data plus defaults and derived binding values, as the ops see them."""
+        values = {**self.defaults, **data}
+        for name in self.bindings:
+            values.update(BINDINGS[name](values))
+        return values
+
+    def render(self, data: Dict, omit: Iterable[str] = ()) -> Image.Image:
+        """Base copy plus the dynamic ops for `data`; ops whose id is in `omit` are skipped."""
+        img = self.base.copy()
+        omit = set(omit)
+        _draw_ops(img, [op for op in self.ops if op.id not in omit], self.values(data))
+        return img
+
+
+@lru_cache(maxsize=16)
+def _compile(name: str, theme: Optional[str], variables: Tuple[Tuple[str, object], ...]) -> CompiledLayout:
+    return CompiledLayout(name, load_spec(name, theme), dict(variables))
+
+
+def compile_layout(name: str, theme: Optional[str] = None, **variables) -> CompiledLayout:
+    """The compiled layout `name` (optionally with `theme`), cached per process.
+
+    `variables` (e.g. W=1080, H=1920) are visible to the layout's expressions.
+    """
+    return _compile(name, theme, tuple(sorted(variables.items())))
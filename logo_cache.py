@@ -0,0 +1,159 @@
+"""
+On-disk cache for overlay logos (--logo_url).
+
+Per URL, cache/logos/<sha1>/ holds the downloaded bytes, meta.json (ETag,
+Last-Modified, last check) and the decoded RGBA variants already scaled to
+the widths the layouts ask for (w200.png, ...).
+
+Within the freshness window (Cache-Control max-age, else one hour) no request
+is made at all. After that, the logo is revalidated with
+If-None-Match / If-Modified-Since using a short timeout. If the host is slow
+or unreachable, the cached copy is used. Only the very first fetch of a URL
+can fail the logo.
+"""
+
+import hashlib
+import json
+import os
+import re
+import time
+from typing import Dict, Optional
+
+from PIL import Image
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(SCRIPT_DIR, "cache", "logos")
+
+DEFAULT_MAX_AGE = 3600
+# (connect, read) seconds; a stale copy is used when these are exceeded.
+REVALIDATE_TIMEOUT = (2, 3)
+FIRST_FETCH_TIMEOUT = 10
+
+
+def _entry_dir(url: str) -> str:
+    return os.path.join(CACHE_DIR, hashlib.sha1(url.encode("utf-8")).hexdigest()[:16])
+
+
+def _load_meta(entry_dir: str) -> Dict:
+    try:
+        with open(os.path.join(entry_dir, "meta.json"), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except Exception:
+        return {}
+
+
+def _save_meta(entry_dir: str, meta: Dict) -> None:
+    path = os.path.join(entry_dir, "meta.json")
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _max_age(headers) -> int:
+    match = re.search(r"max-age=(\d+)", headers.get("Cache-Control", ""))
+    return int(match.group(1)) if match else DEFAULT_MAX_AGE
+
+
+def _drop_variants(entry_dir: str) -> None:
+    for name in os.listdir(entry_dir):
+        if re.fullmatch(r"w\d+\.png", name):
+            os.remove(os.path.join(entry_dir, name))
+
+
+def refresh(url: str) -> Optional[str]:
+    """Make sure cache/logos has a usable copy of `url`; return the entry dir or None."""
+    import requests
+
+    entry_dir = _entry_dir(url)
+    source_path = os.path.join(entry_dir, "source")
+    meta = _load_meta(entry_dir)
+    have_source = os.path.exists(source_path)
+    if have_source and time.time() - meta.get("checked_at", 0) < meta.get("max_age", DEFAULT_MAX_AGE):
+        return entry_dir
+
+    headers = {}
+    if have_source and meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if have_source and meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+    try:
+        resp = requests.get(url, headers=headers,
+                            timeout=REVALIDATE_TIMEOUT if have_source else FIRST_FETCH_TIMEOUT)
+        if resp.status_code == 304 and have_source:
+            meta.update({"checked_at": time.time(), "max_age": _max_age(resp.headers)})
+            _save_meta(entry_dir, meta)
+            return entry_dir
+        resp.raise_for_status()
+    except Exception as e:
+        if have_source:
+            print(f"[WARN] Logo revalidation failed, using cached copy of {url}: {e}")
+            return entry_dir
+        print(f"Error adding logo from {url}: {e}")
+        return None
+
+    os.makedirs(entry_dir, exist_ok=True)
+    tmp_path = f"{source_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(resp.content)
+    os.replace(tmp_path, source_path)
+    _drop_variants(entry_dir)
+    _save_meta(entry_dir, {
+        "url": url,
+        "etag": resp.headers.get("ETag", ""),
+        # Only validators the server sent: an invented date could earn a 304 for a changed logo.
+        "last_modified": resp.headers.get("Last-Modified", ""),
+        "checked_at": time.time(),
+        "max_age": _max_age(resp.headers),
+    })
+    return entry_dir
+
+
+def fingerprint(url: str) -> Dict:
+    """Identity of the logo currently cached for `url` (for render_cache keys).
+
+    The logo is refreshed first, exactly as get_logo() would, so the key
+    follows a logo that changed at the same URL. The bytes are hashed
+    because a server does not have to send an ETag or Last-Modified.
+    """
+    entry_dir = refresh(url)
+    if entry_dir is None:
+        return {"url": url, "missing": True}
+    meta = _load_meta(entry_dir)
+    digest = hashlib.sha256()
+    with open(os.path.join(entry_dir, "source"), "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return {"url": url, "etag": meta.get("etag", ""), "last_modified": meta.get("last_modified", ""),
+            "sha256": digest.hexdigest()}
+
+
+def get_logo(url: str, max_width: int = 200) -> Optional[Image.Image]:
+    """The logo at `url` as RGBA, scaled down to at most `max_width` wide (or None)."""
+    entry_dir = refresh(url)
+    if entry_dir is None:
+        return None
+    variant_path = os.path.join(entry_dir, f"w{max_width}.png")
+    if os.path.exists(variant_path):
+        try:
+            with Image.open(variant_path) as cached:
+                cached.load()
+                return cached.convert("RGBA")
+        except Exception as e:
+            print(f"[WARN] Ignoring unreadable logo variant {variant_path}: {e}")
+
+    try:
+        with Image.open(os.path.join(entry_dir, "source")) as logo_img:
+            logo_img.load()
+            # Resize logo to fit (maintain aspect ratio), as the uncached path did
+            if logo_img.width > max_width:
+                logo_img = logo_img.resize((max_width, int(logo_img.height * (max_width / logo_img.width))))
+            logo_rgba = logo_img.convert("RGBA")
+    except Exception as e:
+        print(f"Error adding logo from {url}: {e}")
+        return None
+    tmp_path = f"{variant_path}.{os.getpid()}.tmp"
+    logo_rgba.save(tmp_path, format="PNG")
+    os.replace(tmp_path, variant_path)
+    return logo_rgba
@@ -4,15 +4,16 @@ import json
 import sqlite3
 import subprocess
 from datetime import datetime
-import requests # Moved import to top
 
 # Get the directory of the current script (main_workflow.py)
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 
 # Add script directory to Python path for importing local modules
 sys.path.append(SCRIPT_DIR)
-from facebook_post import FacebookGoldPost
-from facebook_auto_post import FacebookAutoPost
+from render_daemon import render_via_daemon
+from render_metrics import format_record, timings_path_for
+# facebook_post / facebook_auto_post (and requests) are imported where they are
+# used, so a run that stops at "no new data" does not pay for them.
 
 # ========== Configuration ==========
 DB_FILE = os.path.join(SCRIPT_DIR, "gold_tracker.db") # Use absolute path
@@ -21,6 +22,9 @@ GOLD_DATA_FILE = os.path.join(SCRIPT_DIR, "data", "gold_prices.json") # Use abso
 # Define output paths for app.py
 APP_OUTPUT_VIDEO_PATH = os.path.join(SCRIPT_DIR, "out", "output.mp4")
 APP_OUTPUT_IMAGE_PATH = os.path.join(SCRIPT_DIR, "out", "output_panel.jpg")
+APP_VIDEO_PANEL_PATH = os.path.join(SCRIPT_DIR, "out", "output_video_panel.jpg")
+APP_TIMINGS_PATH = timings_path_for(APP_OUTPUT_VIDEO_PATH)  # written by app.py
+RENDER_TIMINGS_LOG = os.path.join(SCRIPT_DIR, "out", "render_timings.jsonl")  # one record per run
 
 # ========== Database Functions ==========
 def init_database():
@@ -108,6 +112,48 @@ def run_script(script_name, description, *args):
         print(f"[ERROR] Error running {script_name}: {e}")
         return False
 
+def run_app(description, *args):
+    """Run app.py in the render daemon if one is running, else as a subprocess."""
+    result = render_via_daemon(list(args))
+    if result is None:
+        return run_script("app.py", description, *args)
+    if result.get("timed_out"):
+        # The daemon may still be rendering; a second render would race it for the same outputs.
+        print(f"[TIMEOUT] {description} did not finish in the render daemon within "
+              f"{result['seconds']:g}s; not starting a second render")
+        return False
+
+    print(f"\n{'='*60}")
+    print(f"[RUN] Running in render daemon: {description}")
+    print(f"   Args: {args}")
+    print(f"{'='*60}")
+    if result["returncode"] == 0:
+        print(f"[OK] {description} completed successfully ({result['seconds']:.1f}s)")
+        if result["output"]:
+            print(f"Output:\n{result['output']}")
+        return True
+    print(f"[ERROR] {description} failed with exit code {result['returncode']}")
+    if result["output"]:
+        print(f"Output (if any):\n{result['output']}")
+    return False
+
+def collect_render_timings(nqy, asdate):
+    """Return the stage timing record app.py wrote for this render and append it to the history log."""
+    if not os.path.exists(APP_TIMINGS_PATH):
+        print("[WARN] No render timings were written.")
+        return None
+    try:
+        with open(APP_TIMINGS_PATH, "r", encoding="utf-8") as f:
+            record = json.load(f)
+        record.update({"nqy": nqy, "asdate": asdate})
+        with open(RENDER_TIMINGS_LOG, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        print(f"[INFO] Render stage timings:\n{format_record(record)}")
+        return record
+    except Exception as e:
+        print(f"[WARN] Could not read render timings: {e}")
+        return None
+
 def get_latest_gold_data():
     """Read the latest gold price from JSON file."""
     if not os.path.exists(GOLD_DATA_FILE):
@@ -131,6 +177,8 @@ ONLINE_GOLD_API_URL = 'https://karndiy.pythonanywhere.com/goldjsonv2'
 
 def verify_gold_data_online(local_data):
     """Fetches gold data from an online API and compares it with local data."""
+    import requests
+
     print(f"[INFO] Verifying data with online API: {ONLINE_GOLD_API_URL}")
     try:
         response = requests.get(ONLINE_GOLD_API_URL, timeout=10)
@@ -214,34 +262,22 @@ def main():
     
     print(f"[INFO] New data detected! Proceeding with workflow...")
     
-    # Step 3: Generate video and image
-    print("\n[INFO] STEP 3: Generating video and static image...")
-    # Pass output paths as arguments to app.py
-    app_args = [
-        "--output_video_path", APP_OUTPUT_VIDEO_PATH,
+    # Step 3: Generate image (fast path, no moviepy)
+    print("\n[INFO] STEP 3: Generating static image...")
+    image_args = [
+        "--image_only",
+        "--data_file", GOLD_DATA_FILE,
         "--output_image_path", APP_OUTPUT_IMAGE_PATH,
-        # You can add --background_theme, --custom_message, --logo_url here if needed
     ]
-    if not run_script("app.py", "Video/Image Generator", *app_args):
-        print("[WARN] Video/Image generation failed, but continuing...")
-    
-    # Step 4: Post to Blogger
-    print("\n[INFO] STEP 4: Posting to Blogger...")
-    if not run_script("pypost_gold.py", "Blogger Publisher"):
-        print("[WARN] Blogger posting failed, but continuing...")
-    
-    # Step 5: Send Telegram notification
-    print("\n[INFO] STEP 5: Sending Telegram notification...")
-    if not run_script("telegram_notify.py", "Telegram Notifier"):
-        print("[WARN] Telegram notification failed, but continuing...")
-    
-    # Step 6: Mark as processed
-    print("\n[INFO] STEP 6: Marking as processed...")
-    mark_as_processed(nqy, asdate)
+    if not run_app("Panel Image Generator", *image_args):
+        print("[WARN] Image generation failed, but continuing...")
 
-    # NEW STEP 7: Post to Facebook (Image + Text only)
-    print("\n[INFO] STEP 7: Posting to Facebook (Image + Text)...")
+    # Step 4: Post to Facebook (Image + Text only) as soon as the image exists
+    print("\n[INFO] STEP 4: Posting to Facebook (Image + Text)...")
     try:
+        from facebook_post import FacebookGoldPost
+        from facebook_auto_post import FacebookAutoPost
+
         fb_post_generator = FacebookGoldPost(data_file=os.path.join(SCRIPT_DIR, "data", "gold_prices.json"))
         if fb_post_generator.load_latest_price():
             post_text = fb_post_generator.create_post_detailed() # Use detailed post as default
@@ -300,6 +336,38 @@ def main():
     except Exception as e:
         print(f"[ERROR] Error during Facebook posting: {e}")
 
+    # Step 5: Generate the video from the same entry as the image
+    print("\n[INFO] STEP 5: Generating video...")
+    app_args = [
+        "--data_file", GOLD_DATA_FILE,
+        "--output_video_path", APP_OUTPUT_VIDEO_PATH,
+        # Keep the video run's panel away from the image Facebook already posted
+        "--output_image_path", APP_VIDEO_PANEL_PATH,
+        # Smaller copies for the publishers that upload the video (see destination_encodes.py)
+        "--destinations", "telegram,facebook",
+        # You can add --background_theme, --custom_message, --logo_url here if needed
+    ]
+    if os.path.exists(APP_TIMINGS_PATH):
+        os.remove(APP_TIMINGS_PATH)  # never report a previous run's timings
+    if run_app("Video Generator", *app_args):
+        collect_render_timings(nqy, asdate)
+    else:
+        print("[WARN] Video generation failed, but continuing...")
+    
+    # Step 6: Post to Blogger
+    print("\n[INFO] STEP 6: Posting to Blogger...")
+    if not run_script("pypost_gold.py", "Blogger Publisher"):
+        print("[WARN] Blogger posting failed, but continuing...")
+    
+    # Step 7: Send Telegram notification
+    print("\n[INFO] STEP 7: Sending Telegram notification...")
+    if not run_script("telegram_notify.py", "Telegram Notifier"):
+        print("[WARN] Telegram notification failed, but continuing...")
+    
+    # Step 8: Mark as processed
+    print("\n[INFO] STEP 8: Marking as processed...")
+    mark_as_processed(nqy, asdate)
+
     # Summary
     print("\n" + "='*60}")
     print("  [OK] WORKFLOW COMPLETED SUCCESSFULLY")
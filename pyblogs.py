@@ -4,9 +4,6 @@
 
 import os
 import pickle
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
 
 # Blogger API Scopes
 SCOPES = ['https://www.googleapis.com/auth/blogger']
@@ -17,6 +14,11 @@ TARGET_BLOG_ID = "8971911068975230651"  # ราคาทองคำ Blog
 
 def get_service():
     """Authenticates the user and returns the Blogger service."""
+    # Google client libraries are slow to import; only load them when posting.
+    from google_auth_oauthlib.flow import InstalledAppFlow
+    from google.auth.transport.requests import Request
+    from googleapiclient.discovery import build
+
     creds = None
     if os.path.exists('token.pickle'):
         with open('token.pickle', 'rb') as token:
@@ -16,6 +16,10 @@ from moviepy.video.fx.CrossFadeIn import CrossFadeIn
 from moviepy.video.fx.CrossFadeOut import CrossFadeOut
 from moviepy.video.fx.Crop import Crop
 
+from font_registry import get_font, load_font
+from gradients import horizontal_gradient
+import text_layout
+
 
 URL = "https://karndiy.pythonanywhere.com/goldjsonv2"
 BG_PATH = os.path.join("assets", "bg.mp4")
@@ -38,33 +42,13 @@ def fetch_entries(url: str) -> List[Dict[str, str]]:
 
 def try_load_font(candidates: List[Tuple[str, int]]):
     """Try load fonts from a list of (path_or_name, size) and fall back to default."""
-    for name, size in candidates:
-        try:
-            # If name is a filename path it will load; on Windows common fonts are available.
-            return ImageFont.truetype(name, size=size)
-        except Exception:
-            continue
-    # Fallback
-    return ImageFont.load_default()
+    # Resolution and loaded fonts are cached process-wide by font_registry.
+    return load_font(candidates)
 
 
 def wrap_text(draw: ImageDraw.ImageDraw, text: str, font: ImageFont.FreeTypeFont, max_width: int) -> str:
-    lines = []
-    for paragraph in text.split("\n"):
-        words = paragraph.split(" ")
-        if not words:
-            lines.append("")
-            continue
-        current = words[0]
-        for w in words[1:]:
-            trial = current + " " + w
-            if draw.textlength(trial, font=font) <= max_width:
-                current = trial
-            else:
-                lines.append(current)
-                current = w
-        lines.append(current)
-    return "\n".join(lines)
+    """Wrap text to fit max_width (see text_layout.wrap_text; `draw` is unused)."""
+    return text_layout.wrap_text(text, font, max_width)
 
 
 def make_text_clip(text: str, width: int, max_height: int, 
@@ -73,18 +57,8 @@ def make_text_clip(text: str, width: int, max_height: int,
                    pad: int = 24,
                    align: str = "ls") -> ImageClip:
     # Load fonts (try common system fonts, then fallback)
-    title_font = try_load_font([
-        ("C:/Windows/Fonts/arialbd.ttf", 64),
-        ("C:/Windows/Fonts/segoeuib.ttf", 64),
-        ("arialbd.ttf", 64),
-        ("Arial.ttf", 64),
-    ])
-    body_font = try_load_font([
-        ("C:/Windows/Fonts/arial.ttf", 48),
-        ("C:/Windows/Fonts/segoeui.ttf", 48),
-        ("arial.ttf", 48),
-        ("Arial.ttf", 48),
-    ])
+    title_font = get_font("latin_title")
+    body_font = get_font("latin_body")
 
     # Prepare drawing surface for measuring
     dummy_img = Image.new("RGBA", (width, max_height), (0, 0, 0, 0))
@@ -103,13 +77,13 @@ def make_text_clip(text: str, width: int, max_height: int,
     body_wrapped = wrap_text(draw, body, body_font, content_width) if body else ""
 
     # Measure sizes
-    title_bbox = draw.multiline_textbbox((0, 0), title_wrapped, font=title_font, spacing=6)
+    title_bbox = text_layout.multiline_bbox(title_wrapped, title_font, spacing=6)
     title_w = title_bbox[2] - title_bbox[0]
     title_h = title_bbox[3] - title_bbox[1]
 
     body_h = 0
     if body_wrapped:
-        body_bbox = draw.multiline_textbbox((0, 0), body_wrapped, font=body_font, spacing=6)
+        body_bbox = text_layout.multiline_bbox(body_wrapped, body_font, spacing=6)
         body_h = body_bbox[3] - body_bbox[1]
 
     box_w = min(width, max(title_w, content_width) + 2 * pad)
@@ -201,30 +175,20 @@ def arrow_and_color(delta: Optional[float]) -> Tuple[str, Tuple[int, int, int]]:
 
 
 def draw_gradient(size: Tuple[int, int], color1: Tuple[int, int, int], color2: Tuple[int, int, int]) -> Image.Image:
-    w, h = size
-    grad = Image.new("RGB", (w, h), color1)
-    # horizontal gradient
-    for x in range(w):
-        t = x / max(1, w - 1)
-        r = int(color1[0] * (1 - t) + color2[0] * t)
-        g = int(color1[1] * (1 - t) + color2[1] * t)
-        b = int(color1[2] * (1 - t) + color2[2] * t)
-        ImageDraw.Draw(grad).line([(x, 0), (x, h)], fill=(r, g, b))
-    return grad
+    # horizontal gradient (vectorized and memoized in gradients.py)
+    return horizontal_gradient(size, color1, color2)
 
 
 def _text_center_y(draw: ImageDraw.ImageDraw, box: Tuple[int, int, int, int], text: str, font: ImageFont.FreeTypeFont) -> Tuple[int, int]:
     x1, y1, x2, y2 = box
-    bbox = draw.textbbox((0, 0), text, font=font)
-    th = bbox[3] - bbox[1]
+    th = text_layout.text_height(text, font)
     return x1, int(y1 + (y2 - y1 - th) / 2)
 
 
 def _text_right(draw: ImageDraw.ImageDraw, box: Tuple[int, int, int, int], text: str, font: ImageFont.FreeTypeFont, margin: int = 24) -> Tuple[int, int]:
     x1, y1, x2, y2 = box
-    tw = draw.textlength(text, font=font)
-    bbox = draw.textbbox((0, 0), text, font=font)
-    th = bbox[3] - bbox[1]
+    tw = text_layout.text_length(text, font)
+    th = text_layout.text_height(text, font)
     return x2 - margin - int(tw), int(y1 + (y2 - y1 - th) / 2)
 
 
@@ -234,18 +198,15 @@ def _draw_chip(base: Image.Image, xy: Tuple[int, int], text_left: str, text_righ
     draw = ImageDraw.Draw(base)
     pad_y = 10
     pad_x = 18
-    tlw = draw.textlength(text_left, font=font_left)
-    trw = draw.textlength(text_right, font=font_right)
-    h = max(
-        draw.textbbox((0, 0), text_left, font=font_left)[3] - draw.textbbox((0, 0), text_left, font=font_left)[1],
-        draw.textbbox((0, 0), text_right, font=font_right)[3] - draw.textbbox((0, 0), text_right, font=font_right)[1],
-    ) + pad_y * 2
+    tlw = text_layout.text_length(text_left, font_left)
+    trw = text_layout.text_length(text_right, font_right)
+    h = max(text_layout.text_height(text_left, font_left), text_layout.text_height(text_right, font_right)) + pad_y * 2
     w = int(tlw + trw + pad_x * 3)
     x, y = xy
     try:
-        ImageDraw.Draw(base).rounded_rectangle([x, y, x + w, y + h], radius=h // 2, fill=bg)
+        draw.rounded_rectangle([x, y, x + w, y + h], radius=h // 2, fill=bg)
     except Exception:
-        ImageDraw.Draw(base).rectangle([x, y, x + w, y + h], fill=bg)
+        draw.rectangle([x, y, x + w, y + h], fill=bg)
     # write texts
     ty = y + pad_y
     draw.text((x + pad_x, ty), text_left, font=font_left, fill=fg_left)
@@ -278,44 +239,14 @@ def make_panel_clip(entry: Dict[str, str], prev_entry: Optional[Dict[str, str]])
     text_muted = (120, 120, 120)
     green = (46, 125, 50)
 
-    # Fonts
-    title_font = load_thai_font([
-        ("C:/Windows/Fonts/LeelawUI.ttf", 60),
-        ("C:/Windows/Fonts/THSarabunNew.ttf", 72),
-        ("C:/Windows/Fonts/Tahoma.ttf", 56),
-        ("C:/Windows/Fonts/segoeui.ttf", 56),
-    ])
-    head_font = load_thai_font([
-        ("C:/Windows/Fonts/LeelawUI.ttf", 48),
-        ("C:/Windows/Fonts/THSarabunNew.ttf", 60),
-        ("C:/Windows/Fonts/Tahoma.ttf", 44),
-        ("C:/Windows/Fonts/segoeui.ttf", 44),
-    ])
-    label_font = load_thai_font([
-        ("C:/Windows/Fonts/LeelawUI.ttf", 46),
-        ("C:/Windows/Fonts/THSarabunNew.ttf", 56),
-        ("C:/Windows/Fonts/Tahoma.ttf", 42),
-        ("C:/Windows/Fonts/segoeui.ttf", 42),
-    ])
-    num_font = load_thai_font([
-        ("C:/Windows/Fonts/arialbd.ttf", 48),
-        ("C:/Windows/Fonts/Tahoma.ttf", 48),
-        ("C:/Windows/Fonts/segoeuib.ttf", 48),
-    ])
-    chip_l_font = load_thai_font([
-        ("C:/Windows/Fonts/LeelawUI.ttf", 40),
-        ("C:/Windows/Fonts/Tahoma.ttf", 36),
-        ("C:/Windows/Fonts/segoeui.ttf", 36),
-    ])
-    chip_r_font = load_thai_font([
-        ("C:/Windows/Fonts/arialbd.ttf", 40),
-        ("C:/Windows/Fonts/Tahoma.ttf", 40),
-    ])
-    small_font = load_thai_font([
-        ("C:/Windows/Fonts/LeelawUI.ttf", 40),
-        ("C:/Windows/Fonts/Tahoma.ttf", 36),
-        ("C:/Windows/Fonts/segoeui.ttf", 36),
-    ])
+    # Fonts (resolved once per process by font_registry)
+    title_font = get_font("title")
+    head_font = get_font("head")
+    label_font = get_font("label")
+    num_font = get_font("num")
+    chip_l_font = get_font("chip_label")
+    chip_r_font = get_font("chip_value")
+    small_font = get_font("small")
 
     # Base image with rounded card
     img = Image.new("RGBA", (card_w, card_h), (0, 0, 0, 0))
@@ -335,7 +266,7 @@ def make_panel_clip(entry: Dict[str, str], prev_entry: Optional[Dict[str, str]])
     # Header text
     title = "ราคาทองตามประกาศสมาคมค้าทองคำ"
     draw = ImageDraw.Draw(img)
-    tw = draw.textlength(title, font=title_font)
+    tw = text_layout.text_length(title, title_font)
     draw.text(((card_w - tw) // 2, int(header_h * 0.28)), title, font=title_font, fill=(255, 255, 255))
 
     # Metrics chips row (Gold Spot, USD/THB)
@@ -469,10 +400,10 @@ def make_panel_clip(entry: Dict[str, str], prev_entry: Optional[Dict[str, str]])
     # left
     draw.text((int(card_w * 0.05), baseline_y), left_info, font=small_font, fill=text_muted)
     # center
-    mid_w = draw.textlength(mid_info, font=small_font)
+    mid_w = text_layout.text_length(mid_info, small_font)
     draw.text(((card_w - mid_w) // 2, baseline_y), mid_info, font=small_font, fill=text_muted)
     # right
-    right_w = draw.textlength(right_info, font=small_font)
+    right_w = text_layout.text_length(right_info, small_font)
     draw.text((card_w - right_w - int(card_w * 0.05), baseline_y), right_info, font=small_font, fill=text_muted)
 
     np_img = np.array(img)
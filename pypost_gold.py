@@ -1,9 +1,6 @@
 import os
 import json
 import pickle
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
 
 # การตั้งค่าพื้นฐาน
 SCOPES = ['https://www.googleapis.com/auth/blogger']
@@ -11,6 +8,11 @@ TARGET_BLOG_ID = "8971911068975230651"  # บล็อกราคาทอง
 JSON_FILE_PATH = r"E:\gold_vertical_panel\data\gold_prices.json"
 
 def get_service():
+    # Google client libraries are slow to import; only load them when posting.
+    from google_auth_oauthlib.flow import InstalledAppFlow
+    from google.auth.transport.requests import Request
+    from googleapiclient.discovery import build
+
     creds = None
     if os.path.exists('token.pickle'):
         with open('token.pickle', 'rb') as token:
@@ -0,0 +1,73 @@
+"""
+Memory-mapped raw background frames (build_video(raw_bg_cache=True)).
+
+A .rgbraw file holds one prepared background as decoded frames, so a
+render on the same host skips H.264 decoding entirely. The file starts with a
+HEADER_SIZE-byte header: MAGIC, then a JSON object with width, height, fps,
+frames and pix_fmt, padded with spaces. After the header come the frames, in
+packed rgb24, back to back. The header size is a page multiple, so
+np.memmap can view the frames without copying. The compositor reads them in
+place, and concurrent renders of the same background share the page cache.
+
+rgb24 is the format the compositor blends in. A YUV 4:2:0 file would be
+half the size, but it would need a colour conversion in Python on every
+frame, which is the work this cache exists to avoid.
+"""
+
+import json
+import os
+from typing import BinaryIO, Dict
+
+import numpy as np
+
+MAGIC = b"RAWFRM01"
+HEADER_SIZE = 4096
+PIX_FMT = "rgb24"
+RAW_EXT = ".rgbraw"
+
+
+def is_raw(path: str) -> bool:
+    return path.endswith(RAW_EXT)
+
+
+def write_header(f: BinaryIO, width: int, height: int, fps: int, frames: int) -> None:
+    """Write the header at the start of `f` (frames follow at HEADER_SIZE)."""
+    meta = json.dumps({"width": width, "height": height, "fps": fps, "frames": frames,
+                       "pix_fmt": PIX_FMT}).encode("ascii")
+    if len(MAGIC) + len(meta) > HEADER_SIZE:
+        raise ValueError("raw frame header too large")
+    f.seek(0)
+    f.write(MAGIC + meta.ljust(HEADER_SIZE - len(MAGIC), b" "))
+
+
+def read_header(path: str) -> Dict:
+    with open(path, "rb") as f:
+        head = f.read(HEADER_SIZE)
+    if len(head) < HEADER_SIZE or not head.startswith(MAGIC):
+        raise ValueError(f"{path} is not a raw frame file")
+    meta = json.loads(head[len(MAGIC):].decode("ascii"))
+    if meta.get("pix_fmt") != PIX_FMT:
+        raise ValueError(f"{path}: unsupported pix_fmt {meta.get('pix_fmt')}")
+    expected = HEADER_SIZE + meta["frames"] * meta["width"] * meta["height"] * 3
+    if os.path.getsize(path) < expected:
+        raise ValueError(f"{path} is truncated")
+    return meta
+
+
+class RawFrames:
+    """Zero-copy frames of a .rgbraw file; frame_at(t) is a read-only view into the mapping."""
+
+    def __init__(self, path: str):
+        meta = read_header(path)
+        self.path = path
+        self.width, self.height, self.fps = meta["width"], meta["height"], meta["fps"]
+        self.n_frames = meta["frames"]
+        self.frames = np.memmap(path, dtype=np.uint8, mode="r", offset=HEADER_SIZE,
+                                shape=(self.n_frames, self.height, self.width, 3))
+
+    def frame_at(self, t: float) -> np.ndarray:
+        return self.frames[min(int(t * self.fps + 1e-5), self.n_frames - 1)]
+
+    def close(self) -> None:
+        # The mapping is released once the last view of it is gone.
+        self.frames = None
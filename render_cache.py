@@ -0,0 +1,166 @@
+"""
+Content-addressed cache of finished renders (MP4s and panel images).
+
+The key is a SHA-256 over everything that decides the output pixels: the
+rendered entries, the resolved background file (path, size, mtime), the render
+options (message, logo URL and a hash of its current bytes from logo_cache,
+engine, encoder profile, output formats) and the panel template key. A hit copies the stored files to the requested output
+paths instead of rendering again.
+
+Each entry is a directory cache/renders/<key>/ holding the files plus
+meta.json. Entries are evicted when unused for longer than the maximum age,
+or least-recently-used first once the cache exceeds its size budget.
+
+Usage:
+    python render_cache.py             # show size / entry count
+    python render_cache.py --evict     # apply the size and age limits now
+    python render_cache.py --clear
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from typing import Dict, List, Optional, Tuple
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(SCRIPT_DIR, "cache", "renders")
+
+# Bump when the meaning of a cached file changes without the key noticing.
+RENDER_CACHE_VERSION = 1
+MAX_CACHE_BYTES = 2 * 1024 ** 3
+MAX_AGE_SECONDS = 14 * 24 * 3600
+
+
+def file_fingerprint(path: str) -> Dict:
+    try:
+        st = os.stat(path)
+        return {"name": os.path.basename(path), "size": st.st_size, "mtime": st.st_mtime}
+    except OSError:
+        return {"name": os.path.basename(path), "missing": True}
+
+
+def render_key(payload: Dict) -> str:
+    blob = json.dumps({"version": RENDER_CACHE_VERSION, **payload}, sort_keys=True,
+                      ensure_ascii=False, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def _entry_dir(key: str) -> str:
+    return os.path.join(CACHE_DIR, key)
+
+
+def _touch(entry_dir: str) -> None:
+    now = time.time()
+    try:
+        os.utime(entry_dir, (now, now))
+    except OSError:
+        pass
+
+
+def lookup(key: str, names: List[str]) -> Optional[Dict[str, str]]:
+    """Paths of the cached files `names` for `key`, or None unless all are present."""
+    entry_dir = _entry_dir(key)
+    paths = {name: os.path.join(entry_dir, name) for name in names}
+    if not all(os.path.isfile(p) for p in paths.values()):
+        return None
+    _touch(entry_dir)  # last use drives age/LRU eviction
+    return paths
+
+
+def restore(key: str, targets: Dict[str, str]) -> bool:
+    """Copy cached files to their targets ({cached name: output path}); False on a miss."""
+    cached = lookup(key, list(targets))
+    if cached is None:
+        return False
+    for name, target in targets.items():
+        os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+        tmp_path = f"{target}.{os.getpid()}.tmp"
+        shutil.copyfile(cached[name], tmp_path)
+        os.replace(tmp_path, target)
+    return True
+
+
+def store(key: str, sources: Dict[str, str], meta: Optional[Dict] = None) -> None:
+    """Copy finished outputs ({cached name: path}) into the cache entry for `key`."""
+    entry_dir = _entry_dir(key)
+    os.makedirs(entry_dir, exist_ok=True)
+    for name, src in sources.items():
+        tmp_path = os.path.join(entry_dir, f".{name}.{os.getpid()}.tmp")
+        shutil.copyfile(src, tmp_path)
+        os.replace(tmp_path, os.path.join(entry_dir, name))
+    meta_path = os.path.join(entry_dir, "meta.json")
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            existing = json.load(f)
+    except Exception:
+        existing = {}
+    existing.update(meta or {})
+    existing["files"] = sorted(set(existing.get("files", [])) | set(sources))
+    existing.setdefault("created", time.time())
+    tmp_meta = f"{meta_path}.{os.getpid()}.tmp"
+    with open(tmp_meta, "w", encoding="utf-8") as f:
+        json.dump(existing, f, ensure_ascii=False, indent=2, default=str)
+    os.replace(tmp_meta, meta_path)
+    _touch(entry_dir)
+
+
+def _entries() -> List[Tuple[str, float, int]]:
+    """(dir, last use, bytes) for every cache entry."""
+    result = []
+    if not os.path.isdir(CACHE_DIR):
+        return result
+    for name in os.listdir(CACHE_DIR):
+        entry_dir = os.path.join(CACHE_DIR, name)
+        if not os.path.isdir(entry_dir):
+            continue
+        size = 0
+        for fname in os.listdir(entry_dir):
+            try:
+                size += os.path.getsize(os.path.join(entry_dir, fname))
+            except OSError:
+                pass
+        result.append((entry_dir, os.path.getmtime(entry_dir), size))
+    return result
+
+
+def evict(max_bytes: int = MAX_CACHE_BYTES, max_age: float = MAX_AGE_SECONDS) -> int:
+    """Drop entries unused for `max_age`, then LRU entries until under `max_bytes`."""
+    now = time.time()
+    removed = 0
+    kept = []
+    for entry_dir, last_use, size in _entries():
+        if now - last_use > max_age:
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            removed += 1
+        else:
+            kept.append((entry_dir, last_use, size))
+    total = sum(size for _, _, size in kept)
+    for entry_dir, _, size in sorted(kept, key=lambda item: item[1]):
+        if total <= max_bytes:
+            break
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        total -= size
+        removed += 1
+    return removed
+
+
+def stats() -> Dict:
+    entries = _entries()
+    return {"entries": len(entries), "bytes": sum(size for _, _, size in entries), "dir": CACHE_DIR}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or trim the render cache.")
+    parser.add_argument("--evict", action="store_true", help="Apply the size/age limits.")
+    parser.add_argument("--clear", action="store_true", help="Remove every cached render.")
+    args = parser.parse_args()
+
+    if args.clear:
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+    elif args.evict:
+        print(f"[CACHE] Evicted {evict()} entr(y/ies)")
+    info = stats()
+    print(f"[CACHE] {info['entries']} entries, {info['bytes'] / (1024 ** 2):.1f} MB in {info['dir']}")
@@ -0,0 +1,232 @@
+"""
+Long-lived render worker for app.py.
+
+The daemon imports app/moviepy once and loads fonts, the panel chrome and the
+prepared backgrounds. It then serves render jobs on a local socket
+(127.0.0.1 only, authenticated with a random key in cache/render_daemon.key).
+A job is just the app.py argument list, run in-process through app.main(argv).
+Jobs are handled one at a time, in arrival order. Connections are accepted
+on a thread of their own, so the handshake, --status and --stop are answered
+at once even while a render is running; a render request then waits in the
+job queue, which the client's timeout covers.
+
+main_workflow.py calls render_via_daemon() and falls back to running app.py
+as a subprocess when no daemon is listening. A job the daemon accepted but
+did not finish in time is reported as timed out, never rendered again
+somewhere else: the daemon may still be writing its outputs.
+
+Usage:
+    python render_daemon.py                 # serve (Ctrl+C to stop)
+    python render_daemon.py --status
+    python render_daemon.py --stop
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import queue
+import secrets
+import sys
+import threading
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+from typing import Dict, List, Optional
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+KEY_PATH = os.path.join(SCRIPT_DIR, "cache", "render_daemon.key")
+HOST = "127.0.0.1"
+DEFAULT_PORT = 47815
+_RECV_TIMEOUT_S = 10  # a client sends its message right after the handshake
+
+
+def _write_key() -> bytes:
+    key = secrets.token_bytes(32)
+    os.makedirs(os.path.dirname(KEY_PATH), exist_ok=True)
+    tmp_path = f"{KEY_PATH}.{os.getpid()}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(key)
+    os.replace(tmp_path, KEY_PATH)
+    return key
+
+
+def _read_key() -> Optional[bytes]:
+    try:
+        with open(KEY_PATH, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+# ---------- client side ----------
+
+def request(message: Dict, port: int = DEFAULT_PORT, timeout: float = 300) -> Optional[Dict]:
+    """Send one message to the daemon and return its answer.
+
+    None if no daemon is running (or it went away). If the daemon took the
+    message but did not answer within `timeout`, {"timed_out": True,
+    "seconds": timeout}: it may still be working on it.
+    """
+    key = _read_key()
+    if key is None:
+        return None
+    try:
+        conn = Client((HOST, port), authkey=key)
+    except (OSError, EOFError, AuthenticationError):
+        return None  # nothing listening, or a stale key from an earlier daemon
+    try:
+        conn.send(message)
+        if not conn.poll(timeout):
+            print(f"[WARN] Render daemon did not answer within {timeout:g}s")
+            return {"timed_out": True, "seconds": timeout}
+        return conn.recv()
+    except (OSError, EOFError):
+        return None
+    finally:
+        conn.close()
+
+
+def render_via_daemon(argv: List[str], port: int = DEFAULT_PORT, timeout: float = 300) -> Optional[Dict]:
+    """Run app.py `argv` in the daemon: {"returncode", "output", "seconds"}, or None if unavailable.
+
+    {"timed_out": True, "seconds": timeout} if the render was still running after `timeout`.
+    """
+    return request({"cmd": "render", "argv": list(argv)}, port=port, timeout=timeout)
+
+
+# ---------- daemon side ----------
+
+def warm_up() -> None:
+    import app
+
+    start = time.perf_counter()
+    app._moviepy()
+    app.panel_template(app.DEFAULT_PANEL_THEME)
+    prepared = app.prepare_all_backgrounds(app.W, app.H, app.FPS, app.DURATION)
+    print(f"[DAEMON] Warm: moviepy, panel layout (fonts, chrome), {len(prepared)} background(s) "
+          f"in {time.perf_counter() - start:.2f}s")
+
+
+def handle_render(argv: List[str]) -> Dict:
+    import app
+
+    buffer = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(buffer), contextlib.redirect_stderr(buffer):
+        try:
+            returncode = app.main(argv)
+        except SystemExit as e:  # argparse errors
+            returncode = e.code if isinstance(e.code, int) else 1
+        except Exception as e:
+            print(f"[DAEMON] Render failed: {type(e).__name__}: {e}")
+            returncode = 1
+    return {"returncode": returncode or 0, "output": buffer.getvalue(),
+            "seconds": time.perf_counter() - start}
+
+
+def _reply(conn, reply: Dict, what: str) -> None:
+    """Send `reply`; a client that already gave up (timed out, closed its socket) only loses it."""
+    try:
+        conn.send(reply)
+    except (OSError, EOFError) as e:
+        print(f"[DAEMON] Dropped {what}: the client is gone ({type(e).__name__}: {e})")
+
+
+def _accept_loop(listener: Listener, jobs: queue.Queue, state: Dict, stop: threading.Event) -> None:
+    """Accept connections and read their message; renders are queued, everything else answered here."""
+    while not stop.is_set():
+        try:
+            conn = listener.accept()
+        except Exception as e:  # failed authentication, client vanished, listener closed, ...
+            if not stop.is_set():
+                print(f"[DAEMON] Rejected connection: {e}")
+            continue
+        try:
+            if not conn.poll(_RECV_TIMEOUT_S):
+                conn.close()
+                continue
+            message = conn.recv()
+        except (OSError, EOFError):
+            conn.close()
+            continue
+        cmd = message.get("cmd") if isinstance(message, dict) else None
+        if cmd == "render":
+            jobs.put((conn, message.get("argv", [])))
+            continue  # answered by serve() when the job is done
+        with conn:
+            if cmd == "status":
+                _reply(conn, {"pid": os.getpid(), "jobs": state["jobs"], "busy": state["busy"],
+                              "queued": jobs.qsize()}, "a status reply")
+            elif cmd == "stop":
+                _reply(conn, {"stopping": True}, "a stop reply")
+                stop.set()
+            else:
+                _reply(conn, {"error": f"unknown command: {cmd}"}, "an error reply")
+
+
+def serve(port: int = DEFAULT_PORT) -> None:
+    warm_up()
+    key = _write_key()
+    jobs: queue.Queue = queue.Queue()
+    state = {"jobs": 0, "busy": False}
+    stop = threading.Event()
+    try:
+        with Listener((HOST, port), authkey=key) as listener:
+            print(f"[DAEMON] Listening on {HOST}:{port}")
+            threading.Thread(target=_accept_loop, args=(listener, jobs, state, stop),
+                             name="daemon-accept", daemon=True).start()
+            try:
+                while not stop.is_set():
+                    try:
+                        conn, argv = jobs.get(timeout=0.5)
+                    except queue.Empty:
+                        continue
+                    with conn:
+                        state["jobs"] += 1
+                        state["busy"] = True
+                        job = state["jobs"]
+                        print(f"[DAEMON] Job {job}: app.py {' '.join(argv)}")
+                        result = handle_render(argv)
+                        state["busy"] = False
+                        print(f"[DAEMON] Job {job} finished with {result['returncode']} "
+                              f"in {result['seconds']:.2f}s")
+                        _reply(conn, result, f"the result of job {job} (exit code {result['returncode']})")
+            except KeyboardInterrupt:
+                pass
+            finally:
+                stop.set()  # before the listener closes, so the accept thread exits quietly
+        while True:  # renders still queued: close them so their clients stop waiting
+            try:
+                conn, _ = jobs.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+    finally:
+        with contextlib.suppress(OSError):
+            os.remove(KEY_PATH)
+    print("[DAEMON] Stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Persistent app.py render worker.")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--status", action="store_true", help="Report whether a daemon is running.")
+    parser.add_argument("--stop", action="store_true", help="Ask a running daemon to exit.")
+    args = parser.parse_args()
+
+    if args.status or args.stop:
+        reply = request({"cmd": "stop" if args.stop else "status"}, port=args.port, timeout=10)
+        if reply is None:
+            print("[DAEMON] Not running")
+        elif reply.get("timed_out"):
+            print("[DAEMON] Running, but not answering (no reply within 10s)")
+        else:
+            print(f"[DAEMON] {reply}")
+        sys.exit(0 if reply is not None and not reply.get("timed_out") else 1)
+    serve(args.port)
+
+
+if __name__ == "__main__":
+    main()
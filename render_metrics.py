@@ -0,0 +1,145 @@
+"""
+Per-stage timing for a render run.
+
+StageTimer collects wall time, CPU time (this process plus finished child
+processes such as ffmpeg) and the peak-RSS high-water mark for named stages.
+Stages are either blocks (`with timer.stage("panel"):`) or per-frame callables
+(`timer.timed("composite", fn)`) whose calls are accumulated. A stage can
+`exclude` other stages that run inside it, so e.g. "encode" does not double
+count the frame generation that moviepy drives from write_videofile.
+
+The record is plain JSON and is written next to the render outputs.
+"""
+
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Optional
+
+TIMINGS_VERSION = 1
+
+
+def peak_rss_mb(children: bool = False) -> Optional[float]:
+    """Peak resident set size (this process, or its largest waited-for child) in MB."""
+    try:
+        import resource
+        who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+        peak = resource.getrusage(who).ru_maxrss
+        # Linux reports KiB, macOS bytes.
+        return peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0
+    except ImportError:
+        pass
+    if children:
+        return None
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / (1024.0 * 1024.0)
+    except ImportError:
+        return None
+
+
+def _cpu_seconds() -> float:
+    # os.times() child fields only cover waited-for children (0 on Windows).
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+def timings_path_for(output_path: str) -> str:
+    """out/output.mp4 -> out/output.timings.json"""
+    return os.path.splitext(output_path)[0] + ".timings.json"
+
+
+class StageTimer:
+    def __init__(self):
+        self.started_at = datetime.now().isoformat(timespec="seconds")
+        self._t0 = time.perf_counter()
+        self._stages: Dict[str, Dict] = {}
+        self.meta: Dict = {}
+
+    def add(self, name: str, wall: float, cpu: float, calls: int = 1) -> None:
+        entry = self._stages.setdefault(name, {"wall_s": 0.0, "cpu_s": 0.0, "calls": 0})
+        entry["wall_s"] += wall
+        entry["cpu_s"] += cpu
+        entry["calls"] += calls
+
+    def _totals(self, names: Iterable[str]):
+        wall = cpu = 0.0
+        for name in names:
+            entry = self._stages.get(name)
+            if entry:
+                wall += entry["wall_s"]
+                cpu += entry["cpu_s"]
+        return wall, cpu
+
+    @contextmanager
+    def stage(self, name: str, exclude: Iterable[str] = ()):
+        exclude = tuple(exclude)
+        ex_wall0, ex_cpu0 = self._totals(exclude)
+        t0, c0 = time.perf_counter(), _cpu_seconds()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - t0, _cpu_seconds() - c0
+            ex_wall1, ex_cpu1 = self._totals(exclude)
+            self.add(name, wall - (ex_wall1 - ex_wall0), cpu - (ex_cpu1 - ex_cpu0))
+            self._stages[name]["peak_rss_mb"] = peak_rss_mb()
+
+    def timed(self, name: str, fn: Callable, exclude: Iterable[str] = ()) -> Callable:
+        """Wrap a per-frame function so every call is accumulated into `name`."""
+        exclude = tuple(exclude)
+
+        def wrapper(*args, **kwargs):
+            ex_wall0, ex_cpu0 = self._totals(exclude) if exclude else (0.0, 0.0)
+            t0, c0 = time.perf_counter(), time.process_time()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                wall, cpu = time.perf_counter() - t0, time.process_time() - c0
+                ex_wall1, ex_cpu1 = self._totals(exclude) if exclude else (0.0, 0.0)
+                self.add(name, wall - (ex_wall1 - ex_wall0), cpu - (ex_cpu1 - ex_cpu0))
+        return wrapper
+
+    def record(self) -> Dict:
+        stages = []
+        for name, entry in self._stages.items():
+            stages.append({"name": name,
+                           "wall_s": round(entry["wall_s"], 4),
+                           "cpu_s": round(entry["cpu_s"], 4),
+                           "calls": entry["calls"],
+                           "peak_rss_mb": entry.get("peak_rss_mb", peak_rss_mb())})
+        return {
+            "version": TIMINGS_VERSION,
+            "started_at": self.started_at,
+            "total_s": round(time.perf_counter() - self._t0, 4),
+            "peak_rss_mb": peak_rss_mb(),
+            "child_peak_rss_mb": peak_rss_mb(children=True),
+            **self.meta,
+            "stages": stages,
+        }
+
+    def write(self, path: str) -> Dict:
+        record = self.record()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(record, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+        return record
+
+
+def maybe_stage(timer: Optional[StageTimer], name: str, exclude: Iterable[str] = ()):
+    """timer.stage(name) or a no-op when no timer is being collected."""
+    return timer.stage(name, exclude) if timer is not None else nullcontext()
+
+
+def format_record(record: Dict) -> str:
+    """One line per stage, slowest first."""
+    lines = [f"total {record.get('total_s', 0):.2f}s  peak {record.get('peak_rss_mb') or 0:.0f} MB"]
+    for stage in sorted(record.get("stages", []), key=lambda s: s["wall_s"], reverse=True):
+        lines.append(f"  {stage['name']:20s} {stage['wall_s']:8.3f}s wall  {stage['cpu_s']:8.3f}s cpu  "
+                     f"x{stage['calls']}")
+    return "\n".join(lines)
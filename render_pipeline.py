@@ -0,0 +1,230 @@
+"""
+Pipelined rendering (build_video(engine="pipeline")).
+
+The moviepy and numpy engines run decode, composite and encode in lockstep:
+write_videofile asks for a frame, waits for the background to be decoded and
+the overlay blended, then waits again while the frame is piped to x264. Here
+each of those runs on its own thread:
+
+    decode     fills a background buffer with the next frame
+    composite  blends the overlay (and animated fields) into an output buffer
+    encode     writes the output buffer to ffmpeg's stdin (rawvideo -> x264)
+
+The stages are connected by bounded queues that carry buffers from two pools
+allocated up front (`depth` background and `depth` output frames). A buffer
+goes back to its pool's free queue once the next stage is done with it, so
+nothing frame-sized is allocated per frame, and a slow stage stalls the
+others instead of letting frames pile up. Pipe I/O and the NumPy blends
+release the GIL, so the stages overlap with each other and with the ffmpeg
+decoder and encoder processes.
+
+Every stage records its busy time, the time it waited for input (starved)
+and the time it waited for a free buffer downstream (blocked). The stage
+with the highest utilization is the one limiting throughput.
+"""
+
+import queue
+import subprocess
+import threading
+import time
+from typing import Callable, Dict, List, Sequence
+
+import numpy as np
+
+from ffmpeg_utils import FFmpegError, ffmpeg_binary
+
+QUEUE_DEPTH = 4
+_POLL_S = 0.05
+_END = None  # end-of-stream marker on the ready queues
+
+
+class _Stopped(Exception):
+    """Another stage failed; unwind this one."""
+
+
+class RawVideoEncoder:
+    """x264 encoder fed rgb24 frames on stdin, with the arguments moviepy's write_videofile uses.
+
+    `extra_args` go after the x264 settings (e.g. chunked_encode.gop_args).
+    """
+
+    def __init__(self, out_path: str, width: int, height: int, fps: int,
+                 preset: str = "medium", threads: int = 4, extra_args: Sequence[str] = ()):
+        exe = ffmpeg_binary()
+        if not exe:
+            raise FFmpegError("ffmpeg binary not found")
+        cmd = [exe, "-y", "-loglevel", "error",
+               "-f", "rawvideo", "-vcodec", "rawvideo", "-s", f"{width}x{height}",
+               "-pix_fmt", "rgb24", "-r", f"{fps:.02f}", "-an", "-i", "-",
+               "-vcodec", "libx264", "-preset", preset, "-threads", str(threads), *extra_args,
+               "-pix_fmt", "yuv420p", out_path]
+        self.out_path = out_path
+        self._proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL,
+                                      stderr=subprocess.PIPE)
+
+    def write(self, frame: np.ndarray) -> None:
+        try:
+            self._proc.stdin.write(memoryview(frame).cast("B"))
+        except BrokenPipeError:
+            self._proc.wait()
+            raise FFmpegError(f"ffmpeg stopped encoding {self.out_path}: {self._stderr()}")
+
+    def close(self) -> None:
+        """Flush and wait for the encoder; raise FFmpegError if it failed."""
+        try:
+            self._proc.stdin.close()
+        except BrokenPipeError:
+            pass
+        if self._proc.wait() != 0:
+            raise FFmpegError(f"ffmpeg failed encoding {self.out_path}: {self._stderr()}")
+        self._proc.stderr.close()
+
+    def abort(self) -> None:
+        if self._proc.poll() is None:
+            self._proc.kill()
+        self._proc.wait()
+
+    def _stderr(self) -> str:
+        return self._proc.stderr.read().decode("utf-8", "replace").strip()[-2000:]
+
+
+class _Stage:
+    def __init__(self, name: str):
+        self.name = name
+        self.busy_s = self.cpu_s = self.starved_s = self.blocked_s = 0.0
+        self.frames = 0
+
+    def report(self, wall: float) -> Dict:
+        return {"busy_s": round(self.busy_s, 4), "cpu_s": round(self.cpu_s, 4),
+                "starved_s": round(self.starved_s, 4), "blocked_s": round(self.blocked_s, 4),
+                "frames": self.frames, "utilization": round(self.busy_s / wall, 3) if wall > 0 else None}
+
+
+class FramePipeline:
+    """Run decode -> composite -> encode for `n_frames` frames on three threads.
+
+    decode(index, bg) fills the (H, W, 3) buffer `bg` with background frame
+    `index`; composite(index, bg, out) writes the finished frame into `out`;
+    encode(out) consumes it. Buffers are reused as soon as the callable
+    returns, so none of them may keep a reference.
+    """
+
+    STAGES = ("decode", "composite", "encode")
+
+    def __init__(self, width: int, height: int, n_frames: int, depth: int = QUEUE_DEPTH):
+        self.n_frames = n_frames
+        self.depth = max(1, depth)
+        self._bg_free: queue.Queue = queue.Queue()
+        self._out_free: queue.Queue = queue.Queue()
+        for _ in range(self.depth):
+            self._bg_free.put(np.empty((height, width, 3), dtype=np.uint8))
+            self._out_free.put(np.empty((height, width, 3), dtype=np.uint8))
+        self._bg_ready: queue.Queue = queue.Queue(maxsize=self.depth)
+        self._out_ready: queue.Queue = queue.Queue(maxsize=self.depth)
+        self._stop = threading.Event()
+        self._errors: List[BaseException] = []
+        self.stages = {name: _Stage(name) for name in self.STAGES}
+
+    def _get(self, q: queue.Queue, stage: _Stage, wait_attr: str):
+        t0 = time.perf_counter()
+        try:
+            while True:
+                if self._stop.is_set():
+                    raise _Stopped()
+                try:
+                    return q.get(timeout=_POLL_S)
+                except queue.Empty:
+                    pass
+        finally:
+            setattr(stage, wait_attr, getattr(stage, wait_attr) + time.perf_counter() - t0)
+
+    def _put(self, q: queue.Queue, item, stage: _Stage) -> None:
+        t0 = time.perf_counter()
+        try:
+            while True:
+                if self._stop.is_set():
+                    raise _Stopped()
+                try:
+                    q.put(item, timeout=_POLL_S)
+                    return
+                except queue.Full:
+                    pass
+        finally:
+            stage.blocked_s += time.perf_counter() - t0
+
+    def _work(self, stage: _Stage, fn: Callable, *args) -> None:
+        t0, c0 = time.perf_counter(), time.thread_time()
+        try:
+            fn(*args)
+        finally:
+            stage.busy_s += time.perf_counter() - t0
+            stage.cpu_s += time.thread_time() - c0
+        stage.frames += 1
+
+    def _run_stage(self, loop: Callable, fn: Callable) -> None:
+        try:
+            loop(fn)
+        except _Stopped:
+            pass
+        except BaseException as e:
+            self._errors.append(e)
+            self._stop.set()
+
+    def _decode_loop(self, decode: Callable) -> None:
+        stage = self.stages["decode"]
+        for index in range(self.n_frames):
+            bg = self._get(self._bg_free, stage, "blocked_s")
+            self._work(stage, decode, index, bg)
+            self._put(self._bg_ready, (index, bg), stage)
+        self._put(self._bg_ready, _END, stage)
+
+    def _composite_loop(self, composite: Callable) -> None:
+        stage = self.stages["composite"]
+        while True:
+            item = self._get(self._bg_ready, stage, "starved_s")
+            if item is _END:
+                break
+            index, bg = item
+            out = self._get(self._out_free, stage, "blocked_s")
+            self._work(stage, composite, index, bg, out)
+            self._bg_free.put(bg)
+            self._put(self._out_ready, out, stage)
+        self._put(self._out_ready, _END, stage)
+
+    def _encode_loop(self, encode: Callable) -> None:
+        stage = self.stages["encode"]
+        while True:
+            out = self._get(self._out_ready, stage, "starved_s")
+            if out is _END:
+                break
+            self._work(stage, encode, out)
+            self._out_free.put(out)
+
+    def run(self, decode: Callable, composite: Callable, encode: Callable) -> Dict:
+        """Render every frame; returns the per-stage report. Re-raises the first stage error."""
+        t0 = time.perf_counter()
+        threads = [threading.Thread(target=self._run_stage, args=(loop, fn), name=f"pipeline-{name}")
+                   for name, loop, fn in (("decode", self._decode_loop, decode),
+                                          ("composite", self._composite_loop, composite),
+                                          ("encode", self._encode_loop, encode))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if self._errors:
+            raise self._errors[0]
+        wall = time.perf_counter() - t0
+        stages = {name: stage.report(wall) for name, stage in self.stages.items()}
+        return {"wall_s": round(wall, 4), "depth": self.depth, "frames": self.n_frames,
+                "bottleneck": max(self.stages, key=lambda n: self.stages[n].busy_s),
+                "stages": stages}
+
+
+def format_report(report: Dict) -> str:
+    """One line per stage: utilization, and time starved / blocked on the neighbouring queues."""
+    lines = [f"pipeline {report['frames']} frames in {report['wall_s']:.2f}s "
+             f"(depth {report['depth']}, limited by {report['bottleneck']})"]
+    for name, s in report["stages"].items():
+        lines.append(f"  {name:10s} {100 * (s['utilization'] or 0):5.1f}% busy  {s['busy_s']:7.3f}s  "
+                     f"starved {s['starved_s']:6.3f}s  blocked {s['blocked_s']:6.3f}s")
+    return "\n".join(lines)
@@ -3,6 +3,8 @@ import json
 import os
 import sys
 
+from destination_encodes import video_for
+
 CONFIG_FILE = "config.json"
 GOLD_DATA_FILE = "data/gold_prices.json"
 
@@ -167,7 +169,8 @@ if __name__ == "__main__":
             print("\nGold price update sent to Telegram!")
         
         # Auto-send video if exists (no user prompt for automation)
-        video_path = "out/output.mp4"
+        # The size-targeted copy from app.py --destinations telegram, if there is one.
+        video_path = video_for("telegram", "out/output.mp4")
         if os.path.exists(video_path):
             print(f"\nFound video file: {video_path}")
             print("Sending video automatically...")
@@ -0,0 +1,120 @@
+"""
+Text measurement and line breaking shared by the renderers (app.py,
+pyclipgold.py, facebook_image_post.py).
+
+Measurements are memoized per (text, font). Fonts come from font_registry and
+live for the whole process, so the caches stay valid. Panel labels, chip texts
+and the footer are measured once per process instead of on every render.
+
+wrap_text() breaks lines greedily in a single pass. Each grapheme cluster or
+word is measured once, and its cached advance is added to the running line
+width; the growing line is never re-measured. Thai clusters keep above/below
+marks and following vowels (ะ า ำ ๅ ๆ) with their base character, and
+leading vowels (เ แ โ ใ ไ) with the next one, so a line never starts or ends
+inside a syllable.
+"""
+
+import unicodedata
+from functools import lru_cache
+from typing import List, Tuple
+
+from PIL import Image, ImageDraw
+
+THAI_LEADING_VOWELS = frozenset("เแโใไ")
+THAI_FOLLOWING_VOWELS = frozenset("ะาำๅๆ")
+
+_MEASURE_CACHE_SIZE = 65536
+_SCRATCH_DRAW = ImageDraw.Draw(Image.new("L", (1, 1)))
+
+
+def contains_thai(text: str) -> bool:
+    """Return True if any character is in the Thai Unicode block."""
+    return any(0x0E00 <= ord(ch) <= 0x0E7F for ch in text)
+
+
+@lru_cache(maxsize=_MEASURE_CACHE_SIZE)
+def text_length(text: str, font) -> float:
+    """Advance width of `text` (same value as ImageDraw.textlength)."""
+    return font.getlength(text)
+
+
+@lru_cache(maxsize=_MEASURE_CACHE_SIZE)
+def text_bbox(text: str, font) -> Tuple[int, int, int, int]:
+    """Ink box of `text` drawn at (0, 0) (same value as ImageDraw.textbbox((0, 0), ...))."""
+    return tuple(font.getbbox(text))
+
+
+def text_height(text: str, font) -> int:
+    bbox = text_bbox(text, font)
+    return bbox[3] - bbox[1]
+
+
+@lru_cache(maxsize=4096)
+def multiline_bbox(text: str, font, spacing: int = 4) -> Tuple[int, int, int, int]:
+    """ImageDraw.multiline_textbbox((0, 0), ...) for already wrapped text."""
+    return tuple(_SCRATCH_DRAW.multiline_textbbox((0, 0), text, font=font, spacing=spacing))
+
+
+def grapheme_clusters(text: str) -> List[str]:
+    """Split `text` into units a line may break between (Thai-aware)."""
+    clusters: List[str] = []
+    join_next = False
+    for ch in text:
+        if clusters and (join_next or ch in THAI_FOLLOWING_VOWELS or unicodedata.category(ch).startswith("M")):
+            clusters[-1] += ch
+        else:
+            clusters.append(ch)
+        join_next = ch in THAI_LEADING_VOWELS
+    return clusters
+
+
+def _wrap_clusters(paragraph: str, font, max_width: float) -> List[str]:
+    lines: List[str] = []
+    current: List[str] = []
+    width = 0.0
+    for cluster in grapheme_clusters(paragraph):
+        advance = text_length(cluster, font)
+        if current and width + advance > max_width:
+            lines.append("".join(current))
+            current, width = [cluster], advance
+        else:
+            current.append(cluster)
+            width += advance
+    if current:
+        lines.append("".join(current))
+    return lines
+
+
+def _wrap_words(paragraph: str, font, max_width: float) -> List[str]:
+    lines: List[str] = []
+    space = text_length(" ", font)
+    words = paragraph.split(" ")
+    current, width = [words[0]], text_length(words[0], font)
+    for word in words[1:]:
+        advance = text_length(word, font)
+        if width + space + advance <= max_width:
+            current.append(word)
+            width += space + advance
+        else:
+            lines.append(" ".join(current))
+            current, width = [word], advance
+    lines.append(" ".join(current))
+    return lines
+
+
+@lru_cache(maxsize=1024)
+def wrap_text(text: str, font, max_width: int) -> str:
+    """Wrap text to fit max_width.
+
+    - For languages with spaces, wrap by words.
+    - For Thai (no spaces commonly) and long unspaced strings, wrap by grapheme cluster.
+    """
+    lines: List[str] = []
+    for paragraph in text.split("\n"):
+        if not paragraph:
+            lines.append("")
+        elif contains_thai(paragraph) or " " not in paragraph:
+            lines.extend(_wrap_clusters(paragraph, font, max_width))
+        else:
+            lines.extend(_wrap_words(paragraph, font, max_width))
+    return "\n".join(lines)